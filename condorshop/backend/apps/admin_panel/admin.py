@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import ExportJob
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'row_count', 'file_size', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status', 'created_at')
+    raw_id_fields = ('requested_by',)
+    readonly_fields = ('fingerprint', 'file_path', 'file_size', 'row_count', 'error', 'created_at', 'started_at', 'finished_at')
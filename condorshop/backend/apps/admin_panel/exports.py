@@ -0,0 +1,158 @@
+"""
+Exportaciones CSV del panel de administración (respuesta directa y trabajos en segundo plano).
+
+Las filas se leen en lotes por clave (`id > último id`, LIMIT n) con values_list y
+se escriben a medida que se generan, por lo que la memoria no depende de la cantidad
+de pedidos. Se usa paginación por clave y no QuerySet.iterator() porque el driver de
+MySQL carga el resultado completo en memoria aunque se pida por lotes.
+"""
+
+import csv
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from django.conf import settings
+
+from apps.audit.models import AuditLog
+from apps.orders.models import Order
+from apps.products.models import Product
+
+
+ORDER_EXPORT_HEADER = ['ID', 'Fecha', 'Cliente', 'Email', 'Total', 'Estado', 'Ciudad', 'Región']
+ORDER_EXPORT_FIELDS = (
+    'id', 'created_at', 'customer_name', 'customer_email',
+    'total_amount', 'status__code', 'shipping_city', 'shipping_region',
+)
+
+
+class _Echo:
+    """Pseudo-archivo para csv.writer: retorna la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def iter_rows_by_id(queryset, fields: Sequence[str], chunk_size: int = None) -> Iterator[list[tuple]]:
+    """Lotes de filas (values_list) ordenados por id; `fields` debe comenzar con 'id'."""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    queryset = queryset.order_by('id').values_list(*fields)
+    last_id = 0
+    while True:
+        rows = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def format_dated_row(row: tuple) -> list:
+    """Filas (id, created_at, ...): fecha con el formato de la exportación."""
+    row_id, created_at, *rest = row
+    return [row_id, created_at.strftime('%Y-%m-%d %H:%M:%S'), *rest]
+
+
+def iter_csv(header: Sequence[str], chunks: Iterable[list[tuple]], format_row=None) -> Iterator[str]:
+    """CSV como texto, un fragmento por lote de filas."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for rows in chunks:
+        if format_row:
+            rows = map(format_row, rows)
+        yield ''.join(writer.writerow(row) for row in rows)
+
+
+def encode(chunks: Iterable[str], compress: bool = False) -> Iterator[bytes]:
+    """Codificar a UTF-8 y, opcionalmente, comprimir con gzip de forma incremental."""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+
+    compressor = zlib.compressobj(wbits=31)  # 16 + MAX_WBITS: formato gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def order_export_stream(queryset, compress: bool = False, chunk_size: int = None) -> Iterator[bytes]:
+    """Pedidos del queryset como CSV (bytes), listo para StreamingHttpResponse."""
+    chunks = iter_rows_by_id(queryset.select_related(None).prefetch_related(None), ORDER_EXPORT_FIELDS, chunk_size)
+    return encode(iter_csv(ORDER_EXPORT_HEADER, chunks, format_dated_row), compress=compress)
+
+
+def _filter_by_dates(queryset, filters: dict):
+    if filters.get('date_from'):
+        queryset = queryset.filter(created_at__gte=filters['date_from'])
+    if filters.get('date_to'):
+        queryset = queryset.filter(created_at__lte=filters['date_to'])
+    return queryset
+
+
+def _orders_queryset(filters: dict):
+    queryset = Order.objects.all()
+    if filters.get('status'):
+        queryset = queryset.filter(status_id=filters['status'])
+    if filters.get('customer_email'):
+        queryset = queryset.filter(customer_email=filters['customer_email'])
+    return _filter_by_dates(queryset, filters)
+
+
+def _products_queryset(filters: dict):
+    queryset = Product.objects.all()
+    if filters.get('category'):
+        queryset = queryset.filter(category_id=filters['category'])
+    if filters.get('active'):
+        queryset = queryset.filter(active=filters['active'].lower() in ('1', 'true'))
+    return queryset
+
+
+def _audit_logs_queryset(filters: dict):
+    queryset = AuditLog.objects.all()
+    for field in ('table_name', 'action'):
+        if filters.get(field):
+            queryset = queryset.filter(**{field: filters[field]})
+    if filters.get('user'):
+        queryset = queryset.filter(user_id=filters['user'])
+    return _filter_by_dates(queryset, filters)
+
+
+@dataclass(frozen=True)
+class ExportDefinition:
+    """Columnas, filtros admitidos y queryset base de un tipo de exportación."""
+    header: Sequence[str]
+    fields: Sequence[str]
+    filters: Sequence[str]
+    queryset: Callable[[dict], object]
+    format_row: Optional[Callable[[tuple], list]] = None
+
+    def stream(self, filters: dict, chunk_size: int = None) -> Iterator[list[tuple]]:
+        """Lotes de filas para los filtros dados (paginados por id)."""
+        return iter_rows_by_id(self.queryset(filters), self.fields, chunk_size)
+
+
+# Llaves = ExportJob.KIND_*
+EXPORT_DEFINITIONS = {
+    'ORDERS': ExportDefinition(
+        header=ORDER_EXPORT_HEADER,
+        fields=ORDER_EXPORT_FIELDS,
+        filters=('status', 'customer_email', 'date_from', 'date_to'),
+        queryset=_orders_queryset,
+        format_row=format_dated_row,
+    ),
+    'PRODUCTS': ExportDefinition(
+        header=['ID', 'SKU', 'Nombre', 'Categoría', 'Precio', 'Precio descuento', 'Stock', 'Activo'],
+        fields=('id', 'sku', 'name', 'category__name', 'price', 'discount_price', 'stock_qty', 'active'),
+        filters=('category', 'active'),
+        queryset=_products_queryset,
+    ),
+    'AUDIT_LOGS': ExportDefinition(
+        header=['ID', 'Fecha', 'Usuario', 'Acción', 'Tabla', 'Registro', 'IP'],
+        fields=('id', 'created_at', 'user__email', 'action', 'table_name', 'record_id', 'ip_address'),
+        filters=('table_name', 'action', 'user', 'date_from', 'date_to'),
+        queryset=_audit_logs_queryset,
+        format_row=format_dated_row,
+    ),
+}
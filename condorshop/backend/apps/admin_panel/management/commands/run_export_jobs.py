@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.admin_panel.models import ExportJob
+from apps.admin_panel.services import claim_next_job, purge_expired_exports, run_export_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker de exportaciones: genera los CSV comprimidos de los trabajos en cola '
+        'bajo MEDIA_ROOT/exports/ y elimina los archivos vencidos (EXPORT_JOB_TTL_HOURS).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Seguir procesando indefinidamente en lugar de terminar cuando la cola queda vacía',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Segundos de espera con la cola vacía en modo --loop (default: 2)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help='Filas leídas por consulta (default: EXPORT_CHUNK_SIZE)',
+        )
+
+    def handle(self, *args, **options):
+        completed = failed = 0
+        purged = purge_expired_exports()
+
+        while True:
+            job = claim_next_job()
+            if job:
+                job = run_export_job(job, chunk_size=options['chunk_size'])
+                if job.status == ExportJob.STATUS_COMPLETED:
+                    completed += 1
+                    self.stdout.write(f'  Exportación {job.id}: {job.row_count} filas, {job.file_size} bytes')
+                else:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f'  Exportación {job.id} falló: {job.error}'))
+                continue
+            if not options['loop']:
+                break
+            purged += purge_expired_exports()
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Exportaciones completadas: {completed}, fallidas: {failed}, vencidas eliminadas: {purged}'
+        ))
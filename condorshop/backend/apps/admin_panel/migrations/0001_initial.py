@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(db_column='id', primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('ORDERS', 'Pedidos'), ('PRODUCTS', 'Productos'), ('AUDIT_LOGS', 'Registros de auditoría')], db_column='kind', max_length=20, verbose_name='Tipo')),
+                ('filters', models.JSONField(blank=True, db_column='filters', default=dict, verbose_name='Filtros')),
+                ('fingerprint', models.CharField(db_column='fingerprint', help_text='SHA-256 de tipo + filtros normalizados; permite reutilizar archivos ya generados', max_length=64, verbose_name='Huella')),
+                ('status', models.CharField(choices=[('QUEUED', 'En cola'), ('RUNNING', 'En proceso'), ('COMPLETED', 'Completado'), ('FAILED', 'Fallido')], db_column='status', default='QUEUED', max_length=20, verbose_name='Estado')),
+                ('file_path', models.CharField(blank=True, db_column='file_path', help_text='Ruta relativa a MEDIA_ROOT del archivo .csv.gz generado', max_length=500, null=True, verbose_name='Archivo')),
+                ('file_size', models.BigIntegerField(blank=True, db_column='file_size', null=True, verbose_name='Tamaño (bytes)')),
+                ('row_count', models.BigIntegerField(blank=True, db_column='row_count', null=True, verbose_name='Filas')),
+                ('error', models.CharField(blank=True, db_column='error', max_length=255, null=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')),
+                ('started_at', models.DateTimeField(blank=True, db_column='started_at', null=True, verbose_name='Iniciado el')),
+                ('finished_at', models.DateTimeField(blank=True, db_column='finished_at', null=True, verbose_name='Terminado el')),
+                ('requested_by', models.ForeignKey(blank=True, db_column='requested_by', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Solicitado por')),
+            ],
+            options={
+                'verbose_name': 'Exportación',
+                'verbose_name_plural': 'Exportaciones',
+                'db_table': 'export_jobs',
+                'indexes': [models.Index(fields=['status', 'id'], name='idx_export_queue'), models.Index(fields=['fingerprint', 'status'], name='idx_export_fingerprint')],
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.db import models
+
+
+class ExportJob(models.Model):
+    """Exportación CSV solicitada desde el panel y generada en segundo plano (run_export_jobs)"""
+    KIND_ORDERS = 'ORDERS'
+    KIND_PRODUCTS = 'PRODUCTS'
+    KIND_AUDIT_LOGS = 'AUDIT_LOGS'
+    KIND_CHOICES = [
+        (KIND_ORDERS, 'Pedidos'),
+        (KIND_PRODUCTS, 'Productos'),
+        (KIND_AUDIT_LOGS, 'Registros de auditoría'),
+    ]
+
+    STATUS_QUEUED = 'QUEUED'
+    STATUS_RUNNING = 'RUNNING'
+    STATUS_COMPLETED = 'COMPLETED'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'En cola'),
+        (STATUS_RUNNING, 'En proceso'),
+        (STATUS_COMPLETED, 'Completado'),
+        (STATUS_FAILED, 'Fallido'),
+    ]
+
+    id = models.BigAutoField(primary_key=True, db_column='id')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, db_column='kind', verbose_name='Tipo')
+    filters = models.JSONField(default=dict, blank=True, db_column='filters', verbose_name='Filtros')
+    fingerprint = models.CharField(
+        max_length=64,
+        db_column='fingerprint',
+        help_text='SHA-256 de tipo + filtros normalizados; permite reutilizar archivos ya generados',
+        verbose_name='Huella'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+        db_column='status',
+        verbose_name='Estado'
+    )
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_column='requested_by',
+        related_name='export_jobs',
+        verbose_name='Solicitado por'
+    )
+    file_path = models.CharField(
+        max_length=500,
+        null=True,
+        blank=True,
+        db_column='file_path',
+        help_text='Ruta relativa a MEDIA_ROOT del archivo .csv.gz generado',
+        verbose_name='Archivo'
+    )
+    file_size = models.BigIntegerField(null=True, blank=True, db_column='file_size', verbose_name='Tamaño (bytes)')
+    row_count = models.BigIntegerField(null=True, blank=True, db_column='row_count', verbose_name='Filas')
+    error = models.CharField(max_length=255, null=True, blank=True, db_column='error', verbose_name='Error')
+    created_at = models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')
+    started_at = models.DateTimeField(null=True, blank=True, db_column='started_at', verbose_name='Iniciado el')
+    finished_at = models.DateTimeField(null=True, blank=True, db_column='finished_at', verbose_name='Terminado el')
+
+    class Meta:
+        db_table = 'export_jobs'
+        verbose_name = 'Exportación'
+        verbose_name_plural = 'Exportaciones'
+        indexes = [
+            models.Index(fields=['status', 'id'], name='idx_export_queue'),
+            models.Index(fields=['fingerprint', 'status'], name='idx_export_fingerprint'),
+        ]
+
+    def __str__(self):
+        return f"Exportación {self.id} ({self.kind}) - {self.status}"
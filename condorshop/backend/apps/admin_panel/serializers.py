@@ -1,7 +1,11 @@
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework import serializers
-from apps.products.models import Product, ProductImage
+from rest_framework.reverse import reverse
+from apps.products.models import Product, ProductImage, StockMovement
 from apps.orders.models import Order, OrderStatus
 from apps.products.serializers import ProductAdminSerializer, ProductImageSerializer
+from .exports import EXPORT_DEFINITIONS
+from .models import ExportJob
 
 
 class ProductImageUploadSerializer(serializers.ModelSerializer):
@@ -9,3 +13,62 @@ class ProductImageUploadSerializer(serializers.ModelSerializer):
         model = ProductImage
         fields = ('id', 'url', 'alt_text', 'position')
 
+
+class StockChangeSerializer(serializers.Serializer):
+    quantity = serializers.IntegerField()
+    kind = serializers.ChoiceField(
+        choices=[StockMovement.KIND_RESTOCK, StockMovement.KIND_ADJUSTMENT],
+        default=StockMovement.KIND_RESTOCK,
+    )
+    note = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+    def validate_quantity(self, value):
+        if value == 0:
+            raise serializers.ValidationError('La cantidad no puede ser 0')
+        return value
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    created_by = serializers.SerializerMethodField()
+
+    class Meta:
+        model = StockMovement
+        fields = ('id', 'kind', 'quantity', 'order_id', 'created_by', 'note', 'created_at')
+
+    def get_created_by(self, obj):
+        return obj.created_by.email if obj.created_by else None
+
+
+class ExportJobCreateSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=ExportJob.KIND_CHOICES)
+    filters = serializers.DictField(child=serializers.CharField(allow_blank=True), required=False, default=dict)
+
+    def validate(self, attrs):
+        allowed = EXPORT_DEFINITIONS[attrs['kind']].filters
+        unknown = sorted(set(attrs['filters']) - set(allowed))
+        if unknown:
+            raise serializers.ValidationError({
+                'filters': f"Filtros no admitidos: {', '.join(unknown)} (admitidos: {', '.join(allowed)})"
+            })
+        for key in ('date_from', 'date_to'):
+            value = attrs['filters'].get(key)
+            if value and not (parse_datetime(value) or parse_date(value)):
+                raise serializers.ValidationError({'filters': f'{key} debe ser una fecha (AAAA-MM-DD)'})
+        return attrs
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = (
+            'id', 'kind', 'filters', 'status', 'row_count', 'file_size', 'error',
+            'created_at', 'started_at', 'finished_at', 'download_url',
+        )
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != ExportJob.STATUS_COMPLETED:
+            return None
+        return reverse('admin-export-download', args=[obj.id], request=self.context.get('request'))
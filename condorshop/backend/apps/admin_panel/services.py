@@ -0,0 +1,151 @@
+"""Trabajos de exportación en segundo plano del panel de administración."""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .exports import EXPORT_DEFINITIONS, iter_csv
+from .models import ExportJob
+
+
+logger = logging.getLogger(__name__)
+
+EXPORTS_DIR = 'exports'
+
+
+def normalize_filters(filters: Optional[dict]) -> dict:
+    """Filtros como strings sin espacios, sin valores vacíos y con llaves ordenadas."""
+    normalized = {}
+    for key in sorted(filters or {}):
+        value = str(filters[key]).strip()
+        if value:
+            normalized[key] = value
+    return normalized
+
+
+def export_fingerprint(kind: str, filters: dict) -> str:
+    payload = json.dumps({'kind': kind, 'filters': normalize_filters(filters)}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def artifact_cutoff():
+    """Los archivos terminados antes de este instante ya no se reutilizan."""
+    return timezone.now() - timedelta(hours=settings.EXPORT_JOB_TTL_HOURS)
+
+
+def request_export(kind: str, filters: dict, user=None) -> tuple[ExportJob, bool]:
+    """
+    Encolar una exportación o reutilizar una equivalente.
+
+    Retorna (trabajo, reutilizado). Se reutiliza el trabajo con la misma huella que
+    siga en cola/en proceso, o que haya terminado dentro de EXPORT_JOB_TTL_HOURS.
+    """
+    filters = normalize_filters(filters)
+    fingerprint = export_fingerprint(kind, filters)
+
+    existing = (
+        ExportJob.objects.filter(fingerprint=fingerprint, status__in=[ExportJob.STATUS_QUEUED, ExportJob.STATUS_RUNNING])
+        .order_by('-id')
+        .first()
+    ) or (
+        ExportJob.objects.filter(
+            fingerprint=fingerprint,
+            status=ExportJob.STATUS_COMPLETED,
+            finished_at__gte=artifact_cutoff(),
+        )
+        .order_by('-id')
+        .first()
+    )
+    if existing and (existing.status != ExportJob.STATUS_COMPLETED or artifact_exists(existing)):
+        return existing, True
+
+    job = ExportJob.objects.create(kind=kind, filters=filters, fingerprint=fingerprint, requested_by=user)
+    return job, False
+
+
+def artifact_path(job: ExportJob) -> Optional[str]:
+    return os.path.join(settings.MEDIA_ROOT, job.file_path) if job.file_path else None
+
+
+def artifact_exists(job: ExportJob) -> bool:
+    path = artifact_path(job)
+    return bool(path) and os.path.exists(path)
+
+
+def claim_next_job() -> Optional[ExportJob]:
+    """Tomar el trabajo en cola más antiguo; el UPDATE condicional evita que dos workers tomen el mismo."""
+    queued = ExportJob.objects.filter(status=ExportJob.STATUS_QUEUED).order_by('id')
+    for job_id in queued.values_list('id', flat=True)[:10]:
+        claimed = ExportJob.objects.filter(id=job_id, status=ExportJob.STATUS_QUEUED).update(
+            status=ExportJob.STATUS_RUNNING,
+            started_at=timezone.now(),
+        )
+        if claimed:
+            return ExportJob.objects.get(id=job_id)
+    return None
+
+
+def run_export_job(job: ExportJob, chunk_size: int = None) -> ExportJob:
+    """
+    Escribir el CSV comprimido del trabajo bajo MEDIA_ROOT/exports/.
+
+    Se escribe en un archivo temporal que se renombra al terminar, por lo que nunca
+    se descarga un archivo a medio generar. Los errores dejan el trabajo en FAILED.
+    """
+    definition = EXPORT_DEFINITIONS[job.kind]
+    relative_path = os.path.join(EXPORTS_DIR, job.kind.lower(), f'export-{job.id}.csv.gz')
+    path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    tmp_path = f'{path}.tmp'
+    row_count = 0
+
+    def counted(chunks):
+        nonlocal row_count
+        for rows in chunks:
+            row_count += len(rows)
+            yield rows
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', newline='') as output:
+            for text in iter_csv(definition.header, counted(definition.stream(job.filters, chunk_size)), definition.format_row):
+                output.write(text)
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        logger.exception('Error generando la exportación %s', job.id)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        job.status = ExportJob.STATUS_FAILED
+        job.error = str(exc)[:255]
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        return job
+
+    job.status = ExportJob.STATUS_COMPLETED
+    job.file_path = relative_path
+    job.file_size = os.path.getsize(path)
+    job.row_count = row_count
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'file_path', 'file_size', 'row_count', 'finished_at'])
+    return job
+
+
+def purge_expired_exports() -> int:
+    """Eliminar los trabajos terminados fuera de EXPORT_JOB_TTL_HOURS junto con sus archivos."""
+    expired = list(
+        ExportJob.objects.filter(
+            status__in=[ExportJob.STATUS_COMPLETED, ExportJob.STATUS_FAILED],
+            finished_at__lt=artifact_cutoff(),
+        )
+    )
+    for job in expired:
+        if artifact_exists(job):
+            os.remove(artifact_path(job))
+    ExportJob.objects.filter(id__in=[job.id for job in expired]).delete()
+    return len(expired)
@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductAdminViewSet, OrderAdminViewSet, OrderStatusViewSet
+from .views import ExportJobViewSet, SalesAnalyticsViewSet, ProductAdminViewSet, OrderAdminViewSet, OrderStatusViewSet
 
 router = DefaultRouter()
 router.register(r'products', ProductAdminViewSet, basename='admin-product')
 router.register(r'orders', OrderAdminViewSet, basename='admin-order')
 router.register(r'order-statuses', OrderStatusViewSet, basename='admin-order-status')
+router.register(r'exports', ExportJobViewSet, basename='admin-export')
+router.register(r'analytics', SalesAnalyticsViewSet, basename='admin-analytics')
 
 urlpatterns = [
     path('', include(router.urls)),
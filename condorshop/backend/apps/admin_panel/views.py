@@ -1,21 +1,55 @@
-import csv
 import os
-from django.http import HttpResponse
+import re
+from datetime import timedelta
+from django.http import HttpResponse, StreamingHttpResponse
 from django.db import transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from PIL import Image
+from .exports import encode, iter_csv, order_export_stream
+from .models import ExportJob
 from .permissions import IsAdmin
+from .services import artifact_exists, artifact_path, request_export
+from apps.locations.models import Region
 from apps.products.models import Product, ProductImage, Category
-from apps.products.serializers import ProductAdminSerializer
+from apps.products.serializers import ProductAdminSerializer, to_int
+from apps.products.services import NegativeStockError, change_stock, movement_history, set_stock_levels
+from apps.analytics.services import aggregate_categories, aggregate_sales, category_rollups, sales_rollups
 from apps.orders.models import Order, OrderStatus, OrderStatusHistory
-from apps.orders.serializers import OrderAdminSerializer, OrderStatusSerializer
-from apps.admin_panel.serializers import ProductImageUploadSerializer
+from apps.orders.change_feed import InvalidCursorError, changed_orders, start_cursor
+from apps.orders.payments import PaymentError, refund_order_payment
+from apps.orders.picking import DEFAULT_PICK_STATUS, PICK_LIST_HEADER, group_pick_list, iter_pick_list_csv_rows, pick_list_rows
+from apps.orders.state_machine import InvalidTransitionError, OrdersNotFoundError, transition_orders
+from apps.orders.webpay import WebpayError
+from apps.orders.serializers import OrderAdminListSerializer, OrderAdminSerializer, OrderStatusSerializer
+from apps.admin_panel.serializers import (
+    ExportJobCreateSerializer,
+    ExportJobSerializer,
+    ProductImageUploadSerializer,
+    StockChangeSerializer,
+    StockMovementSerializer,
+)
+
+
+STOCK_MOVEMENTS_PAGE_SIZE = 50
+STOCK_MOVEMENTS_MAX_PAGE_SIZE = 500
+
+
+def _query_int(request, name):
+    """Entero positivo de la query string, o None si falta o no es válido."""
+    try:
+        value = int(request.query_params.get(name, ''))
+    except ValueError:
+        return None
+    return value if value > 0 else None
 
 
 class ProductAdminViewSet(viewsets.ModelViewSet):
@@ -23,6 +57,8 @@ class ProductAdminViewSet(viewsets.ModelViewSet):
     CRUD de productos para administradores
     GET/POST /api/admin/products
     GET/PATCH/DELETE /api/admin/products/{id}
+    POST /api/admin/products/{id}/stock - Reposición o ajuste de stock
+    GET /api/admin/products/{id}/stock-movements - Historial de movimientos
     """
     queryset = Product.objects.all().select_related('category').prefetch_related('images')
     serializer_class = ProductAdminSerializer
@@ -35,8 +71,59 @@ class ProductAdminViewSet(viewsets.ModelViewSet):
         serializer.save()
 
     def perform_update(self, serializer):
-        """Actualizar producto"""
-        serializer.save()
+        """Actualizar producto; un cambio de stock_qty queda registrado como ajuste"""
+        stock_qty = serializer.validated_data.pop('stock_qty', None)
+        # Guardar el resto de los campos sobre el saldo vigente (fila bloqueada): no pisa ventas en curso
+        serializer.instance.stock_qty = (
+            Product.objects.select_for_update().values_list('stock_qty', flat=True).get(pk=serializer.instance.pk)
+        )
+        product = serializer.save()
+        if stock_qty is not None:
+            set_stock_levels({product.id: stock_qty}, user=self.request.user, note='Edición de producto')
+            product.stock_qty = stock_qty
+
+    @action(detail=True, methods=['post'])
+    def stock(self, request, pk=None):
+        """
+        Sumar o restar unidades con su motivo
+        POST /api/admin/products/{id}/stock
+        Body: { "quantity": 24, "kind": "RESTOCK" | "ADJUSTMENT", "note": "..." }
+        """
+        product = self.get_object()
+        serializer = StockChangeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            movement = change_stock(product.id, user=request.user, **serializer.validated_data)
+        except NegativeStockError as exc:
+            return Response(
+                {'error': str(exc), 'available': exc.available},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        product.refresh_from_db(fields=['stock_qty'])
+        return Response(
+            {'stock_qty': product.stock_qty, 'movement': StockMovementSerializer(movement).data},
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=True, methods=['get'], url_path='stock-movements')
+    def stock_movements(self, request, pk=None):
+        """
+        Historial de movimientos del producto, del más reciente al más antiguo
+        GET /api/admin/products/{id}/stock-movements?before=<id>&limit=50
+        """
+        product = self.get_object()
+        limit = min(_query_int(request, 'limit') or STOCK_MOVEMENTS_PAGE_SIZE, STOCK_MOVEMENTS_MAX_PAGE_SIZE)
+        movements = movement_history(product.id, before_id=_query_int(request, 'before'), limit=limit)
+        return Response({
+            'product_id': product.id,
+            'sku': product.sku,
+            'stock_qty': product.stock_qty,
+            'results': StockMovementSerializer(movements, many=True).data,
+            # Cursor para la página siguiente (movimientos más antiguos)
+            'next_before': movements[-1].id if len(movements) == limit else None,
+        })
 
     @action(detail=True, methods=['post'], parser_classes=(MultiPartParser, FormParser))
     def images(self, request, pk=None):
@@ -93,13 +180,23 @@ class ProductAdminViewSet(viewsets.ModelViewSet):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+BULK_STATUS_MAX_ORDERS = 1000
+CHANGE_FEED_PAGE_SIZE = 100
+CHANGE_FEED_MAX_PAGE_SIZE = 1000
+
+
 class OrderAdminViewSet(viewsets.ReadOnlyModelViewSet):
     """
     Gestión de pedidos para administradores
     GET /api/admin/orders - Lista con filtros
     GET /api/admin/orders/{id} - Detalle
+    PATCH /api/admin/orders/{id}/status - Cambiar estado
+    POST /api/admin/orders/{id}/refund - Anular el pago Webpay y cancelar
+    POST /api/admin/orders/bulk-status - Cambiar estado de varios pedidos
+    GET /api/admin/orders/pick-list - Unidades a preparar por SKU y región
+    GET /api/admin/orders/changes - Feed de cambios por cursor (updated_at, id)
     """
-    queryset = Order.objects.all().select_related('status', 'user').prefetch_related('items', 'status_history')
+    queryset = Order.objects.all().select_related('status', 'user').order_by('-created_at', '-id')
     serializer_class = OrderAdminSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
     filter_backends = [DjangoFilterBackend]
@@ -107,8 +204,27 @@ class OrderAdminViewSet(viewsets.ReadOnlyModelViewSet):
     ordering_fields = ['created_at', 'total_amount']
     ordering = ['-created_at']
 
+    def get_serializer_class(self):
+        # El listado no incluye items ni historial; el detalle entrega el árbol completo
+        if self.action == 'list':
+            return OrderAdminListSerializer
+        return super().get_serializer_class()
+
+    @staticmethod
+    def _with_detail(queryset):
+        """Precargas exactas de OrderAdminSerializer (items e historial con estado y autor)."""
+        return queryset.prefetch_related(
+            'items',
+            Prefetch(
+                'status_history',
+                queryset=OrderStatusHistory.objects.select_related('status', 'changed_by'),
+            ),
+        )
+
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            queryset = self._with_detail(queryset)
         
         # Filtro por rango de fechas
         date_from = self.request.query_params.get('date_from', None)
@@ -146,77 +262,203 @@ class OrderAdminViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Validar transición de estado
-        current_code = order.status.code
-        new_code = new_status.code
-        
-        valid_transitions = {
-            'PENDING': ['PREPARING', 'CANCELLED'],
-            'PREPARING': ['SHIPPED'],
-            'SHIPPED': ['DELIVERED'],
-        }
+        try:
+            transition_orders([order.id], new_status, user=request.user, note=note)
+        except InvalidTransitionError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         
-        if current_code in valid_transitions:
-            if new_code not in valid_transitions[current_code]:
+        # Recargar con las precargas del detalle (incluye el historial recién creado)
+        order = self._with_detail(self.get_queryset()).get(pk=order.pk)
+        serializer = OrderAdminSerializer(order, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'])
+    def refund(self, request, pk=None):
+        """
+        Anular en Webpay el pago confirmado del pedido y cancelarlo (devuelve el stock)
+        POST /api/admin/orders/{id}/refund
+        """
+        order = self.get_object()
+        try:
+            refund_order_payment(order, user=request.user)
+        except PaymentError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except WebpayError as exc:
+            return Response(
+                {'error': f'Webpay rechazó la anulación: {exc}'},
+                status=status.HTTP_502_BAD_GATEWAY
+            )
+
+        order = self._with_detail(self.get_queryset()).get(pk=order.pk)
+        serializer = OrderAdminSerializer(order, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        """
+        Cambiar el estado de varios pedidos a la vez (todos o ninguno)
+        POST /api/admin/orders/bulk-status
+        Body: { "order_ids": [1, 2, 3], "status_id": 5, "note": "..." }
+        """
+        order_ids = request.data.get('order_ids')
+        status_id = request.data.get('status_id')
+        note = request.data.get('note', '')
+
+        if not isinstance(order_ids, list) or not order_ids or not status_id:
+            return Response(
+                {'error': 'order_ids (lista) y status_id son requeridos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(order_ids) > BULK_STATUS_MAX_ORDERS:
+            return Response(
+                {'error': f'Máximo {BULK_STATUS_MAX_ORDERS} pedidos por solicitud'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            order_ids = [int(order_id) for order_id in order_ids]
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'order_ids debe contener solo ids numéricos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            new_status = OrderStatus.objects.get(id=status_id)
+        except OrderStatus.DoesNotExist:
+            return Response(
+                {'error': 'Estado no encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            orders = transition_orders(order_ids, new_status, user=request.user, note=note)
+        except OrdersNotFoundError as exc:
+            return Response(
+                {'error': 'Pedidos no encontrados', 'missing': exc.order_ids},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except InvalidTransitionError as exc:
+            return Response(
+                {
+                    'error': f'Transición inválida para {len(exc.invalid)} pedido(s); no se modificó ninguno',
+                    'invalid': [{'id': order_id, 'status': code} for order_id, code in exc.invalid],
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({
+            'updated': len(orders),
+            'order_ids': [order.id for order in orders],
+            'status': OrderStatusSerializer(new_status).data,
+        })
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exportar pedidos a CSV (respuesta por streaming, memoria constante)
+        GET /api/admin/orders/export?status=1&date_from=2025-01-01
+        GET /api/admin/orders/export?compress=gzip - CSV comprimido (.csv.gz)
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        compress = request.query_params.get('compress') == 'gzip'
+
+        response = StreamingHttpResponse(
+            order_export_stream(queryset, compress=compress),
+            content_type='application/gzip' if compress else 'text/csv; charset=utf-8',
+        )
+        filename = 'orders_export.csv.gz' if compress else 'orders_export.csv'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Feed de cambios para integraciones: pedidos (con items e historial) en orden de modificación
+        GET /api/admin/orders/changes?limit=100 - Desde el inicio
+        GET /api/admin/orders/changes?since=2025-01-01T00:00:00Z - Desde una fecha
+        GET /api/admin/orders/changes?cursor=<next_cursor> - Continuar; guardar siempre el último next_cursor
+        """
+        cursor = request.query_params.get('cursor')
+        since = request.query_params.get('since')
+        if not cursor and since:
+            since = parse_datetime(since)
+            if since is None:
                 return Response(
-                    {'error': f'Transición inválida: {current_code} -> {new_code}'},
+                    {'error': 'since debe ser una fecha y hora ISO 8601'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        elif current_code != 'CANCELLED' and new_code == 'CANCELLED':
-            # Cancelar solo si aún no está en preparación o después
-            if current_code not in ['PENDING']:
-                return Response(
-                    {'error': 'No se puede cancelar un pedido en este estado'},
+            cursor = start_cursor(since if timezone.is_aware(since) else timezone.make_aware(since))
+        limit = min(_query_int(request, 'limit') or CHANGE_FEED_PAGE_SIZE, CHANGE_FEED_MAX_PAGE_SIZE)
+
+        queryset = self._with_detail(Order.objects.select_related('status', 'user'))
+        try:
+            orders, next_cursor, has_more = changed_orders(queryset, cursor, limit)
+        except InvalidCursorError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'results': OrderAdminSerializer(orders, many=True, context=self.get_serializer_context()).data,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+        })
+
+    def _pick_list_params(self, request):
+        dates = {}
+        for name in ('date_from', 'date_to'):
+            value = request.query_params.get(name)
+            dates[name] = parse_date(value) if value else None
+            if value and not dates[name]:
+                return None, Response(
+                    {'error': f'{name} debe tener formato AAAA-MM-DD'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        else:
-            return Response(
-                {'error': f'Transición no permitida desde {current_code}'},
+        if dates['date_from'] and dates['date_to'] and dates['date_from'] > dates['date_to']:
+            return None, Response(
+                {'error': 'date_from debe ser anterior o igual a date_to'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        # Actualizar estado
-        old_status = order.status
-        order.status = new_status
-        order.save()
-        
-        # Registrar en historial
-        OrderStatusHistory.objects.create(
-            order=order,
-            status=new_status,
-            changed_by=request.user,
-            note=note or f'Cambio de {old_status.code} a {new_status.code}'
-        )
-        
-        serializer = OrderAdminSerializer(order)
-        return Response(serializer.data)
+        status_code = request.query_params.get('status') or DEFAULT_PICK_STATUS
+        return {'status_code': status_code, **dates}, None
 
-    @action(detail=False, methods=['get'])
-    def export(self, request):
+    @action(detail=False, methods=['get'], url_path='pick-list')
+    def pick_list(self, request):
         """
-        Exportar pedidos a CSV
-        GET /api/admin/orders/export?status=1&date_from=2025-01-01
+        Lista de picking: unidades por SKU con desglose por región de envío
+        GET /api/admin/orders/pick-list?status=PREPARING&date_from=2025-01-01&date_to=2025-01-31
+        (status es un código de estado; por defecto PREPARING)
         """
-        queryset = self.get_queryset()
-        
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        response['Content-Disposition'] = 'attachment; filename="orders_export.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['ID', 'Fecha', 'Cliente', 'Email', 'Total', 'Estado', 'Ciudad', 'Región'])
-        
-        for order in queryset:
-            writer.writerow([
-                order.id,
-                order.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                order.customer_name,
-                order.customer_email,
-                order.total_amount,
-                order.status.code,
-                order.shipping_city,
-                order.shipping_region,
-            ])
-        
+        params, error = self._pick_list_params(request)
+        if error:
+            return error
+        region_names = dict(Region.objects.values_list('code', 'name'))
+        results = list(group_pick_list(pick_list_rows(**params), region_names))
+        return Response({
+            'status': params['status_code'],
+            'date_from': params['date_from'],
+            'date_to': params['date_to'],
+            'total_units': sum(entry['quantity'] for entry in results),
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'], url_path='pick-list/export')
+    def pick_list_export(self, request):
+        """
+        Lista de picking en CSV por streaming (una fila por SKU y región)
+        GET /api/admin/orders/pick-list/export?status=PREPARING&compress=gzip
+        """
+        params, error = self._pick_list_params(request)
+        if error:
+            return error
+        compress = request.query_params.get('compress') == 'gzip'
+        region_names = dict(Region.objects.values_list('code', 'name'))
+        chunks = iter_pick_list_csv_rows(pick_list_rows(**params), region_names)
+
+        response = StreamingHttpResponse(
+            encode(iter_csv(PICK_LIST_HEADER, chunks), compress=compress),
+            content_type='application/gzip' if compress else 'text/csv; charset=utf-8',
+        )
+        filename = 'pick_list.csv.gz' if compress else 'pick_list.csv'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
         return response
 
 
@@ -229,3 +471,224 @@ class OrderStatusViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = OrderStatusSerializer
     permission_classes = [IsAuthenticated, IsAdmin]
 
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+_DOWNLOAD_BLOCK_SIZE = 64 * 1024
+
+
+def _parse_range(header, size):
+    """
+    (inicio, fin) inclusivos para un header `Range: bytes=...` de un solo rango.
+
+    Retorna None si no hay header o no es un rango simple (se envía el archivo completo)
+    y 'unsatisfiable' si el rango queda fuera del archivo.
+    """
+    match = _RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        # Sufijo: los últimos N bytes
+        length = int(end)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return 'unsatisfiable'
+    return start, end
+
+
+def _iter_file(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = handle.read(min(_DOWNLOAD_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def ranged_file_response(request, path, content_type, filename):
+    """Descarga con soporte de `Range` (206 Partial Content) para reanudar descargas grandes."""
+    size = os.path.getsize(path)
+    byte_range = _parse_range(request.headers.get('Range'), size)
+
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+    response = StreamingHttpResponse(_iter_file(path, start, length), content_type=content_type)
+    if byte_range:
+        response.status_code = status.HTTP_206_PARTIAL_CONTENT
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class ExportJobViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    Exportaciones en segundo plano (las genera `python manage.py run_export_jobs`)
+    POST /api/admin/exports - Solicitar: { "kind": "ORDERS", "filters": {"status": "1"} }
+    GET /api/admin/exports - Lista
+    GET /api/admin/exports/{id} - Estado (QUEUED, RUNNING, COMPLETED, FAILED)
+    GET /api/admin/exports/{id}/download - Archivo .csv.gz (admite header Range)
+    """
+    queryset = ExportJob.objects.all().order_by('-id')
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def create(self, request, *args, **kwargs):
+        serializer = ExportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        job, reused = request_export(
+            serializer.validated_data['kind'],
+            serializer.validated_data['filters'],
+            user=request.user,
+        )
+        data = ExportJobSerializer(job, context={'request': request}).data
+        data['reused'] = reused
+        # 200 si ya existe un trabajo equivalente; 202 si quedó en cola
+        return Response(data, status=status.HTTP_200_OK if reused else status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != ExportJob.STATUS_COMPLETED or not artifact_exists(job):
+            return Response(
+                {'error': 'La exportación no tiene un archivo disponible'},
+                status=status.HTTP_409_CONFLICT
+            )
+        filename = f'{job.kind.lower()}_export_{job.id}.csv.gz'
+        return ranged_file_response(request, artifact_path(job), 'application/gzip', filename)
+
+
+ANALYTICS_DEFAULT_DAYS = 30
+
+
+def _sales_metrics(row):
+    orders = row['order_count'] or 0
+    revenue = row['revenue'] or 0
+    return {
+        'orders': orders,
+        'units': row['units'] or 0,
+        'revenue': to_int(revenue),
+        'shipping_revenue': to_int(row.get('shipping_revenue') or 0),
+        'average_order_value': to_int(revenue / orders) if orders else 0,
+    }
+
+
+class SalesAnalyticsViewSet(viewsets.ViewSet):
+    """
+    Analítica de ventas calculada sobre los rollups diarios (apps.analytics)
+    GET /api/admin/analytics/summary - Totales del rango
+    GET /api/admin/analytics/daily - Serie diaria (días sin ventas en 0)
+    GET /api/admin/analytics/regions - Por región de envío
+    GET /api/admin/analytics/categories - Por categoría de producto
+    GET /api/admin/analytics/statuses - Por estado actual del pedido
+    Query params: date_from, date_to (AAAA-MM-DD; default últimos 30 días) y
+    status (códigos separados por coma; default todos menos CANCELLED).
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def _params(self, request):
+        today = timezone.localdate()
+        date_to = request.query_params.get('date_to')
+        date_from = request.query_params.get('date_from')
+        date_to = parse_date(date_to) if date_to else today
+        date_from = parse_date(date_from) if date_from else (date_to - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1) if date_to else None)
+        if not date_from or not date_to:
+            return None, Response(
+                {'error': 'date_from y date_to deben tener formato AAAA-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if date_from > date_to:
+            return None, Response(
+                {'error': 'date_from debe ser anterior o igual a date_to'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        statuses = [code.strip() for code in request.query_params.get('status', '').split(',') if code.strip()]
+        return (date_from, date_to, statuses or None), None
+
+    def _response(self, params, **data):
+        date_from, date_to, statuses = params
+        return Response({'date_from': date_from, 'date_to': date_to, 'status': statuses, **data})
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        params, error = self._params(request)
+        if error:
+            return error
+        totals = aggregate_sales(sales_rollups(*params))[0]
+        return self._response(params, **_sales_metrics(totals))
+
+    @action(detail=False, methods=['get'])
+    def daily(self, request):
+        params, error = self._params(request)
+        if error:
+            return error
+        date_from, date_to, _ = params
+        by_day = {row['day']: row for row in aggregate_sales(sales_rollups(*params), group_by=['day'])}
+        empty = {'order_count': 0, 'units': 0, 'revenue': 0, 'shipping_revenue': 0}
+        results = []
+        day = date_from
+        while day <= date_to:
+            results.append({'day': day, **_sales_metrics(by_day.get(day, empty))})
+            day += timedelta(days=1)
+        return self._response(params, results=results)
+
+    @action(detail=False, methods=['get'])
+    def regions(self, request):
+        params, error = self._params(request)
+        if error:
+            return error
+        names = dict(Region.objects.values_list('code', 'name'))
+        rows = aggregate_sales(sales_rollups(*params), group_by=['region_code'])
+        results = [
+            {
+                'region_code': row['region_code'] or None,
+                'region_name': names.get(row['region_code'], 'Sin región'),
+                **_sales_metrics(row),
+            }
+            for row in sorted(rows, key=lambda row: row['revenue'], reverse=True)
+        ]
+        return self._response(params, results=results)
+
+    @action(detail=False, methods=['get'])
+    def categories(self, request):
+        params, error = self._params(request)
+        if error:
+            return error
+        rows = aggregate_categories(category_rollups(*params))
+        names = dict(Category.objects.filter(id__in=[row['category_id'] for row in rows]).values_list('id', 'name'))
+        results = [
+            {
+                'category_id': row['category_id'] or None,
+                'category_name': names.get(row['category_id'], 'Sin categoría'),
+                'orders': row['order_count'],
+                'units': row['units'],
+                'revenue': to_int(row['revenue']),
+            }
+            for row in rows
+        ]
+        return self._response(params, results=results)
+
+    @action(detail=False, methods=['get'])
+    def statuses(self, request):
+        params, error = self._params(request)
+        if error:
+            return error
+        # Incluye todos los estados (también CANCELLED) salvo que se filtre explícitamente
+        rows = aggregate_sales(sales_rollups(*params, all_statuses=True), group_by=['status_code'])
+        results = [{'status': row['status_code'], **_sales_metrics(row)} for row in rows]
+        return self._response(params, results=results)
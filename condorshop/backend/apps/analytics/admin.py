@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import DailyCategorySalesRollup, DailySalesRollup
+
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'region_code', 'status_code', 'order_count', 'units', 'revenue', 'shipping_revenue')
+    list_filter = ('status_code', 'region_code')
+    date_hierarchy = 'day'
+
+
+@admin.register(DailyCategorySalesRollup)
+class DailyCategorySalesRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'category_id', 'status_code', 'order_count', 'units', 'revenue')
+    list_filter = ('status_code',)
+    date_hierarchy = 'day'
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.analytics.services import rebuild_day
+from apps.orders.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula los rollups diarios de ventas desde orders/order_items, un día por transacción '
+        '(backfill inicial o corrección tras cambios manuales en la base de datos)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date-from',
+            help='Primer día a recalcular, AAAA-MM-DD (default: día del primer pedido)',
+        )
+        parser.add_argument(
+            '--date-to',
+            help='Último día a recalcular, AAAA-MM-DD (default: hoy)',
+        )
+
+    def _parse(self, value, name):
+        day = parse_date(value)
+        if not day:
+            raise CommandError(f'{name} debe tener formato AAAA-MM-DD')
+        return day
+
+    def handle(self, *args, **options):
+        if options['date_from']:
+            date_from = self._parse(options['date_from'], '--date-from')
+        else:
+            first = Order.objects.order_by('created_at').values_list('created_at', flat=True).first()
+            if first is None:
+                self.stdout.write(self.style.SUCCESS('No hay pedidos para agregar'))
+                return
+            date_from = timezone.localdate(first)
+        date_to = self._parse(options['date_to'], '--date-to') if options['date_to'] else timezone.localdate()
+
+        if date_from > date_to:
+            raise CommandError('--date-from debe ser anterior o igual a --date-to')
+
+        day = date_from
+        total_days = total_orders = 0
+        while day <= date_to:
+            total_orders += rebuild_day(day)
+            total_days += 1
+            day += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rollups recalculados: {total_days} días, {total_orders} pedidos ({date_from} a {date_to})'
+        ))
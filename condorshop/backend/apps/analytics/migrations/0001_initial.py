@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCategorySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(db_column='id', primary_key=True, serialize=False)),
+                ('day', models.DateField(db_column='day', verbose_name='Día')),
+                ('category_id', models.IntegerField(db_column='category_id', default=0, help_text='Categoría del producto al momento de la compra (0 = sin categoría)', verbose_name='Categoría')),
+                ('status_code', models.CharField(db_column='status_code', max_length=50, verbose_name='Estado')),
+                ('order_count', models.BigIntegerField(db_column='order_count', default=0, verbose_name='Pedidos')),
+                ('units', models.BigIntegerField(db_column='units', default=0, verbose_name='Unidades')),
+                ('revenue', models.DecimalField(db_column='revenue', decimal_places=2, default=0, max_digits=16, verbose_name='Ventas')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_column='updated_at', verbose_name='Actualizado el')),
+            ],
+            options={
+                'verbose_name': 'Ventas diarias por categoría',
+                'verbose_name_plural': 'Ventas diarias por categoría',
+                'db_table': 'sales_category_daily_rollups',
+                'constraints': [models.UniqueConstraint(fields=('day', 'category_id', 'status_code'), name='uniq_sales_category_daily_key')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.BigAutoField(db_column='id', primary_key=True, serialize=False)),
+                ('day', models.DateField(db_column='day', verbose_name='Día')),
+                ('region_code', models.CharField(blank=True, db_column='region_code', default='', help_text='Código de locations.Region; vacío si la región del pedido no se reconoció', max_length=10, verbose_name='Región')),
+                ('status_code', models.CharField(db_column='status_code', max_length=50, verbose_name='Estado')),
+                ('order_count', models.BigIntegerField(db_column='order_count', default=0, verbose_name='Pedidos')),
+                ('units', models.BigIntegerField(db_column='units', default=0, verbose_name='Unidades')),
+                ('revenue', models.DecimalField(db_column='revenue', decimal_places=2, default=0, max_digits=16, verbose_name='Ventas')),
+                ('shipping_revenue', models.DecimalField(db_column='shipping_revenue', decimal_places=2, default=0, max_digits=16, verbose_name='Envíos cobrados')),
+                ('updated_at', models.DateTimeField(auto_now=True, db_column='updated_at', verbose_name='Actualizado el')),
+            ],
+            options={
+                'verbose_name': 'Ventas diarias',
+                'verbose_name_plural': 'Ventas diarias',
+                'db_table': 'sales_daily_rollups',
+                'constraints': [models.UniqueConstraint(fields=('day', 'region_code', 'status_code'), name='uniq_sales_daily_key')],
+            },
+        ),
+    ]
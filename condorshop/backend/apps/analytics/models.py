@@ -0,0 +1,71 @@
+from django.db import models
+
+
+class DailySalesRollup(models.Model):
+    """
+    Ventas agregadas por día de creación del pedido, región y estado actual.
+
+    Se mantiene de forma incremental (apps.analytics.services) al crear pedidos y al
+    cambiar su estado; `python manage.py rebuild_sales_rollups` la recalcula.
+    """
+    id = models.BigAutoField(primary_key=True, db_column='id')
+    day = models.DateField(db_column='day', verbose_name='Día')
+    region_code = models.CharField(
+        max_length=10,
+        blank=True,
+        default='',
+        db_column='region_code',
+        help_text='Código de locations.Region; vacío si la región del pedido no se reconoció',
+        verbose_name='Región'
+    )
+    status_code = models.CharField(max_length=50, db_column='status_code', verbose_name='Estado')
+    order_count = models.BigIntegerField(default=0, db_column='order_count', verbose_name='Pedidos')
+    units = models.BigIntegerField(default=0, db_column='units', verbose_name='Unidades')
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0, db_column='revenue', verbose_name='Ventas')
+    shipping_revenue = models.DecimalField(
+        max_digits=16,
+        decimal_places=2,
+        default=0,
+        db_column='shipping_revenue',
+        verbose_name='Envíos cobrados'
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_column='updated_at', verbose_name='Actualizado el')
+
+    class Meta:
+        db_table = 'sales_daily_rollups'
+        verbose_name = 'Ventas diarias'
+        verbose_name_plural = 'Ventas diarias'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'region_code', 'status_code'], name='uniq_sales_daily_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.region_code or '-'} {self.status_code}: {self.order_count}"
+
+
+class DailyCategorySalesRollup(models.Model):
+    """Unidades y ventas de productos por día de creación del pedido, categoría y estado actual."""
+    id = models.BigAutoField(primary_key=True, db_column='id')
+    day = models.DateField(db_column='day', verbose_name='Día')
+    category_id = models.IntegerField(
+        default=0,
+        db_column='category_id',
+        help_text='Categoría del producto al momento de la compra (0 = sin categoría)',
+        verbose_name='Categoría'
+    )
+    status_code = models.CharField(max_length=50, db_column='status_code', verbose_name='Estado')
+    order_count = models.BigIntegerField(default=0, db_column='order_count', verbose_name='Pedidos')
+    units = models.BigIntegerField(default=0, db_column='units', verbose_name='Unidades')
+    revenue = models.DecimalField(max_digits=16, decimal_places=2, default=0, db_column='revenue', verbose_name='Ventas')
+    updated_at = models.DateTimeField(auto_now=True, db_column='updated_at', verbose_name='Actualizado el')
+
+    class Meta:
+        db_table = 'sales_category_daily_rollups'
+        verbose_name = 'Ventas diarias por categoría'
+        verbose_name_plural = 'Ventas diarias por categoría'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category_id', 'status_code'], name='uniq_sales_category_daily_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} categoría {self.category_id} {self.status_code}: {self.units}"
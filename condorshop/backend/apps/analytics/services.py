@@ -0,0 +1,271 @@
+"""
+Rollups diarios de ventas.
+
+Cada pedido aporta una fila a `sales_daily_rollups` (día, región, estado) y una por
+categoría a `sales_category_daily_rollups`. El worker del outbox (run_outbox) las
+actualiza fuera de las transacciones del checkout y de los cambios de estado: al crear
+el pedido suma sus valores con su estado inicial y, por cada cambio de estado, los resta
+del estado anterior y los suma al nuevo. Las sumas conmutan, así que el orden en que
+se procesan los eventos no importa. Las consultas de analítica leen solo estas tablas (una fila
+por día × dimensión, no por pedido).
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional, Sequence
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderItem, OutboxEvent
+
+from .models import DailyCategorySalesRollup, DailySalesRollup
+
+
+# Estados que no cuentan como venta en los reportes por defecto
+EXCLUDED_STATUSES_BY_DEFAULT = ('CANCELLED',)
+
+SALES_METRICS = ('order_count', 'units', 'revenue', 'shipping_revenue')
+CATEGORY_METRICS = ('order_count', 'units', 'revenue')
+
+
+def _apply(model, keys: dict, deltas: dict) -> None:
+    """Sumar `deltas` a la fila `keys` con un UPDATE atómico (creándola si no existe)."""
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**keys).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **deltas)
+    except IntegrityError:
+        # Otra transacción creó la fila entre el UPDATE y el INSERT
+        model.objects.filter(**keys).update(**updates)
+
+
+def _apply_many(model, keys: dict, key_field: str, deltas_by_key: dict) -> None:
+    """
+    Igual que _apply para varias filas que difieren solo en `key_field`, con un número
+    fijo de consultas: un SELECT, un UPDATE con CASE para las existentes y un
+    bulk_create para las nuevas.
+    """
+    if not deltas_by_key:
+        return
+    rows = model.objects.filter(**keys, **{f'{key_field}__in': list(deltas_by_key)})
+    existing = set(rows.values_list(key_field, flat=True))
+
+    if existing:
+        metrics = next(iter(deltas_by_key.values())).keys()
+        rows.filter(**{f'{key_field}__in': existing}).update(**{
+            metric: F(metric) + Case(
+                *[When(**{key_field: key}, then=Value(deltas_by_key[key][metric])) for key in sorted(existing)],
+                default=Value(0),
+                output_field=model._meta.get_field(metric),
+            )
+            for metric in metrics
+        })
+
+    missing = sorted(set(deltas_by_key) - existing)
+    if not missing:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create([
+                model(**keys, **{key_field: key}, **deltas_by_key[key]) for key in missing
+            ])
+    except IntegrityError:
+        for key in missing:
+            _apply(model, {**keys, key_field: key}, deltas_by_key[key])
+
+
+def rollup_day(order: Order) -> date:
+    return timezone.localdate(order.created_at)
+
+
+def _order_deltas(order: Order, items: Sequence[OrderItem], sign: int) -> tuple[dict, dict]:
+    sales = {
+        'order_count': sign,
+        'units': sign * sum(item.quantity for item in items),
+        'revenue': sign * order.total_amount,
+        'shipping_revenue': sign * order.shipping_cost,
+    }
+    categories = defaultdict(lambda: {'order_count': sign, 'units': 0, 'revenue': Decimal('0')})
+    for item in items:
+        category = categories[item.product_category_id or 0]
+        category['units'] += sign * item.quantity
+        category['revenue'] += sign * item.total_price
+    return sales, categories
+
+
+def _add(totals: dict, deltas: dict) -> None:
+    for metric, value in deltas.items():
+        totals[metric] = totals.get(metric, 0) + value
+
+
+def _apply_orders(entries: Iterable[tuple]) -> None:
+    """
+    Aplicar (pedido, items, estado, signo) agrupando antes por llave de rollup: el
+    número de escrituras depende de los días/regiones/estados tocados, no de los pedidos.
+    """
+    sales = defaultdict(dict)
+    categories = defaultdict(lambda: defaultdict(dict))
+    for order, items, status_code, sign in entries:
+        day = rollup_day(order)
+        order_sales, order_categories = _order_deltas(order, items, sign)
+        _add(sales[(day, order.shipping_region_code or '', status_code)], order_sales)
+        for category_id, deltas in order_categories.items():
+            _add(categories[(day, status_code)][category_id], deltas)
+
+    # Orden fijo de llaves: transacciones concurrentes bloquean filas en el mismo orden
+    for day, region_code, status_code in sorted(sales):
+        _apply(
+            DailySalesRollup,
+            {'day': day, 'region_code': region_code, 'status_code': status_code},
+            sales[(day, region_code, status_code)],
+        )
+    for day, status_code in sorted(categories):
+        _apply_many(
+            DailyCategorySalesRollup,
+            {'day': day, 'status_code': status_code},
+            'category_id',
+            dict(categories[(day, status_code)]),
+        )
+
+
+def record_order_created(order: Order, items: Sequence[OrderItem], status_code: Optional[str] = None) -> None:
+    """Sumar un pedido a los rollups con su estado inicial (`status_code`, por defecto el actual)."""
+    _apply_orders([(order, items, status_code or order.status.code, 1)])
+
+
+def record_status_changes(orders: Sequence[Order], items_by_order: dict, old_status_codes: dict, new_status_code: str) -> None:
+    """Mover los valores de cada pedido de su estado anterior (`old_status_codes[id]`) al nuevo."""
+    entries = []
+    for order in orders:
+        old_status_code = old_status_codes[order.id]
+        if old_status_code == new_status_code:
+            continue
+        items = items_by_order.get(order.id, [])
+        entries.append((order, items, old_status_code, -1))
+        entries.append((order, items, new_status_code, 1))
+    _apply_orders(entries)
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def rebuild_day(day: date) -> int:
+    """
+    Recalcular los rollups de un día desde orders/order_items. Retorna los pedidos del día.
+
+    El día se acota en la zona horaria local con un rango de created_at
+    (idx_orders_created), sin funciones de fecha en la base de datos. Los eventos de
+    rollup aún pendientes de esos pedidos se marcan como procesados: el recálculo ya
+    los incluye.
+    """
+    start, end = _day_bounds(day)
+    orders = Order.objects.filter(created_at__gte=start, created_at__lt=end)
+    items = OrderItem.objects.filter(order__created_at__gte=start, order__created_at__lt=end)
+
+    with transaction.atomic():
+        OutboxEvent.objects.filter(
+            kind=OutboxEvent.KIND_SALES_ROLLUP,
+            status=OutboxEvent.STATUS_PENDING,
+            order__in=orders.values('id'),
+        ).update(status=OutboxEvent.STATUS_DONE, processed_at=timezone.now())
+        DailySalesRollup.objects.filter(day=day).delete()
+        DailyCategorySalesRollup.objects.filter(day=day).delete()
+
+        units = {
+            (row['order__shipping_region_code'] or '', row['order__status__code']): row['units']
+            for row in items.values('order__shipping_region_code', 'order__status__code').annotate(units=Sum('quantity'))
+        }
+        sales_rows = [
+            DailySalesRollup(
+                day=day,
+                region_code=row['shipping_region_code'] or '',
+                status_code=row['status__code'],
+                order_count=row['order_count'],
+                units=units.get((row['shipping_region_code'] or '', row['status__code']), 0),
+                revenue=row['revenue'],
+                shipping_revenue=row['shipping_revenue'],
+            )
+            for row in orders.values('shipping_region_code', 'status__code').annotate(
+                order_count=Count('id'),
+                revenue=Sum('total_amount'),
+                shipping_revenue=Sum('shipping_cost'),
+            )
+        ]
+        # Varias regiones sin código comparten la llave ''
+        merged = {}
+        for row in sales_rows:
+            key = (row.region_code, row.status_code)
+            if key in merged:
+                for metric in SALES_METRICS:
+                    setattr(merged[key], metric, getattr(merged[key], metric) + getattr(row, metric))
+            else:
+                merged[key] = row
+        DailySalesRollup.objects.bulk_create(merged.values())
+
+        category_rows = (
+            items.annotate(category=Coalesce('product_category_id', 'product__category_id', Value(0), output_field=IntegerField()))
+            .values('category', 'order__status__code')
+            .annotate(
+                order_count=Count('order_id', distinct=True),
+                units=Sum('quantity'),
+                revenue=Sum('total_price'),
+            )
+        )
+        DailyCategorySalesRollup.objects.bulk_create([
+            DailyCategorySalesRollup(
+                day=day,
+                category_id=row['category'],
+                status_code=row['order__status__code'],
+                order_count=row['order_count'],
+                units=row['units'],
+                revenue=row['revenue'],
+            )
+            for row in category_rows
+        ])
+
+    return sum(row.order_count for row in merged.values())
+
+
+def _status_filter(statuses: Optional[Iterable[str]], all_statuses: bool = False) -> Q:
+    if statuses:
+        return Q(status_code__in=list(statuses))
+    if all_statuses:
+        return Q()
+    return ~Q(status_code__in=EXCLUDED_STATUSES_BY_DEFAULT)
+
+
+def sales_rollups(date_from: date, date_to: date, statuses: Optional[Iterable[str]] = None, all_statuses: bool = False):
+    """Filas del rango; sin `statuses` se excluyen los estados que no son venta (salvo all_statuses)."""
+    return DailySalesRollup.objects.filter(
+        _status_filter(statuses, all_statuses), day__gte=date_from, day__lte=date_to
+    )
+
+
+def category_rollups(date_from: date, date_to: date, statuses: Optional[Iterable[str]] = None):
+    return DailyCategorySalesRollup.objects.filter(_status_filter(statuses), day__gte=date_from, day__lte=date_to)
+
+
+def aggregate_sales(queryset, group_by: Sequence[str] = ()) -> list[dict]:
+    """Totales (pedidos, unidades, ventas, envíos) agrupados por las columnas dadas."""
+    totals = {metric: Sum(metric) for metric in SALES_METRICS}
+    if group_by:
+        return list(queryset.values(*group_by).annotate(**totals).order_by(*group_by))
+    # Sin filas en el rango los SUM son NULL
+    return [{metric: value or 0 for metric, value in queryset.aggregate(**totals).items()}]
+
+
+def aggregate_categories(queryset) -> list[dict]:
+    return list(
+        queryset.values('category_id')
+        .annotate(order_count=Sum('order_count'), units=Sum('units'), revenue=Sum('revenue'))
+        .order_by('-revenue', 'category_id')
+    )
@@ -7,7 +7,7 @@ class AuditMiddleware:
     Middleware para registrar acciones de auditoría
     Registra visualizaciones y actualizaciones relevantes
     """
-    EXCLUDED_PATHS = ['/admin/', '/static/', '/media/', '/api/auth/login', '/api/auth/register']
+    EXCLUDED_PATHS = ['/admin/', '/static/', '/media/', '/api/auth/login', '/api/auth/register', '/api/cart/count', '/api/checkout/allocation/']
     TRACKED_ACTIONS = ['GET', 'POST', 'PATCH', 'PUT', 'DELETE']
     TRACKED_TABLES = {
         '/api/users/profile': 'users',
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Cart, CartItem
+from .models import Cart, CartItem, StockReservation
 
 
 class CartItemInline(admin.TabularInline):
@@ -37,3 +37,10 @@ class CartAdmin(admin.ModelAdmin):
     created_at.short_description = 'Creado el'
     created_at.admin_order_field = 'created_at'
 
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'cart', 'product', 'quantity', 'expires_at')
+    list_filter = ('expires_at',)
+    search_fields = ('product__name', 'product__sku')
+    raw_id_fields = ('cart', 'product')
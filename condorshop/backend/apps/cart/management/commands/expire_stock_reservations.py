@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.cart.models import StockReservation
+
+
+class Command(BaseCommand):
+    help = 'Elimina en lotes las reservas de stock expiradas (ejecutar periódicamente, ej: cada minuto vía cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Cantidad de reservas eliminadas por sentencia (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        expired = StockReservation.objects.filter(expires_at__lte=now).order_by('id')
+
+        total = 0
+        while True:
+            # Lotes acotados por id (idx_reservation_expires) para no mantener bloqueos largos
+            ids = list(expired.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted, _ = StockReservation.objects.filter(id__in=ids).delete()
+            total += deleted
+
+        self.stdout.write(self.style.SUCCESS(f'Reservas expiradas eliminadas: {total}'))
@@ -0,0 +1,31 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0001_initial'),
+        ('products', '0005_convert_discount_data_to_integers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(db_column='id', primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField(db_column='quantity', verbose_name='Cantidad')),
+                ('expires_at', models.DateTimeField(db_column='expires_at', verbose_name='Expira el')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')),
+                ('cart', models.ForeignKey(db_column='cart_id', on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='cart.cart', verbose_name='Carrito')),
+                ('product', models.ForeignKey(db_column='product_id', on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='products.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Reserva de Stock',
+                'verbose_name_plural': 'Reservas de Stock',
+                'db_table': 'stock_reservations',
+                'indexes': [models.Index(fields=['product', 'expires_at'], name='idx_reservation_product_exp'), models.Index(fields=['expires_at'], name='idx_reservation_expires')],
+                'unique_together': {('cart', 'product')},
+            },
+        ),
+    ]
@@ -109,3 +109,37 @@ class CartItem(models.Model):
     def subtotal(self):
         return self.quantity * self.unit_price
 
+
+class StockReservation(models.Model):
+    """Reserva temporal de stock de un carrito mientras avanza el checkout"""
+    id = models.BigAutoField(primary_key=True, db_column='id')
+    cart = models.ForeignKey(
+        Cart,
+        on_delete=models.CASCADE,
+        db_column='cart_id',
+        related_name='reservations',
+        verbose_name='Carrito'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        db_column='product_id',
+        related_name='reservations',
+        verbose_name='Producto'
+    )
+    quantity = models.PositiveIntegerField(db_column='quantity', verbose_name='Cantidad')
+    expires_at = models.DateTimeField(db_column='expires_at', verbose_name='Expira el')
+    created_at = models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')
+
+    class Meta:
+        db_table = 'stock_reservations'
+        verbose_name = 'Reserva de Stock'
+        verbose_name_plural = 'Reservas de Stock'
+        unique_together = [['cart', 'product']]
+        indexes = [
+            models.Index(fields=['product', 'expires_at'], name='idx_reservation_product_exp'),
+            models.Index(fields=['expires_at'], name='idx_reservation_expires'),
+        ]
+
+    def __str__(self):
+        return f"Reserva {self.quantity}x {self.product_id} - Carrito {self.cart_id}"
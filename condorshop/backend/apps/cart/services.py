@@ -0,0 +1,303 @@
+"""Servicios y utilidades para el dominio de carrito."""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.products.models import Product
+
+from .models import Cart, CartItem, StockReservation
+
+
+class CartStockError(Exception):
+    """La cantidad solicitada supera el stock disponible del producto."""
+
+
+# Upsert atómico: inserta el item o incrementa su cantidad en una sola sentencia.
+# El stock disponible (stock_qty menos las unidades reservadas por otros carritos)
+# se valida dentro de la misma sentencia, tanto al insertar como al incrementar, por
+# lo que dobles clics o pestañas concurrentes no pierden incrementos ni chocan con la
+# restricción única (cart_id, product_id).
+_ADD_ITEM_SQL = {
+    # PostgreSQL y SQLite (>= 3.35) comparten la sintaxis ON CONFLICT ... RETURNING
+    'default': """
+        INSERT INTO cart_items (cart_id, product_id, quantity, unit_price, created_at, updated_at)
+        SELECT %(cart_id)s, p.id, %(quantity)s, %(unit_price)s, %(now)s, %(now)s
+        FROM products p
+        WHERE p.id = %(product_id)s AND p.active = %(active)s AND p.stock_qty - %(reserved)s >= %(quantity)s
+        ON CONFLICT (cart_id, product_id) DO UPDATE SET
+            quantity = cart_items.quantity + excluded.quantity,
+            unit_price = excluded.unit_price,
+            updated_at = excluded.updated_at
+        WHERE cart_items.quantity + excluded.quantity <= (
+            SELECT stock_qty FROM products WHERE products.id = excluded.product_id
+        ) - %(reserved)s
+        RETURNING quantity
+    """,
+    # MySQL: la tabla derivada `new` reemplaza a VALUES() (obsoleto desde 8.0.20) y expone
+    # el stock disponible del producto; las asignaciones se evalúan de izquierda a derecha, por eso
+    # quantity va al final
+    'mysql': """
+        INSERT INTO cart_items (cart_id, product_id, quantity, unit_price, created_at, updated_at)
+        SELECT new.cart_id, new.product_id, new.quantity, new.unit_price, new.created_at, new.updated_at
+        FROM (
+            SELECT %(cart_id)s AS cart_id, p.id AS product_id, %(quantity)s AS quantity,
+                   %(unit_price)s AS unit_price, %(now)s AS created_at, %(now)s AS updated_at,
+                   p.stock_qty - %(reserved)s AS available
+            FROM products p
+            WHERE p.id = %(product_id)s AND p.active = %(active)s AND p.stock_qty - %(reserved)s >= %(quantity)s
+        ) AS new
+        ON DUPLICATE KEY UPDATE
+            cart_items.unit_price = IF(cart_items.quantity + new.quantity <= new.available,
+                                       new.unit_price, cart_items.unit_price),
+            cart_items.updated_at = IF(cart_items.quantity + new.quantity <= new.available,
+                                       new.updated_at, cart_items.updated_at),
+            cart_items.quantity = IF(cart_items.quantity + new.quantity <= new.available,
+                                     cart_items.quantity + new.quantity, cart_items.quantity)
+    """,
+}
+
+# MySQL: bloquea el carrito (y su item, si existe) y lee la cantidad previa, para saber
+# qué resultado del upsert corresponde a un incremento aplicado
+_LOCK_CART_ITEM_SQL = """
+    SELECT i.quantity
+    FROM carts c
+    LEFT JOIN cart_items i ON i.cart_id = c.id AND i.product_id = %(product_id)s
+    WHERE c.id = %(cart_id)s
+    FOR UPDATE
+"""
+
+
+def add_item(cart, product, quantity, reserved=0):
+    """
+    Agregar `quantity` unidades de `product` al carrito de forma atómica.
+
+    El precio unitario se fija con el `final_price` vigente del producto.
+    `reserved` son las unidades retenidas por reservas vigentes de otros carritos
+    (ver reserved_quantities). Lanza CartStockError si el total resultante supera
+    stock_qty - reserved.
+    """
+    params = {
+        'cart_id': cart.id,
+        'product_id': product.id,
+        'quantity': quantity,
+        'unit_price': product.final_price,
+        'now': timezone.now(),
+        'active': True,
+        'reserved': reserved,
+    }
+
+    if connection.vendor == 'mysql':
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(_LOCK_CART_ITEM_SQL, params)
+            row = cursor.fetchone()
+            previous = row[0] if row else None
+            cursor.execute(_ADD_ITEM_SQL['mysql'], params)
+            # Con CLIENT_FOUND_ROWS: 0 = stock insuficiente para insertar, 1 = fila insertada,
+            # 2 = incremento aplicado; un incremento rechazado deja la fila igual y cuenta 1.
+            if cursor.rowcount == (1 if previous is None else 2):
+                return
+    else:
+        with connection.cursor() as cursor:
+            cursor.execute(_ADD_ITEM_SQL['default'], params)
+            if cursor.fetchone() is not None:
+                return
+
+    raise CartStockError(f'Stock insuficiente. Disponible: {max(product.stock_qty - reserved, 0)}')
+
+
+def set_item_quantity(cart_item, quantity):
+    """
+    Fijar la cantidad de un item del carrito (con su producto ya cargado).
+
+    Aplica la misma regla que add_item: lanza CartStockError si `quantity` supera
+    stock_qty menos las reservas vigentes de otros carritos.
+    """
+    product = cart_item.product
+    reserved = reserved_quantities([product.id], exclude_cart_id=cart_item.cart_id).get(product.id, 0)
+    available = max(product.stock_qty - reserved, 0)
+    if quantity > available:
+        raise CartStockError(f'Stock insuficiente. Disponible: {available}')
+
+    cart_item.quantity = quantity
+    cart_item.save(update_fields=['quantity', 'updated_at'])
+
+
+# Fusión de carritos: los items del invitado cuyo producto no está en el carrito
+# del usuario se mueven con un único UPDATE (la tabla derivada evita el error 1093
+# de MySQL al leer la misma tabla que se actualiza).
+_MOVE_GUEST_ITEMS_SQL = """
+    UPDATE cart_items SET cart_id = %(user_cart_id)s, updated_at = %(now)s
+    WHERE cart_id = %(guest_cart_id)s AND product_id NOT IN (
+        SELECT product_id FROM (
+            SELECT product_id FROM cart_items WHERE cart_id = %(user_cart_id)s
+        ) AS user_items
+    )
+"""
+
+# Los items restantes del invitado coinciden con items del usuario: la cantidad
+# sumada se calcula en el SELECT, acotada al stock disponible (stock_qty menos las
+# reservas vigentes de otros carritos, como en add_item) sin bajar de lo que el usuario
+# ya tenía, y el upsert resuelve el conflicto escribiéndola sobre la fila existente.
+_MERGE_GUEST_ITEMS_SELECT = """
+    SELECT u.cart_id, g.product_id,
+           CASE
+               WHEN u.quantity + g.quantity <= p.stock_qty - COALESCE(r.reserved, 0) THEN u.quantity + g.quantity
+               WHEN u.quantity >= p.stock_qty - COALESCE(r.reserved, 0) THEN u.quantity
+               ELSE p.stock_qty - COALESCE(r.reserved, 0)
+           END AS quantity,
+           u.unit_price, u.created_at, %(now)s AS updated_at
+    FROM cart_items g
+    INNER JOIN cart_items u ON u.cart_id = %(user_cart_id)s AND u.product_id = g.product_id
+    INNER JOIN products p ON p.id = g.product_id
+    LEFT JOIN (
+        SELECT product_id, SUM(quantity) AS reserved
+        FROM stock_reservations
+        WHERE expires_at > %(now)s AND cart_id NOT IN (%(user_cart_id)s, %(guest_cart_id)s)
+        GROUP BY product_id
+    ) r ON r.product_id = g.product_id
+    WHERE g.cart_id = %(guest_cart_id)s
+"""
+
+_MERGE_GUEST_ITEMS_INSERT = """
+    INSERT INTO cart_items (cart_id, product_id, quantity, unit_price, created_at, updated_at)
+"""
+
+_MERGE_GUEST_ITEMS_SQL = {
+    'default': _MERGE_GUEST_ITEMS_INSERT + _MERGE_GUEST_ITEMS_SELECT + """
+        ON CONFLICT (cart_id, product_id) DO UPDATE SET
+            quantity = excluded.quantity,
+            updated_at = excluded.updated_at
+    """,
+    'mysql': _MERGE_GUEST_ITEMS_INSERT + "SELECT * FROM (" + _MERGE_GUEST_ITEMS_SELECT + """) AS new
+        ON DUPLICATE KEY UPDATE
+            cart_items.quantity = new.quantity,
+            cart_items.updated_at = new.updated_at
+    """,
+}
+
+
+def merge_guest_cart(user, session_token):
+    """
+    Fusionar el carrito invitado identificado por `session_token` en el carrito del usuario.
+
+    Si el usuario no tiene carrito activo, el carrito invitado se le asigna tal cual.
+    En otro caso los items se traspasan con sentencias de conjunto (sin iterar item
+    por item) y el carrito invitado queda desactivado en la misma transacción.
+    """
+    if not session_token:
+        return None
+
+    with transaction.atomic():
+        guest_cart = Cart.objects.select_for_update().filter(
+            session_token=session_token,
+            user__isnull=True,
+            is_active=True,
+        ).first()
+        if guest_cart is None:
+            return None
+
+        user_cart = Cart.objects.filter(user=user, is_active=True).first()
+        now = timezone.now()
+
+        if user_cart is None:
+            Cart.objects.filter(id=guest_cart.id).update(user=user, session_token=None, updated_at=now)
+            return guest_cart.id
+
+        vendor = 'mysql' if connection.vendor == 'mysql' else 'default'
+        params = {'user_cart_id': user_cart.id, 'guest_cart_id': guest_cart.id, 'now': now}
+        with connection.cursor() as cursor:
+            cursor.execute(_MOVE_GUEST_ITEMS_SQL, params)
+            cursor.execute(_MERGE_GUEST_ITEMS_SQL[vendor], params)
+
+        CartItem.objects.filter(cart_id=guest_cart.id).delete()
+        Cart.objects.filter(id=guest_cart.id).update(is_active=False, updated_at=now)
+
+    return user_cart.id
+
+
+def reserved_quantities(product_ids, exclude_cart_id=None) -> dict:
+    """
+    Unidades reservadas vigentes por producto (un único agregado sobre
+    idx_reservation_product_exp). Las reservas de `exclude_cart_id` no se cuentan.
+    """
+    reservations = StockReservation.objects.filter(
+        product_id__in=product_ids,
+        expires_at__gt=timezone.now(),
+    )
+    if exclude_cart_id is not None:
+        reservations = reservations.exclude(cart_id=exclude_cart_id)
+
+    return dict(
+        reservations.values('product_id')
+        .annotate(reserved=Sum('quantity'))
+        .values_list('product_id', 'reserved')
+    )
+
+
+def reserve_cart_stock(cart, minutes=None):
+    """
+    Reservar el stock de todos los items del carrito por `minutes` minutos.
+
+    Disponible = stock_qty - reservas vigentes de otros carritos. Retorna
+    (expires_at, faltantes); si hay faltantes no se reserva nada.
+    """
+    minutes = minutes or getattr(settings, 'STOCK_RESERVATION_MINUTES', 15)
+    items = list(cart.items.values_list('product_id', 'quantity'))
+    product_ids = sorted(product_id for product_id, _ in items)
+
+    with transaction.atomic():
+        # Bloqueo corto y en orden de id: serializa reservas sobre el mismo SKU sin deadlocks
+        products = {
+            product.id: product
+            for product in Product.objects.select_for_update().filter(id__in=product_ids).order_by('id')
+        }
+        reserved = reserved_quantities(product_ids, exclude_cart_id=cart.id)
+
+        shortages = []
+        for product_id, quantity in items:
+            product = products.get(product_id)
+            available = (product.stock_qty - reserved.get(product_id, 0)) if product and product.active else 0
+            if available < quantity:
+                shortages.append({
+                    'product_id': product_id,
+                    'name': product.name if product else None,
+                    'available': max(available, 0),
+                    'required': quantity,
+                })
+        if shortages:
+            return None, shortages
+
+        expires_at = timezone.now() + timedelta(minutes=minutes)
+        StockReservation.objects.filter(cart=cart).delete()
+        StockReservation.objects.bulk_create([
+            StockReservation(cart=cart, product_id=product_id, quantity=quantity, expires_at=expires_at)
+            for product_id, quantity in items
+        ])
+
+    return expires_at, []
+
+
+def release_cart_reservations(cart):
+    """Liberar las reservas del carrito (checkout completado o abandonado)."""
+    StockReservation.objects.filter(cart=cart).delete()
+
+
+def reprice_cart_items(items) -> int:
+    """
+    Actualizar el precio unitario de los items (con su producto ya cargado) al
+    final_price vigente, con un único bulk_update para los que cambiaron.
+    Retorna la cantidad de items actualizados.
+    """
+    changed = []
+    for item in items:
+        final_price = item.product.final_price
+        if item.unit_price != final_price:
+            item.unit_price = final_price
+            changed.append(item)
+    if changed:
+        CartItem.objects.bulk_update(changed, ['unit_price'])
+    return len(changed)
@@ -3,8 +3,11 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
 from .models import Cart, CartItem
 from .serializers import CartSerializer, AddToCartSerializer, UpdateCartItemSerializer
+from .services import CartStockError, add_item, reprice_cart_items, reserved_quantities, set_item_quantity
 from apps.products.models import Product
 
 
@@ -45,36 +48,22 @@ def add_to_cart(request):
             status=status.HTTP_404_NOT_FOUND
         )
 
-    # Validar stock
-    if product.stock_qty < quantity:
+    cart, session_token = get_cart(request)
+
+    # Validar stock descontando las reservas vigentes de otros carritos (como reserve_cart_stock)
+    reserved = reserved_quantities([product.id], exclude_cart_id=cart.id).get(product.id, 0)
+    available = max(product.stock_qty - reserved, 0)
+    if available < quantity:
         return Response(
-            {'error': f'Stock insuficiente. Disponible: {product.stock_qty}'},
+            {'error': f'Stock insuficiente. Disponible: {available}'},
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    cart, session_token = get_cart(request)
-
-    # Usar final_price (precio con descuento si existe)
-    unit_price = product.final_price
-    
-    # Verificar si el producto ya está en el carrito
-    cart_item, created = CartItem.objects.get_or_create(
-        cart=cart,
-        product=product,
-        defaults={'quantity': quantity, 'unit_price': unit_price}
-    )
-
-    if not created:
-        # Actualizar cantidad
-        new_quantity = cart_item.quantity + quantity
-        if product.stock_qty < new_quantity:
-            return Response(
-                {'error': f'Stock insuficiente. Disponible: {product.stock_qty}'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        cart_item.quantity = new_quantity
-        cart_item.unit_price = unit_price  # Actualizar precio (puede haber cambiado por descuento)
-        cart_item.save()
+    # Insertar o incrementar en una sola sentencia (precio final vigente y control de stock)
+    try:
+        add_item(cart, product, quantity, reserved=reserved)
+    except CartStockError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
     response = Response(
         {'message': 'Producto agregado al carrito', 'cart_id': cart.id},
@@ -103,15 +92,7 @@ def view_cart(request):
     ).get(id=cart.id)
     
     # Actualizar precios de items si han cambiado (por ejemplo, si se aplicó un descuento)
-    with transaction.atomic():
-        for item in cart.items.all():
-            if item.product:
-                # Recalcular precio final del producto
-                new_unit_price = item.product.final_price
-                # Solo actualizar si el precio cambió (para evitar updates innecesarios)
-                if item.unit_price != new_unit_price:
-                    item.unit_price = new_unit_price
-                    item.save(update_fields=['unit_price'])
+    reprice_cart_items(cart.items.all())
     
     serializer = CartSerializer(cart)
     response = Response(serializer.data)
@@ -122,6 +103,27 @@ def view_cart(request):
     return response
 
 
+@transaction.non_atomic_requests
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def cart_count(request):
+    """
+    Cantidad de unidades en el carrito (badge del header)
+    GET /api/cart/count
+    Se resuelve con un único agregado, sin crear carrito, sin transacción y sin serializar items.
+    """
+    items = CartItem.objects.filter(cart__is_active=True)
+    if request.user.is_authenticated:
+        items = items.filter(cart__user=request.user)
+    else:
+        session_token = request.headers.get('X-Session-Token')
+        if not session_token:
+            return Response({'count': 0})
+        items = items.filter(cart__session_token=session_token)
+
+    return Response(items.aggregate(count=Coalesce(Sum('quantity'), 0)))
+
+
 @api_view(['PATCH'])
 @permission_classes([AllowAny])
 def update_cart_item(request, item_id):
@@ -138,22 +140,18 @@ def update_cart_item(request, item_id):
     cart, session_token = get_cart(request)
 
     try:
-        cart_item = CartItem.objects.get(id=item_id, cart=cart)
+        cart_item = CartItem.objects.select_related('product').get(id=item_id, cart=cart)
     except CartItem.DoesNotExist:
         return Response(
             {'error': 'Item no encontrado en el carrito'},
             status=status.HTTP_404_NOT_FOUND
         )
 
-    # Validar stock
-    if cart_item.product.stock_qty < quantity:
-        return Response(
-            {'error': f'Stock insuficiente. Disponible: {cart_item.product.stock_qty}'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
-
-    cart_item.quantity = quantity
-    cart_item.save()
+    # Validar stock descontando las reservas vigentes de otros carritos (como add_item)
+    try:
+        set_item_quantity(cart_item, quantity)
+    except CartStockError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
     response = Response({'message': 'Item actualizado'})
     if session_token:
@@ -0,0 +1,25 @@
+from django.contrib import admin
+
+from .models import Commune, Region, RegionAlias
+
+
+class RegionAliasInline(admin.TabularInline):
+    model = RegionAlias
+    extra = 1
+    verbose_name = 'Alias'
+    verbose_name_plural = 'Alias'
+
+
+@admin.register(Region)
+class RegionAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name', 'roman_numeral', 'position')
+    search_fields = ('code', 'name', 'aliases__alias')
+    ordering = ('position',)
+    inlines = [RegionAliasInline]
+
+
+@admin.register(Commune)
+class CommuneAdmin(admin.ModelAdmin):
+    list_display = ('code', 'name', 'region')
+    list_filter = ('region',)
+    search_fields = ('code', 'name')
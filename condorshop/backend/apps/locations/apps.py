@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class LocationsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.locations'
+    verbose_name = 'Ubicaciones'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,43 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.locations.models import Commune, Region
+
+
+class Command(BaseCommand):
+    help = (
+        'Carga o actualiza comunas desde un CSV con columnas code,name,region_code '
+        '(código CUT de la comuna, nombre y código de región, ej: 13101,Santiago,RM)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='Ruta del archivo CSV (UTF-8, con encabezado)')
+
+    def handle(self, *args, **options):
+        regions = dict(Region.objects.values_list('code', 'id'))
+
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as csv_file:
+                rows = list(csv.DictReader(csv_file))
+        except OSError as exc:
+            raise CommandError(f'No se pudo leer el archivo: {exc}')
+
+        communes = []
+        for line, row in enumerate(rows, start=2):
+            region_id = regions.get((row.get('region_code') or '').strip().upper())
+            if not region_id or not row.get('code') or not row.get('name'):
+                raise CommandError(f'Fila {line} inválida: {row}')
+            communes.append(Commune(code=row['code'].strip(), name=row['name'].strip(), region_id=region_id))
+
+        with transaction.atomic():
+            Commune.objects.bulk_create(
+                communes,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['code'],
+                update_fields=['name', 'region'],
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'Comunas cargadas: {len(communes)}'))
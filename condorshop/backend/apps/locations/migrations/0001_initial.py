@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Region',
+            fields=[
+                ('id', models.AutoField(db_column='id', primary_key=True, serialize=False)),
+                ('code', models.CharField(db_column='code', max_length=10, unique=True, verbose_name='Código')),
+                ('name', models.CharField(db_column='name', max_length=100, verbose_name='Nombre')),
+                ('roman_numeral', models.CharField(db_column='roman_numeral', max_length=5, verbose_name='Número romano')),
+                ('position', models.PositiveSmallIntegerField(db_column='position', default=0, help_text='Orden geográfico de norte a sur', verbose_name='Posición')),
+            ],
+            options={
+                'verbose_name': 'Región',
+                'verbose_name_plural': 'Regiones',
+                'db_table': 'regions',
+                'ordering': ['position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RegionAlias',
+            fields=[
+                ('id', models.AutoField(db_column='id', primary_key=True, serialize=False)),
+                ('alias', models.CharField(db_column='alias', max_length=150, unique=True, verbose_name='Alias')),
+                ('region', models.ForeignKey(db_column='region_id', on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='locations.region', verbose_name='Región')),
+            ],
+            options={
+                'verbose_name': 'Alias de Región',
+                'verbose_name_plural': 'Alias de Regiones',
+                'db_table': 'region_aliases',
+            },
+        ),
+        migrations.CreateModel(
+            name='Commune',
+            fields=[
+                ('id', models.AutoField(db_column='id', primary_key=True, serialize=False)),
+                ('code', models.CharField(db_column='code', max_length=10, unique=True, verbose_name='Código CUT')),
+                ('name', models.CharField(db_column='name', max_length=100, verbose_name='Nombre')),
+                ('region', models.ForeignKey(db_column='region_id', on_delete=django.db.models.deletion.CASCADE, related_name='communes', to='locations.region', verbose_name='Región')),
+            ],
+            options={
+                'verbose_name': 'Comuna',
+                'verbose_name_plural': 'Comunas',
+                'db_table': 'communes',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['region', 'name'], name='idx_commune_region_name')],
+            },
+        ),
+    ]
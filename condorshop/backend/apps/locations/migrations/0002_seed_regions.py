@@ -0,0 +1,65 @@
+import unicodedata
+
+from django.db import migrations
+
+
+# (código, nombre oficial, número romano, alias adicionales) de norte a sur.
+# Las variantes "Región de ..." se resuelven quitando el prefijo (ver services.resolve_region_code).
+REGIONS = [
+    ('AP', 'Arica y Parinacota', 'XV', ['arica', 'arica-parinacota']),
+    ('TA', 'Tarapacá', 'I', []),
+    ('AN', 'Antofagasta', 'II', []),
+    ('AT', 'Atacama', 'III', []),
+    ('CO', 'Coquimbo', 'IV', []),
+    ('VS', 'Valparaíso', 'V', []),
+    ('RM', 'Metropolitana de Santiago', 'RM', ['metropolitana', 'region metropolitana', 'santiago', 'xiii']),
+    ('LI', "Libertador General Bernardo O'Higgins", 'VI', [
+        'ohiggins', "o'higgins", 'libertador general bernardo ohiggins', 'libertador bernardo ohiggins',
+    ]),
+    ('ML', 'Maule', 'VII', []),
+    ('NB', 'Ñuble', 'XVI', []),
+    ('BI', 'Biobío', 'VIII', ['bio bio', 'bio-bio', 'bíobio']),
+    ('AR', 'La Araucanía', 'IX', ['araucania']),
+    ('LR', 'Los Ríos', 'XIV', ['rios']),
+    ('LL', 'Los Lagos', 'X', ['lagos']),
+    ('AI', 'Aysén del General Carlos Ibáñez del Campo', 'XI', ['aysen', 'aisen']),
+    ('MA', 'Magallanes y de la Antártica Chilena', 'XII', [
+        'magallanes', 'magallanes y antartica chilena', 'magallanes y la antartica chilena',
+    ]),
+]
+
+
+def _normalize(value):
+    decomposed = unicodedata.normalize('NFKD', str(value or ''))
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+
+def seed_regions(apps, schema_editor):
+    Region = apps.get_model('locations', 'Region')
+    RegionAlias = apps.get_model('locations', 'RegionAlias')
+
+    for position, (code, name, roman, extra_aliases) in enumerate(REGIONS, start=1):
+        region, _ = Region.objects.update_or_create(
+            code=code,
+            defaults={'name': name, 'roman_numeral': roman, 'position': position},
+        )
+        aliases = {_normalize(alias) for alias in [name, roman, f'{roman} region', *extra_aliases]}
+        aliases -= {_normalize(code)}
+        for alias in aliases:
+            RegionAlias.objects.get_or_create(alias=alias, defaults={'region': region})
+
+
+def unseed_regions(apps, schema_editor):
+    Region = apps.get_model('locations', 'Region')
+    Region.objects.filter(code__in=[code for code, *_ in REGIONS]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_regions, unseed_regions),
+    ]
@@ -0,0 +1,76 @@
+from django.db import models
+
+
+class Region(models.Model):
+    """Región de Chile con código normalizado (sufijo ISO 3166-2:CL, ej: RM, VS, BI)"""
+    id = models.AutoField(primary_key=True, db_column='id')
+    code = models.CharField(max_length=10, unique=True, db_column='code', verbose_name='Código')
+    name = models.CharField(max_length=100, db_column='name', verbose_name='Nombre')
+    roman_numeral = models.CharField(max_length=5, db_column='roman_numeral', verbose_name='Número romano')
+    position = models.PositiveSmallIntegerField(
+        default=0,
+        db_column='position',
+        help_text='Orden geográfico de norte a sur',
+        verbose_name='Posición'
+    )
+
+    class Meta:
+        db_table = 'regions'
+        verbose_name = 'Región'
+        verbose_name_plural = 'Regiones'
+        ordering = ['position']
+
+    def __str__(self):
+        return self.name
+
+
+class Commune(models.Model):
+    """Comuna (código CUT) perteneciente a una región"""
+    id = models.AutoField(primary_key=True, db_column='id')
+    code = models.CharField(max_length=10, unique=True, db_column='code', verbose_name='Código CUT')
+    name = models.CharField(max_length=100, db_column='name', verbose_name='Nombre')
+    region = models.ForeignKey(
+        Region,
+        on_delete=models.CASCADE,
+        db_column='region_id',
+        related_name='communes',
+        verbose_name='Región'
+    )
+
+    class Meta:
+        db_table = 'communes'
+        verbose_name = 'Comuna'
+        verbose_name_plural = 'Comunas'
+        ordering = ['name']
+        indexes = [
+            models.Index(fields=['region', 'name'], name='idx_commune_region_name'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class RegionAlias(models.Model):
+    """Variante de escritura de una región, guardada normalizada (sin acentos ni mayúsculas)"""
+    id = models.AutoField(primary_key=True, db_column='id')
+    alias = models.CharField(max_length=150, unique=True, db_column='alias', verbose_name='Alias')
+    region = models.ForeignKey(
+        Region,
+        on_delete=models.CASCADE,
+        db_column='region_id',
+        related_name='aliases',
+        verbose_name='Región'
+    )
+
+    class Meta:
+        db_table = 'region_aliases'
+        verbose_name = 'Alias de Región'
+        verbose_name_plural = 'Alias de Regiones'
+
+    def __str__(self):
+        return f"{self.alias} → {self.region.code}"
+
+    def save(self, *args, **kwargs):
+        from .services import normalize_name
+        self.alias = normalize_name(self.alias)
+        super().save(*args, **kwargs)
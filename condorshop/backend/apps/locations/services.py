@@ -0,0 +1,67 @@
+"""Resolución de nombres de región libres a códigos canónicos."""
+
+import unicodedata
+from typing import Optional
+
+from condorshop_api.process_cache import VersionedProcessCache
+
+from .models import Region, RegionAlias
+
+
+REGION_ALIASES_VERSION_KEY = 'region_aliases_version'
+
+# Prefijos que se ignoran si el texto completo no es un alias conocido
+_REGION_PREFIXES = ('region de la ', 'region de los ', 'region del ', 'region de ', 'region ')
+
+
+def normalize_name(value: Optional[str]) -> str:
+    """Normalizar un nombre: sin acentos, minúsculas y espacios simples."""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    without_accents = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(without_accents.casefold().split())
+
+
+def _build_aliases() -> dict:
+    aliases = {}
+    for code, name in Region.objects.values_list('code', 'name'):
+        aliases[normalize_name(code)] = code
+        aliases[normalize_name(name)] = code
+    aliases.update(RegionAlias.objects.values_list('alias', 'region__code'))
+    return aliases
+
+
+_region_aliases = VersionedProcessCache(REGION_ALIASES_VERSION_KEY, _build_aliases)
+
+
+def bump_version() -> None:
+    """Invalidar el mapa de alias en todos los procesos (al cambiar regiones o alias)."""
+    _region_aliases.bump_version()
+
+
+def region_aliases() -> dict:
+    """Mapa alias normalizado → código de región, cargado una vez por proceso y versión."""
+    return _region_aliases.get()
+
+
+def resolve_region_code(value: Optional[str]) -> Optional[str]:
+    """
+    Código canónico de la región escrita en `value` (ej: "Región Metropolitana",
+    "metropolitana" o "RM" → "RM"), o None si no se reconoce.
+    """
+    normalized = normalize_name(value)
+    if not normalized:
+        return None
+
+    aliases = region_aliases()
+    code = aliases.get(normalized)
+    if code:
+        return code
+
+    for prefix in _REGION_PREFIXES:
+        if normalized.startswith(prefix):
+            code = aliases.get(normalized[len(prefix):])
+            if code:
+                return code
+    return None
@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Region, RegionAlias
+from .services import bump_version
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_delete, sender=Region)
+@receiver(post_save, sender=RegionAlias)
+@receiver(post_delete, sender=RegionAlias)
+def invalidate_region_aliases(sender, **kwargs):
+    """Renovar la versión del mapa de alias al cambiar una región o alias."""
+    bump_version()
+    transaction.on_commit(bump_version)
@@ -1,8 +1,9 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import (
     Order, OrderItem, OrderStatus, OrderStatusHistory,
     Payment, PaymentTransaction, PaymentStatus,
-    ShippingZone, ShippingRule
+    ShippingZone, ShippingZoneRegion, ShippingRule, AllocationTicket, IdempotencyKey, OutboxEvent
 )
 
 
@@ -41,7 +42,8 @@ class OrderItemInline(admin.TabularInline):
     extra = 0
     verbose_name = 'Item'
     verbose_name_plural = 'Items'
-    readonly_fields = ('product', 'quantity', 'unit_price', 'total_price')
+    fields = ('product', 'product_name', 'product_sku', 'quantity', 'unit_price', 'total_price')
+    readonly_fields = ('product', 'product_name', 'product_sku', 'quantity', 'unit_price', 'total_price')
 
 
 class OrderStatusHistoryInline(admin.TabularInline):
@@ -58,7 +60,7 @@ class OrderAdmin(admin.ModelAdmin):
     list_filter = ('status', 'created_at')
     search_fields = ('customer_email', 'customer_name', 'id')
     inlines = [OrderItemInline, OrderStatusHistoryInline]
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('item_count', 'thumbnail', 'created_at', 'updated_at')
     
     def customer_email(self, obj):
         return obj.customer_email
@@ -130,12 +132,20 @@ class PaymentTransactionAdmin(admin.ModelAdmin):
     created_at.admin_order_field = 'created_at'
 
 
+class ShippingZoneRegionInline(admin.TabularInline):
+    model = ShippingZoneRegion
+    extra = 1
+    verbose_name = 'Región'
+    verbose_name_plural = 'Regiones canónicas'
+
+
 @admin.register(ShippingZone)
 class ShippingZoneAdmin(admin.ModelAdmin):
     list_display = ('name', 'code', 'is_active', 'created_at')
     list_filter = ('is_active', 'created_at')
     search_fields = ('name', 'code')
     readonly_fields = ('created_at', 'updated_at')
+    inlines = [ShippingZoneRegionInline]
     
     def name(self, obj):
         return obj.name
@@ -182,3 +192,39 @@ class ShippingRuleAdmin(admin.ModelAdmin):
         }),
     )
 
+
+@admin.register(AllocationTicket)
+class AllocationTicketAdmin(admin.ModelAdmin):
+    list_display = ('token', 'product', 'status', 'order', 'created_at', 'processed_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('token', 'product__name', 'product__sku')
+    raw_id_fields = ('cart', 'product', 'user', 'order')
+    readonly_fields = ('token', 'created_at', 'processed_at')
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('scope', 'key', 'owner', 'response_status', 'created_at', 'expires_at')
+    list_filter = ('scope', 'response_status')
+    search_fields = ('key', 'owner')
+    readonly_fields = ('created_at',)
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'order', 'status', 'attempts', 'available_at', 'last_error', 'created_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('order__id',)
+    raw_id_fields = ('order',)
+    readonly_fields = ('created_at', 'processed_at')
+    actions = ['retry_events']
+
+    @admin.action(description='Reintentar eventos seleccionados')
+    def retry_events(self, request, queryset):
+        updated = queryset.exclude(status=OutboxEvent.STATUS_DONE).update(
+            status=OutboxEvent.STATUS_PENDING,
+            attempts=0,
+            available_at=timezone.now(),
+            processed_at=None,
+        )
+        self.message_user(request, f'Eventos reencolados: {updated}')
@@ -0,0 +1,66 @@
+"""
+Feed de cambios de pedidos para integraciones (ERP, contabilidad).
+
+Recorre los pedidos en orden (updated_at, id) sobre idx_orders_updated: cada página
+continúa desde la última fila entregada y retorna un token para reanudar, también
+cuando no hay cambios, de modo que una integración puede consultar en bucle leyendo
+solo lo nuevo. Todo cambio de estado (y por lo tanto del historial) actualiza
+updated_at del pedido.
+
+Solo se entregan filas con updated_at anterior a ahora - ORDER_CHANGE_FEED_LAG_SECONDS:
+una transacción que aún no confirma puede escribir un updated_at menor al de filas
+ya entregadas, y el margen evita saltársela.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Order
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(updated_at: datetime, order_id: int) -> str:
+    raw = json.dumps([updated_at.isoformat(), order_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        updated_at, order_id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), int(order_id)
+    except (ValueError, TypeError):
+        raise InvalidCursorError('Cursor inválido')
+
+
+def start_cursor(since: datetime) -> str:
+    """Cursor que entrega los pedidos modificados desde `since` (inclusive)."""
+    return encode_cursor(since, 0)
+
+
+def changed_orders(queryset, cursor: Optional[str], limit: int) -> tuple[list[Order], str, bool]:
+    """
+    Siguiente página del feed: (pedidos, cursor para reanudar, hay_más).
+    Sin cursor comienza desde el primer pedido.
+    """
+    horizon = timezone.now() - timedelta(seconds=settings.ORDER_CHANGE_FEED_LAG_SECONDS)
+    queryset = queryset.filter(updated_at__lte=horizon)
+    if cursor:
+        updated_at, order_id = decode_cursor(cursor)
+        # (updated_at, id) > (cursor): rango del índice desde updated_at, excluyendo lo ya entregado
+        queryset = queryset.filter(updated_at__gte=updated_at).exclude(updated_at=updated_at, id__lte=order_id)
+
+    orders = list(queryset.order_by('updated_at', 'id')[:limit + 1])
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+    if orders:
+        cursor = encode_cursor(orders[-1].updated_at, orders[-1].id)
+    return orders, cursor or '', has_more
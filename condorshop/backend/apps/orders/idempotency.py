@@ -0,0 +1,116 @@
+"""Soporte del header Idempotency-Key para endpoints que crean pedidos o registran pagos."""
+
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def _owner(request) -> str:
+    """Identificar al cliente: una misma clave de dos clientes distintos no colisiona."""
+    if request.user.is_authenticated:
+        return f'user:{request.user.id}'
+    return f"session:{request.headers.get('X-Session-Token', '')}"[:255]
+
+
+def _request_hash(request) -> str:
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def idempotent(scope: str):
+    """
+    Decorador para vistas DRF (debajo de @api_view) que admite el header Idempotency-Key.
+
+    La primera respuesta (código y cuerpo) se guarda en `idempotency_keys` durante
+    IDEMPOTENCY_KEY_TTL_HOURS y los reintentos con la misma clave la reproducen sin
+    ejecutar la vista (sin bloquear productos ni tocar stock). Sin header, la vista
+    se ejecuta normalmente.
+
+    - Misma clave con otro cuerpo: 422.
+    - Misma clave mientras el primer request sigue en proceso: 409.
+    - Respuestas 5xx no se guardan, para que el cliente pueda reintentar.
+
+    La clave se reclama dentro de la transacción del request (ATOMIC_REQUESTS): si la
+    vista lanza una excepción el reclamo se revierte junto con el resto. En vistas con
+    non_atomic_requests el reclamo se elimina explícitamente. Ante una clave duplicada
+    el registro se relee con bloqueo: bajo REPEATABLE READ (MySQL) una lectura normal
+    usaría la instantánea previa al commit del request concurrente y no lo vería.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return view_func(request, *args, **kwargs)
+
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {'error': f'{IDEMPOTENCY_HEADER} no puede superar {MAX_KEY_LENGTH} caracteres'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            owner = _owner(request)
+            request_hash = _request_hash(request)
+            now = timezone.now()
+            lookup = {'scope': scope, 'owner': owner, 'key': key}
+
+            # Una clave expirada que aún no purgó purge_idempotency_keys se puede reutilizar
+            IdempotencyKey.objects.filter(expires_at__lte=now, **lookup).delete()
+
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        request_hash=request_hash,
+                        expires_at=now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+                        **lookup
+                    )
+            except IntegrityError:
+                # Lectura con bloqueo: ve la última versión confirmada, no la instantánea
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.select_for_update().filter(**lookup).first()
+                if record is None or record.response_status is None:
+                    return Response(
+                        {'error': 'Hay un request en proceso con esta Idempotency-Key'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                if record.request_hash != request_hash:
+                    return Response(
+                        {'error': 'La Idempotency-Key ya se usó con un cuerpo distinto'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                response = Response(record.response_body, status=record.response_status)
+                response['Idempotent-Replayed'] = 'true'
+                return response
+
+            try:
+                response = view_func(request, *args, **kwargs)
+            except Exception:
+                if not transaction.get_connection().in_atomic_block:
+                    IdempotencyKey.objects.filter(id=record.id).delete()
+                raise
+
+            if response.status_code >= 500:
+                IdempotencyKey.objects.filter(id=record.id).delete()
+            else:
+                IdempotencyKey.objects.filter(id=record.id).update(
+                    response_status=response.status_code,
+                    response_body=getattr(response, 'data', None),
+                )
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders.models import Order
+from apps.orders.services import backfill_order_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Completa en lotes la copia del producto en los items y el resumen (unidades y miniatura) '
+        'de los pedidos creados antes de guardar esa información'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Cantidad de pedidos procesados por transacción (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # Pedidos sin resumen (item_count=0); se avanza por id para no releer lotes ya procesados
+        pending = Order.objects.filter(item_count=0).order_by('id')
+
+        total = 0
+        last_id = 0
+        while True:
+            ids = list(pending.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            total += backfill_order_snapshots(ids)
+            last_id = ids[-1]
+            self.stdout.write(f'  {total} pedidos procesados (hasta id {last_id})')
+
+        self.stdout.write(self.style.SUCCESS(f'Pedidos actualizados: {total}'))
@@ -0,0 +1,92 @@
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.cart.models import Cart, CartItem
+from apps.orders.models import OrderStatus
+from apps.orders.services import place_order
+from apps.products.models import Category, Product
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide latencia y número de consultas de place_order según el tamaño del carrito. '
+        'Los datos de prueba se crean dentro de una transacción que se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='1,5,10,25,50',
+            help='Tamaños de carrito separados por coma (default: 1,5,10,25,50)',
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=20,
+            help='Pedidos creados por tamaño de carrito (default: 20)',
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size.strip()]
+        runs = options['runs']
+
+        self.stdout.write(f"{'items':>6} {'consultas':>10} {'ms/pedido':>10} {'pedidos/s':>10}")
+
+        with transaction.atomic():
+            pending_status, _ = OrderStatus.objects.get_or_create(
+                code='PENDING',
+                defaults={'description': 'Pendiente de pago'}
+            )
+            suffix = uuid.uuid4().hex[:8]
+            category = Category.objects.create(name=f'Benchmark {suffix}', slug=f'benchmark-{suffix}')
+            products = Product.objects.bulk_create([
+                Product(
+                    category=category,
+                    name=f'Benchmark {suffix} {index}',
+                    slug=f'benchmark-{suffix}-{index}',
+                    sku=f'BENCH-{suffix}-{index}',
+                    price=Decimal('1000.00'),
+                    stock_qty=max(sizes) * runs * 10,
+                )
+                for index in range(max(sizes))
+            ])
+            # bulk_create no retorna ids en todos los motores
+            products = list(Product.objects.filter(category=category).order_by('id'))
+
+            for size in sizes:
+                elapsed = 0.0
+                queries = 0
+                for _ in range(runs):
+                    cart = Cart.objects.create(session_token=uuid.uuid4().hex)
+                    CartItem.objects.bulk_create([
+                        CartItem(cart=cart, product=product, quantity=1, unit_price=product.price)
+                        for product in products[:size]
+                    ])
+                    order_data = {
+                        'customer_name': 'Benchmark',
+                        'customer_email': 'benchmark@example.com',
+                        'shipping_street': 'Benchmark 123',
+                        'shipping_city': 'Santiago',
+                        'shipping_region': 'Región Metropolitana',
+                    }
+
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        place_order(cart, order_data)
+                        elapsed += time.perf_counter() - started
+                    queries = len(captured)
+
+                per_order_ms = elapsed * 1000 / runs
+                self.stdout.write(
+                    f'{size:>6} {queries:>10} {per_order_ms:>10.2f} {1000 / per_order_ms:>10.1f}'
+                )
+
+            # No dejar rastros del benchmark en la base de datos
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS(f'Benchmark completado (estado {pending_status.code}, datos revertidos)'))
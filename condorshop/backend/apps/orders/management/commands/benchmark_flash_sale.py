@@ -0,0 +1,121 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection, transaction
+
+from apps.cart.models import Cart, CartItem
+from apps.orders.models import Order, OrderStatus
+from apps.orders.services import (
+    EmptyCartError,
+    InsufficientStockError,
+    allocate_queued_orders,
+    enqueue_allocation,
+    place_order,
+)
+from apps.products.models import Category, Product
+
+
+ORDER_DATA = {
+    'customer_name': 'Benchmark',
+    'customer_email': 'benchmark@example.com',
+    'shipping_street': 'Benchmark 123',
+    'shipping_city': 'Santiago',
+    'shipping_region': 'Región Metropolitana',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga local de una venta flash sobre un único producto: compara pedidos/s '
+        'del checkout con bloqueo por request contra la asignación en cola. Requiere MySQL o '
+        'PostgreSQL (SQLite no admite escrituras concurrentes). Los datos creados se eliminan al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=500, help='Checkouts simulados por modo (default: 500)')
+        parser.add_argument('--threads', type=int, default=32, help='Requests concurrentes (default: 32)')
+        parser.add_argument('--batch-size', type=int, default=100, help='Lote del allocator (default: 100)')
+
+    def handle(self, *args, **options):
+        if not connection.features.has_select_for_update:
+            raise CommandError('El motor de base de datos no admite SELECT FOR UPDATE; usar MySQL o PostgreSQL.')
+
+        OrderStatus.objects.get_or_create(code='PENDING', defaults={'description': 'Pendiente de pago'})
+        total = options['orders']
+
+        self.stdout.write(f"{'modo':>10} {'pedidos':>8} {'segundos':>9} {'pedidos/s':>10}")
+        for mode in ('locking', 'queued'):
+            product, carts = self._setup(total, queued=(mode == 'queued'))
+            try:
+                if mode == 'locking':
+                    elapsed, created = self._run_locking(carts, options['threads'])
+                else:
+                    elapsed, created = self._run_queued(product, carts, options['threads'], options['batch_size'])
+                self.stdout.write(f'{mode:>10} {created:>8} {elapsed:>9.2f} {created / elapsed:>10.1f}')
+            finally:
+                self._cleanup(product, carts)
+
+        self.stdout.write(self.style.SUCCESS('Benchmark completado (datos eliminados)'))
+
+    def _setup(self, total, queued):
+        suffix = uuid.uuid4().hex[:8]
+        category = Category.objects.create(name=f'Flash {suffix}', slug=f'flash-{suffix}')
+        product = Product.objects.create(
+            category=category,
+            name=f'Flash {suffix}',
+            slug=f'flash-{suffix}',
+            sku=f'FLASH-{suffix}',
+            price=Decimal('1000.00'),
+            stock_qty=total,
+            queued_allocation=queued,
+        )
+        carts = [Cart.objects.create(session_token=uuid.uuid4().hex) for _ in range(total)]
+        CartItem.objects.bulk_create([
+            CartItem(cart=cart, product=product, quantity=1, unit_price=product.price) for cart in carts
+        ])
+        return product, carts
+
+    def _checkout(self, cart):
+        try:
+            with transaction.atomic():
+                place_order(cart, ORDER_DATA)
+            return 1
+        except (EmptyCartError, InsufficientStockError):
+            return 0
+        finally:
+            close_old_connections()
+
+    def _enqueue(self, cart):
+        try:
+            enqueue_allocation(cart, cart.items.values_list('product_id', flat=True).first(), ORDER_DATA)
+        finally:
+            close_old_connections()
+
+    def _run_locking(self, carts, threads):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            created = sum(executor.map(self._checkout, carts))
+        return time.perf_counter() - started, created
+
+    def _run_queued(self, product, carts, threads, batch_size):
+        # Los requests solo encolan; el tiempo total incluye vaciar la cola con un worker
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(self._enqueue, carts))
+        created = 0
+        while True:
+            granted, rejected = allocate_queued_orders(product.id, batch_size=batch_size)
+            if not granted and not rejected:
+                break
+            created += granted
+        return time.perf_counter() - started, created
+
+    def _cleanup(self, product, carts):
+        category_id = product.category_id
+        Order.objects.filter(items__product=product).delete()
+        Cart.objects.filter(id__in=[cart.id for cart in carts]).delete()
+        Product.objects.filter(id=product.id).delete()
+        Category.objects.filter(id=category_id).delete()
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.orders.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Elimina en lotes las claves de idempotencia expiradas (ejecutar periódicamente, ej: cada hora vía cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Cantidad de claves eliminadas por sentencia (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).order_by('id')
+
+        total = 0
+        while True:
+            # Lotes acotados por id (idx_idempotency_expires) para no mantener bloqueos largos
+            ids = list(expired.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted, _ = IdempotencyKey.objects.filter(id__in=ids).delete()
+            total += deleted
+
+        self.stdout.write(self.style.SUCCESS(f'Claves de idempotencia expiradas eliminadas: {total}'))
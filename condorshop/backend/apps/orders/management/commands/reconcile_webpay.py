@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from apps.orders.payments import reconcile_pending_transactions
+
+
+class Command(BaseCommand):
+    help = (
+        'Consulta en Webpay el estado de las transacciones sin resultado (commit fallido o '
+        'comprador que no volvió) y actualiza pagos y pedidos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=10,
+            help='Minutos desde la creación antes de consultar una transacción (default: 10)',
+        )
+        parser.add_argument(
+            '--expire-after',
+            type=int,
+            default=60,
+            help='Minutos tras los que una transacción aún INITIALIZED se da por vencida (default: 60)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Consultas simultáneas a la pasarela (default: 8)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=500,
+            help='Máximo de transacciones por ejecución (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        counts = reconcile_pending_transactions(
+            older_than=timedelta(minutes=options['older_than']),
+            expire_after=timedelta(minutes=options['expire_after']),
+            workers=options['workers'],
+            limit=options['limit'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Aprobadas: {counts['approved']}, rechazadas: {counts['rejected']}, "
+            f"pendientes: {counts['pending']}, errores: {counts['errors']}"
+        ))
@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.orders.models import AllocationTicket
+from apps.orders.services import allocate_queued_orders
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker de ventas flash: asigna stock a los tickets en cola en lotes por producto. '
+        'Ejecutar un único worker por producto (--product) o uno para todas las colas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--product',
+            type=int,
+            help='Id del producto cuya cola se procesa (default: todas las colas con tickets pendientes)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Tickets procesados por transacción (default: 100)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Seguir procesando indefinidamente en lugar de terminar cuando las colas quedan vacías',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0.2,
+            help='Segundos de espera con las colas vacías en modo --loop (default: 0.2)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total_granted = total_rejected = 0
+
+        while True:
+            if options['product']:
+                product_ids = [options['product']]
+            else:
+                product_ids = list(
+                    AllocationTicket.objects.filter(status=AllocationTicket.STATUS_QUEUED)
+                    .values_list('product_id', flat=True)
+                    .distinct()
+                )
+
+            processed = 0
+            for product_id in product_ids:
+                granted, rejected = allocate_queued_orders(product_id, batch_size=batch_size)
+                total_granted += granted
+                total_rejected += rejected
+                processed += granted + rejected
+
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Tickets asignados: {total_granted}, rechazados: {total_rejected}'
+        ))
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.orders.outbox import process_events, purge_processed_events
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker del outbox de pedidos: ejecuta en lotes los emails, direcciones guardadas, '
+        'auditoría y webhooks registrados con el pedido, con reintentos y espera creciente. '
+        'Se pueden ejecutar varios workers en paralelo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Eventos tomados por lote (default: 100)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Seguir procesando indefinidamente en lugar de terminar cuando no quedan eventos listos',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Segundos de espera sin eventos listos en modo --loop (default: 1)',
+        )
+        parser.add_argument(
+            '--purge-interval',
+            type=float,
+            default=600,
+            help='Segundos mínimos entre limpiezas de eventos procesados en modo --loop (default: 600)',
+        )
+
+    def handle(self, *args, **options):
+        totals = {'done': 0, 'retried': 0, 'failed': 0}
+        purged = purge_processed_events()
+        last_purge = time.monotonic()
+
+        while True:
+            counts = process_events(batch_size=options['batch_size'])
+            for key, value in counts.items():
+                totals[key] += value
+            if counts['failed']:
+                self.stdout.write(self.style.ERROR(f"  Eventos fallidos tras el último intento: {counts['failed']}"))
+            if any(counts.values()):
+                continue
+            if not options['loop']:
+                break
+            if time.monotonic() - last_purge >= options['purge_interval']:
+                purged += purge_processed_events()
+                last_purge = time.monotonic()
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Eventos procesados: {totals['done']}, reintentos programados: {totals['retried']}, "
+            f"fallidos: {totals['failed']}, eliminados: {purged}"
+        ))
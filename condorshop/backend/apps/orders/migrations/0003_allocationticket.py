@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:36
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_stockreservation'),
+        ('orders', '0002_shippingzone_shippingrule'),
+        ('products', '0006_product_queued_allocation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AllocationTicket',
+            fields=[
+                ('id', models.BigAutoField(db_column='id', primary_key=True, serialize=False)),
+                ('token', models.UUIDField(db_column='token', default=uuid.uuid4, editable=False, unique=True, verbose_name='Ticket')),
+                ('order_data', models.JSONField(db_column='order_data', verbose_name='Datos del pedido')),
+                ('status', models.CharField(choices=[('QUEUED', 'En cola'), ('GRANTED', 'Asignado'), ('REJECTED', 'Rechazado')], db_column='status', default='QUEUED', max_length=20, verbose_name='Estado')),
+                ('error', models.CharField(blank=True, db_column='error', max_length=255, null=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')),
+                ('processed_at', models.DateTimeField(blank=True, db_column='processed_at', null=True, verbose_name='Procesado el')),
+                ('cart', models.ForeignKey(db_column='cart_id', on_delete=django.db.models.deletion.CASCADE, related_name='allocation_tickets', to='cart.cart', verbose_name='Carrito')),
+                ('order', models.ForeignKey(blank=True, db_column='order_id', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='allocation_tickets', to='orders.order', verbose_name='Pedido')),
+                ('product', models.ForeignKey(db_column='product_id', help_text='Producto en cola que determina el worker que procesa el ticket', on_delete=django.db.models.deletion.CASCADE, related_name='allocation_tickets', to='products.product', verbose_name='Producto')),
+                ('user', models.ForeignKey(blank=True, db_column='user_id', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='allocation_tickets', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Ticket de Asignación',
+                'verbose_name_plural': 'Tickets de Asignación',
+                'db_table': 'allocation_tickets',
+                'indexes': [models.Index(fields=['product', 'status', 'id'], name='idx_ticket_queue'), models.Index(fields=['cart', 'status'], name='idx_ticket_cart_status')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:37
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_allocationticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(db_column='id', primary_key=True, serialize=False)),
+                ('scope', models.CharField(db_column='scope', help_text='Endpoint protegido (ej: create_order)', max_length=100, verbose_name='Ámbito')),
+                ('key', models.CharField(db_column='idempotency_key', max_length=255, verbose_name='Clave')),
+                ('owner', models.CharField(db_column='owner', help_text='Usuario o token de sesión que envió la clave', max_length=255, verbose_name='Propietario')),
+                ('request_hash', models.CharField(db_column='request_hash', max_length=64, verbose_name='Hash del request')),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, db_column='response_status', help_text='Vacío mientras el primer request está en proceso', null=True, verbose_name='Código de respuesta')),
+                ('response_body', models.JSONField(blank=True, db_column='response_body', encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Respuesta')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')),
+                ('expires_at', models.DateTimeField(db_column='expires_at', verbose_name='Expira el')),
+            ],
+            options={
+                'verbose_name': 'Clave de Idempotencia',
+                'verbose_name_plural': 'Claves de Idempotencia',
+                'db_table': 'idempotency_keys',
+                'indexes': [models.Index(fields=['expires_at'], name='idx_idempotency_expires')],
+                'constraints': [models.UniqueConstraint(fields=('scope', 'owner', 'key'), name='uniq_idempotency_scope_owner_key')],
+            },
+        ),
+    ]
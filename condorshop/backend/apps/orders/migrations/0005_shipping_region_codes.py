@@ -0,0 +1,112 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:42
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _normalize(value):
+    decomposed = unicodedata.normalize('NFKD', str(value or ''))
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+
+_PREFIXES = ('region de la ', 'region de los ', 'region del ', 'region de ', 'region ')
+
+
+def _alias_map(apps):
+    Region = apps.get_model('locations', 'Region')
+    RegionAlias = apps.get_model('locations', 'RegionAlias')
+    aliases = {}
+    for region in Region.objects.all():
+        aliases[_normalize(region.code)] = region
+        aliases[_normalize(region.name)] = region
+    for alias in RegionAlias.objects.select_related('region'):
+        aliases[alias.alias] = alias.region
+    return aliases
+
+
+def _resolve(aliases, value):
+    normalized = _normalize(value)
+    if normalized in aliases:
+        return aliases[normalized]
+    for prefix in _PREFIXES:
+        if normalized.startswith(prefix) and normalized[len(prefix):] in aliases:
+            return aliases[normalized[len(prefix):]]
+    return None
+
+
+def backfill_region_codes(apps, schema_editor):
+    """Vincular zonas a regiones canónicas y completar shipping_region_code de pedidos existentes."""
+    Order = apps.get_model('orders', 'Order')
+    ShippingZone = apps.get_model('orders', 'ShippingZone')
+    ShippingZoneRegion = apps.get_model('orders', 'ShippingZoneRegion')
+    aliases = _alias_map(apps)
+
+    for zone in ShippingZone.objects.all():
+        regions = {_resolve(aliases, name) for name in zone.regions or []}
+        ShippingZoneRegion.objects.bulk_create(
+            [ShippingZoneRegion(zone=zone, region=region) for region in regions if region is not None],
+            ignore_conflicts=True,
+        )
+
+    # Un UPDATE por valor distinto de texto (pocos valores, muchos pedidos)
+    for value in Order.objects.values_list('shipping_region', flat=True).distinct():
+        region = _resolve(aliases, value)
+        if region is not None:
+            Order.objects.filter(shipping_region=value).update(shipping_region_code=region.code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0002_seed_regions'),
+        ('orders', '0004_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShippingZoneRegion',
+            fields=[
+                ('id', models.AutoField(db_column='id', primary_key=True, serialize=False)),
+            ],
+            options={
+                'verbose_name': 'Región de Zona de Envío',
+                'verbose_name_plural': 'Regiones de Zona de Envío',
+                'db_table': 'shipping_zone_regions',
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='shipping_region_code',
+            field=models.CharField(blank=True, db_column='shipping_region_code', help_text='Código canónico de la región (locations.Region), resuelto desde shipping_region', max_length=10, null=True, verbose_name='Código de región de envío'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['shipping_region_code'], name='idx_orders_region_code'),
+        ),
+        migrations.AddField(
+            model_name='shippingzoneregion',
+            name='region',
+            field=models.ForeignKey(db_column='region_id', on_delete=django.db.models.deletion.CASCADE, related_name='shipping_zone_links', to='locations.region', verbose_name='Región'),
+        ),
+        migrations.AddField(
+            model_name='shippingzoneregion',
+            name='zone',
+            field=models.ForeignKey(db_column='zone_id', on_delete=django.db.models.deletion.CASCADE, related_name='region_links', to='orders.shippingzone', verbose_name='Zona'),
+        ),
+        migrations.AddField(
+            model_name='shippingzone',
+            name='region_refs',
+            field=models.ManyToManyField(blank=True, help_text='Regiones canónicas de la zona (tienen prioridad sobre la lista de texto)', related_name='shipping_zones', through='orders.ShippingZoneRegion', to='locations.region', verbose_name='Regiones'),
+        ),
+        migrations.AddIndex(
+            model_name='shippingzoneregion',
+            index=models.Index(fields=['region'], name='idx_zone_region_region'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='shippingzoneregion',
+            unique_together={('zone', 'region')},
+        ),
+        migrations.RunPython(backfill_region_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_shipping_region_codes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(db_column='item_count', default=0, verbose_name='Cantidad de unidades'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='thumbnail',
+            field=models.CharField(blank=True, db_column='thumbnail', max_length=500, null=True, verbose_name='Miniatura'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_image_url',
+            field=models.CharField(blank=True, db_column='product_image_url', max_length=500, null=True, verbose_name='Imagen del producto'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_name',
+            field=models.CharField(blank=True, db_column='product_name', default='', max_length=200, verbose_name='Nombre del producto'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_sku',
+            field=models.CharField(blank=True, db_column='product_sku', max_length=100, null=True, verbose_name='SKU del producto'),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_slug',
+            field=models.CharField(blank=True, db_column='product_slug', default='', max_length=200, verbose_name='Slug del producto'),
+        ),
+    ]
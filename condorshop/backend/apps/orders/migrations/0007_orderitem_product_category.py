@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:57
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_product_category(apps, schema_editor):
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    Product = apps.get_model('products', 'Product')
+    OrderItem.objects.filter(product_category_id__isnull=True).update(
+        product_category_id=Subquery(Product.objects.filter(id=OuterRef('product_id')).values('category_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_item_snapshots'),
+        ('products', '0006_product_queued_allocation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='product_category_id',
+            field=models.IntegerField(blank=True, db_column='product_category_id', null=True, verbose_name='Categoría del producto'),
+        ),
+        migrations.RunPython(backfill_product_category, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_status_created_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['processed_at', 'created_at'], name='idx_tx_pending'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:48
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_order_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(db_column='id', primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('EMAIL', 'Email'), ('SAVE_ADDRESS', 'Guardar dirección'), ('AUDIT', 'Auditoría'), ('WEBHOOK', 'Webhook')], db_column='kind', max_length=20, verbose_name='Tipo')),
+                ('payload', models.JSONField(db_column='payload', default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Datos')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendiente'), ('DONE', 'Procesado'), ('FAILED', 'Fallido')], db_column='status', default='PENDING', max_length=20, verbose_name='Estado')),
+                ('attempts', models.PositiveSmallIntegerField(db_column='attempts', default=0, verbose_name='Intentos')),
+                ('available_at', models.DateTimeField(db_column='available_at', default=django.utils.timezone.now, help_text='El worker no toma el evento antes de este instante (reintentos y eventos en proceso)', verbose_name='Disponible desde')),
+                ('last_error', models.CharField(blank=True, db_column='last_error', max_length=255, null=True, verbose_name='Último error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')),
+                ('processed_at', models.DateTimeField(blank=True, db_column='processed_at', null=True, verbose_name='Procesado el')),
+                ('order', models.ForeignKey(blank=True, db_column='order_id', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='outbox_events', to='orders.order', verbose_name='Pedido')),
+            ],
+            options={
+                'verbose_name': 'Evento de Outbox',
+                'verbose_name_plural': 'Eventos de Outbox',
+                'db_table': 'outbox_events',
+                'indexes': [models.Index(fields=['status', 'available_at'], name='idx_outbox_pending')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboxevent',
+            name='kind',
+            field=models.CharField(choices=[('EMAIL', 'Email'), ('SAVE_ADDRESS', 'Guardar dirección'), ('AUDIT', 'Auditoría'), ('WEBHOOK', 'Webhook'), ('SALES_ROLLUP', 'Rollup de ventas')], db_column='kind', max_length=20, verbose_name='Tipo'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_outbox_sales_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymenttransaction',
+            name='payment_url',
+            field=models.CharField(blank=True, db_column='payment_url', max_length=255, null=True, verbose_name='URL de pago'),
+        ),
+    ]
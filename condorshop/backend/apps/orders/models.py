@@ -1,7 +1,12 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from decimal import Decimal
+import uuid
+from apps.cart.models import Cart
+from apps.locations.models import Region
 from apps.products.models import Product, Category
 
 
@@ -43,6 +48,14 @@ class Order(models.Model):
     shipping_street = models.CharField(max_length=200, db_column='shipping_street', verbose_name='Calle de envío')
     shipping_city = models.CharField(max_length=100, db_column='shipping_city', verbose_name='Ciudad de envío')
     shipping_region = models.CharField(max_length=100, db_column='shipping_region', verbose_name='Región de envío')
+    shipping_region_code = models.CharField(
+        max_length=10,
+        null=True,
+        blank=True,
+        db_column='shipping_region_code',
+        help_text='Código canónico de la región (locations.Region), resuelto desde shipping_region',
+        verbose_name='Código de región de envío'
+    )
     shipping_postal_code = models.CharField(max_length=20, null=True, blank=True, db_column='shipping_postal_code', verbose_name='Código postal de envío')
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, db_column='total_amount', verbose_name='Monto total')
     shipping_cost = models.DecimalField(
@@ -53,6 +66,15 @@ class Order(models.Model):
         verbose_name='Costo de envío'
     )
     currency = models.CharField(max_length=10, default='CLP', db_column='currency', verbose_name='Moneda')
+    # Resumen desnormalizado para el historial (se fija al crear el pedido)
+    item_count = models.PositiveIntegerField(default=0, db_column='item_count', verbose_name='Cantidad de unidades')
+    thumbnail = models.CharField(
+        max_length=500,
+        null=True,
+        blank=True,
+        db_column='thumbnail',
+        verbose_name='Miniatura'
+    )
     created_at = models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')
     updated_at = models.DateTimeField(auto_now=True, db_column='updated_at', verbose_name='Actualizado el')
 
@@ -64,12 +86,20 @@ class Order(models.Model):
             models.Index(fields=['user'], name='idx_orders_user'),
             models.Index(fields=['status'], name='idx_orders_status'),
             models.Index(fields=['created_at'], name='idx_orders_created'),
-            models.Index(fields=['user', 'created_at'], name='idx_orders_user_created'),
+            models.Index(fields=['status', 'created_at'], name='idx_orders_status_created'),
+            models.Index(fields=['updated_at', 'id'], name='idx_orders_updated'),
+            models.Index(fields=['user', 'created_at', 'id'], name='idx_orders_user_created_id'),
+            models.Index(fields=['shipping_region_code'], name='idx_orders_region_code'),
         ]
 
     def __str__(self):
         return f"Pedido {self.id} - {self.customer_email}"
 
+    def save(self, *args, **kwargs):
+        from apps.locations.services import resolve_region_code
+        self.shipping_region_code = resolve_region_code(self.shipping_region)
+        super().save(*args, **kwargs)
+
 
 class OrderItem(models.Model):
     id = models.BigAutoField(primary_key=True, db_column='id')
@@ -87,6 +117,12 @@ class OrderItem(models.Model):
         related_name='order_items',
         verbose_name='Producto'
     )
+    # Copia del producto al momento de la compra (no cambia si se edita el catálogo)
+    product_name = models.CharField(max_length=200, blank=True, default='', db_column='product_name', verbose_name='Nombre del producto')
+    product_sku = models.CharField(max_length=100, null=True, blank=True, db_column='product_sku', verbose_name='SKU del producto')
+    product_slug = models.CharField(max_length=200, blank=True, default='', db_column='product_slug', verbose_name='Slug del producto')
+    product_image_url = models.CharField(max_length=500, null=True, blank=True, db_column='product_image_url', verbose_name='Imagen del producto')
+    product_category_id = models.IntegerField(null=True, blank=True, db_column='product_category_id', verbose_name='Categoría del producto')
     quantity = models.PositiveIntegerField(db_column='quantity', verbose_name='Cantidad')
     unit_price = models.DecimalField(max_digits=10, decimal_places=2, db_column='unit_price', verbose_name='Precio unitario')
     total_price = models.DecimalField(max_digits=10, decimal_places=2, db_column='total_price', verbose_name='Precio total')
@@ -98,7 +134,7 @@ class OrderItem(models.Model):
         verbose_name_plural = 'Items de Pedido'
 
     def __str__(self):
-        return f"{self.quantity}x {self.product.name} - Pedido {self.order.id}"
+        return f"{self.quantity}x {self.product_name or self.product_id} - Pedido {self.order_id}"
 
 
 class OrderStatusHistory(models.Model):
@@ -194,6 +230,7 @@ class PaymentTransaction(models.Model):
         verbose_name='Pago'
     )
     tbk_token = models.CharField(max_length=200, unique=True, db_column='tbk_token', verbose_name='Token TBK')
+    payment_url = models.CharField(max_length=255, null=True, blank=True, db_column='payment_url', verbose_name='URL de pago')
     buy_order = models.CharField(max_length=64, unique=True, db_column='buy_order', verbose_name='Orden de compra')
     session_id = models.CharField(max_length=64, db_column='session_id', verbose_name='ID de sesión')
     authorization_code = models.CharField(max_length=64, null=True, blank=True, db_column='authorization_code', verbose_name='Código de autorización')
@@ -212,6 +249,7 @@ class PaymentTransaction(models.Model):
         indexes = [
             models.Index(fields=['tbk_token'], name='idx_token'),
             models.Index(fields=['buy_order'], name='idx_buy_order'),
+            models.Index(fields=['processed_at', 'created_at'], name='idx_tx_pending'),
         ]
 
     def __str__(self):
@@ -228,6 +266,14 @@ class ShippingZone(models.Model):
         db_column='regions',
         help_text='Lista de regiones incluidas en esta zona (ej: ["Región Metropolitana", "Santiago"])'
     )
+    region_refs = models.ManyToManyField(
+        Region,
+        through='ShippingZoneRegion',
+        related_name='shipping_zones',
+        blank=True,
+        help_text='Regiones canónicas de la zona (tienen prioridad sobre la lista de texto)',
+        verbose_name='Regiones'
+    )
     is_active = models.BooleanField(default=True, db_column='is_active')
     created_at = models.DateTimeField(auto_now_add=True, db_column='created_at')
     updated_at = models.DateTimeField(auto_now=True, db_column='updated_at')
@@ -245,6 +291,37 @@ class ShippingZone(models.Model):
         return f"{self.name} ({self.code})"
 
 
+class ShippingZoneRegion(models.Model):
+    """Relación zona de envío ↔ región canónica"""
+    id = models.AutoField(primary_key=True, db_column='id')
+    zone = models.ForeignKey(
+        ShippingZone,
+        on_delete=models.CASCADE,
+        db_column='zone_id',
+        related_name='region_links',
+        verbose_name='Zona'
+    )
+    region = models.ForeignKey(
+        Region,
+        on_delete=models.CASCADE,
+        db_column='region_id',
+        related_name='shipping_zone_links',
+        verbose_name='Región'
+    )
+
+    class Meta:
+        db_table = 'shipping_zone_regions'
+        verbose_name = 'Región de Zona de Envío'
+        verbose_name_plural = 'Regiones de Zona de Envío'
+        unique_together = [['zone', 'region']]
+        indexes = [
+            models.Index(fields=['region'], name='idx_zone_region_region'),
+        ]
+
+    def __str__(self):
+        return f"{self.zone.code} - {self.region.code}"
+
+
 class ShippingRule(models.Model):
     """Regla de envío con prioridad y condiciones"""
     RULE_TYPE_CHOICES = [
@@ -343,3 +420,181 @@ class ShippingRule(models.Model):
         if self.rule_type == 'ALL' and (self.product or self.category):
             raise ValidationError('No debe especificar producto o categoría cuando rule_type es ALL')
 
+
+class AllocationTicket(models.Model):
+    """Intento de compra encolado para productos en modo de asignación en cola (ventas flash)"""
+    STATUS_QUEUED = 'QUEUED'
+    STATUS_GRANTED = 'GRANTED'
+    STATUS_REJECTED = 'REJECTED'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'En cola'),
+        (STATUS_GRANTED, 'Asignado'),
+        (STATUS_REJECTED, 'Rechazado'),
+    ]
+
+    id = models.BigAutoField(primary_key=True, db_column='id')
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, db_column='token', verbose_name='Ticket')
+    cart = models.ForeignKey(
+        Cart,
+        on_delete=models.CASCADE,
+        db_column='cart_id',
+        related_name='allocation_tickets',
+        verbose_name='Carrito'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        db_column='product_id',
+        related_name='allocation_tickets',
+        help_text='Producto en cola que determina el worker que procesa el ticket',
+        verbose_name='Producto'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_column='user_id',
+        related_name='allocation_tickets',
+        verbose_name='Usuario'
+    )
+    order_data = models.JSONField(db_column='order_data', verbose_name='Datos del pedido')
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+        db_column='status',
+        verbose_name='Estado'
+    )
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_column='order_id',
+        related_name='allocation_tickets',
+        verbose_name='Pedido'
+    )
+    error = models.CharField(max_length=255, null=True, blank=True, db_column='error', verbose_name='Error')
+    created_at = models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')
+    processed_at = models.DateTimeField(null=True, blank=True, db_column='processed_at', verbose_name='Procesado el')
+
+    class Meta:
+        db_table = 'allocation_tickets'
+        verbose_name = 'Ticket de Asignación'
+        verbose_name_plural = 'Tickets de Asignación'
+        indexes = [
+            models.Index(fields=['product', 'status', 'id'], name='idx_ticket_queue'),
+            models.Index(fields=['cart', 'status'], name='idx_ticket_cart_status'),
+        ]
+
+    def __str__(self):
+        return f"Ticket {self.token} - {self.status}"
+
+
+class IdempotencyKey(models.Model):
+    """Respuesta almacenada para un header Idempotency-Key (se reproduce en reintentos)"""
+    id = models.BigAutoField(primary_key=True, db_column='id')
+    scope = models.CharField(max_length=100, db_column='scope', help_text='Endpoint protegido (ej: create_order)', verbose_name='Ámbito')
+    key = models.CharField(max_length=255, db_column='idempotency_key', verbose_name='Clave')
+    owner = models.CharField(
+        max_length=255,
+        db_column='owner',
+        help_text='Usuario o token de sesión que envió la clave',
+        verbose_name='Propietario'
+    )
+    request_hash = models.CharField(max_length=64, db_column='request_hash', verbose_name='Hash del request')
+    response_status = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        db_column='response_status',
+        help_text='Vacío mientras el primer request está en proceso',
+        verbose_name='Código de respuesta'
+    )
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, db_column='response_body', verbose_name='Respuesta')
+    created_at = models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')
+    expires_at = models.DateTimeField(db_column='expires_at', verbose_name='Expira el')
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        verbose_name = 'Clave de Idempotencia'
+        verbose_name_plural = 'Claves de Idempotencia'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'owner', 'key'], name='uniq_idempotency_scope_owner_key'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idx_idempotency_expires'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Efecto secundario de un pedido (email, dirección guardada, auditoría, webhook,
+    rollup de ventas) registrado en la misma transacción que el pedido. Lo ejecuta el worker
+    python manage.py run_outbox, con reintentos y espera creciente.
+    """
+    KIND_EMAIL = 'EMAIL'
+    KIND_SAVE_ADDRESS = 'SAVE_ADDRESS'
+    KIND_AUDIT = 'AUDIT'
+    KIND_WEBHOOK = 'WEBHOOK'
+    KIND_SALES_ROLLUP = 'SALES_ROLLUP'
+    KIND_CHOICES = [
+        (KIND_EMAIL, 'Email'),
+        (KIND_SAVE_ADDRESS, 'Guardar dirección'),
+        (KIND_AUDIT, 'Auditoría'),
+        (KIND_WEBHOOK, 'Webhook'),
+        (KIND_SALES_ROLLUP, 'Rollup de ventas'),
+    ]
+    STATUS_PENDING = 'PENDING'
+    STATUS_DONE = 'DONE'
+    STATUS_FAILED = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_DONE, 'Procesado'),
+        (STATUS_FAILED, 'Fallido'),
+    ]
+
+    id = models.BigAutoField(primary_key=True, db_column='id')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, db_column='kind', verbose_name='Tipo')
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_column='order_id',
+        related_name='outbox_events',
+        verbose_name='Pedido'
+    )
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder, db_column='payload', verbose_name='Datos')
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        db_column='status',
+        verbose_name='Estado'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, db_column='attempts', verbose_name='Intentos')
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        db_column='available_at',
+        help_text='El worker no toma el evento antes de este instante (reintentos y eventos en proceso)',
+        verbose_name='Disponible desde'
+    )
+    last_error = models.CharField(max_length=255, null=True, blank=True, db_column='last_error', verbose_name='Último error')
+    created_at = models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')
+    processed_at = models.DateTimeField(null=True, blank=True, db_column='processed_at', verbose_name='Procesado el')
+
+    class Meta:
+        db_table = 'outbox_events'
+        verbose_name = 'Evento de Outbox'
+        verbose_name_plural = 'Eventos de Outbox'
+        indexes = [
+            # Eventos listos para el worker: un rango del índice
+            models.Index(fields=['status', 'available_at'], name='idx_outbox_pending'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.order_id} - {self.status}"
@@ -0,0 +1,295 @@
+"""
+Outbox transaccional de los pedidos.
+
+Los efectos secundarios de un pedido (email de confirmación, guardar la dirección,
+auditoría, webhook para el ERP, rollups de ventas) no se ejecutan en el request: se registran como filas
+de `outbox_events` con un bulk_create en la misma transacción que el pedido, por lo
+que existen si y solo si el pedido se confirmó. El worker (python manage.py run_outbox)
+los toma en lotes y los ejecuta con reintentos y espera creciente.
+
+La entrega es al menos una vez: un evento puede ejecutarse de nuevo si el worker se
+detiene después del efecto y antes de marcarlo. Los handlers toleran repeticiones
+(la dirección no se duplica; el webhook envía el id del evento en X-CondorShop-Delivery).
+El rollup de ventas se marca como procesado en la misma transacción que la suma, por
+lo que cuenta cada pedido exactamente una vez.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+from datetime import timedelta
+from typing import Optional, Sequence
+
+import requests
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.analytics.services import record_order_created, record_status_changes
+from apps.audit.models import AuditLog
+from apps.users.models import Address
+
+from .models import Order, OutboxEvent
+
+
+logger = logging.getLogger(__name__)
+
+# Segundos que un evento queda reservado para el worker que lo tomó. La reserva se renueva
+# al empezar cada evento, así que basta con que supere la duración máxima de un handler
+# (webhook: WEBHOOK_TIMEOUT, email: EMAIL_TIMEOUT), no la de un lote completo
+CLAIM_LEASE_SECONDS = 300
+MAX_RETRY_SECONDS = 3600
+WEBHOOK_TIMEOUT = (3.05, 10)
+
+
+def enqueue(events: Sequence[Optional[OutboxEvent]]) -> None:
+    """Registrar eventos con un bulk_create; llamar dentro de la transacción que los origina."""
+    events = [event for event in events if event is not None]
+    if events:
+        OutboxEvent.objects.bulk_create(events)
+
+
+def email_event(order: Order) -> OutboxEvent:
+    return OutboxEvent(kind=OutboxEvent.KIND_EMAIL, order=order)
+
+
+def save_address_event(order: Order, user, address: dict) -> OutboxEvent:
+    return OutboxEvent(kind=OutboxEvent.KIND_SAVE_ADDRESS, order=order, payload={'user_id': user.id, **address})
+
+
+def audit_event(order: Order, user, action: str, values: dict, ip_address: Optional[str] = None) -> OutboxEvent:
+    return OutboxEvent(
+        kind=OutboxEvent.KIND_AUDIT,
+        order=order,
+        payload={
+            'user_id': user.id if user else None,
+            'action': action,
+            'table_name': 'orders',
+            'record_id': order.id,
+            'new_values': values,
+            'ip_address': ip_address,
+        },
+    )
+
+
+def order_created_events(
+    order: Order,
+    user,
+    save_address: bool = False,
+    address_label: str = '',
+    ip_address: Optional[str] = None,
+) -> list[OutboxEvent]:
+    """Auditoría del pedido recién creado y, si el usuario lo pidió, guardar su dirección."""
+    events = [
+        audit_event(
+            order,
+            user,
+            'CREATE',
+            {'status': 'PENDING', 'total_amount': int(order.total_amount), 'item_count': order.item_count},
+            ip_address=ip_address,
+        ),
+    ]
+    if user and save_address:
+        events.append(save_address_event(order, user, {
+            'label': address_label or None,
+            'street': order.shipping_street,
+            'city': order.shipping_city,
+            'region': order.shipping_region,
+            'postal_code': order.shipping_postal_code or None,
+            'is_default': False,  # No marcar como default automáticamente
+        }))
+    return events
+
+
+def sales_rollup_event(order: Order, status_code: Optional[str] = None,
+                       previous_status: Optional[str] = None) -> OutboxEvent:
+    """
+    Suma del pedido a los rollups diarios con `status_code` (por defecto su estado actual)
+    o, con `previous_status`, traslado de sus valores de ese estado al nuevo.
+    """
+    payload = {'status_code': status_code or order.status.code}
+    if previous_status is not None:
+        payload['previous_status'] = previous_status
+    return OutboxEvent(kind=OutboxEvent.KIND_SALES_ROLLUP, order=order, payload=payload)
+
+
+def webhook_event(order: Order, event: str, **data) -> Optional[OutboxEvent]:
+    """Notificación para ORDER_WEBHOOK_URL, o None si no hay webhook configurado."""
+    if not settings.ORDER_WEBHOOK_URL:
+        return None
+    return OutboxEvent(
+        kind=OutboxEvent.KIND_WEBHOOK,
+        order=order,
+        payload={'event': event, 'order_id': order.id, 'occurred_at': timezone.now(), **data},
+    )
+
+
+def _send_email(event: OutboxEvent) -> None:
+    from .services import send_order_confirmation_email  # services registra eventos de este módulo
+
+    order = Order.objects.select_related('status').filter(id=event.order_id).first()
+    if order is not None:
+        send_order_confirmation_email(order)
+
+
+def _save_address(event: OutboxEvent) -> None:
+    data = dict(event.payload)
+    exists = Address.objects.filter(
+        user_id=data['user_id'], street=data['street'], city=data['city'], region=data['region']
+    ).exists()
+    if not exists:
+        Address.objects.create(**data)
+
+
+def _write_audit(event: OutboxEvent) -> None:
+    AuditLog.objects.create(**event.payload)
+
+
+def _record_sales_rollup(event: OutboxEvent) -> None:
+    # Marcar el evento en la transacción de la suma: si otro worker (lease vencido) o
+    # rebuild_day ya lo marcó, no se vuelve a sumar
+    claimed = OutboxEvent.objects.filter(id=event.id, status=OutboxEvent.STATUS_PENDING).update(
+        status=OutboxEvent.STATUS_DONE,
+        processed_at=timezone.now(),
+    )
+    order = Order.objects.filter(id=event.order_id).first() if claimed else None
+    if order is None:
+        return
+    items = list(order.items.all())
+    status_code = event.payload['status_code']
+    previous_status = event.payload.get('previous_status')
+    if previous_status is None:
+        record_order_created(order, items, status_code=status_code)
+    else:
+        record_status_changes([order], {order.id: items}, {order.id: previous_status}, status_code)
+
+
+_webhook_session = None
+
+
+def _post_webhook(event: OutboxEvent) -> None:
+    global _webhook_session
+    if _webhook_session is None:
+        _webhook_session = requests.Session()  # conexión reutilizada entre eventos del lote
+
+    body = json.dumps({'id': event.id, **event.payload}, cls=DjangoJSONEncoder).encode()
+    headers = {
+        'Content-Type': 'application/json',
+        'X-CondorShop-Event': event.payload['event'],
+        'X-CondorShop-Delivery': str(event.id),
+    }
+    if settings.ORDER_WEBHOOK_SECRET:
+        digest = hmac.new(settings.ORDER_WEBHOOK_SECRET.encode(), body, hashlib.sha256).hexdigest()
+        headers['X-CondorShop-Signature'] = f'sha256={digest}'
+    response = _webhook_session.post(settings.ORDER_WEBHOOK_URL, data=body, headers=headers, timeout=WEBHOOK_TIMEOUT)
+    response.raise_for_status()
+
+
+HANDLERS = {
+    OutboxEvent.KIND_EMAIL: _send_email,
+    OutboxEvent.KIND_SAVE_ADDRESS: _save_address,
+    OutboxEvent.KIND_AUDIT: _write_audit,
+    OutboxEvent.KIND_WEBHOOK: _post_webhook,
+    OutboxEvent.KIND_SALES_ROLLUP: _record_sales_rollup,
+}
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Espera antes del siguiente intento: OUTBOX_RETRY_SECONDS duplicado por intento, máximo una hora."""
+    return timedelta(seconds=min(settings.OUTBOX_RETRY_SECONDS * 2 ** (attempts - 1), MAX_RETRY_SECONDS))
+
+
+def claim_events(batch_size: int) -> list[OutboxEvent]:
+    """
+    Tomar hasta batch_size eventos listos, en orden de disponibilidad (idx_outbox_pending).
+
+    SKIP LOCKED permite varios workers sin esperas; los eventos tomados quedan reservados
+    CLAIM_LEASE_SECONDS y vuelven a estar disponibles si el worker se detiene. Cada toma
+    incrementa `attempts`, que identifica la reserva vigente (ver _renew_lease).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEvent.STATUS_PENDING, available_at__lte=now)
+            .order_by('available_at', 'id')[:batch_size]
+        )
+        if events:
+            OutboxEvent.objects.filter(id__in=[event.id for event in events]).update(
+                available_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS),
+                attempts=F('attempts') + 1,
+            )
+    for event in events:
+        event.attempts += 1
+    return events
+
+
+def _renew_lease(event: OutboxEvent) -> bool:
+    """
+    Extender la reserva del evento antes de ejecutarlo. Retorna False si ya no es de este
+    worker: su reserva venció mientras esperaba en el lote y otro worker lo tomó (attempts
+    cambió) o lo terminó.
+    """
+    return bool(
+        OutboxEvent.objects.filter(
+            id=event.id, status=OutboxEvent.STATUS_PENDING, attempts=event.attempts
+        ).update(available_at=timezone.now() + timedelta(seconds=CLAIM_LEASE_SECONDS))
+    )
+
+
+def _record_failure(event: OutboxEvent, exc: Exception) -> bool:
+    """Programar el reintento o, agotados OUTBOX_MAX_ATTEMPTS, dejar el evento en FAILED. Retorna si falló definitivamente."""
+    now = timezone.now()
+    failed = event.attempts >= settings.OUTBOX_MAX_ATTEMPTS
+    OutboxEvent.objects.filter(id=event.id).update(
+        status=OutboxEvent.STATUS_FAILED if failed else OutboxEvent.STATUS_PENDING,
+        available_at=now if failed else now + retry_delay(event.attempts),
+        last_error=str(exc)[:255],
+        processed_at=now if failed else None,
+    )
+    return failed
+
+
+def process_events(batch_size: int = 100) -> dict:
+    """
+    Ejecutar un lote de eventos. Retorna {'done', 'retried', 'failed'}.
+
+    Cada evento renueva su reserva al empezar y se marca DONE en la misma transacción que
+    su handler, así que ningún evento del lote queda ejecutado pero sin marcar mientras
+    corren los siguientes. Los que otro worker retomó se omiten.
+    """
+    counts = {'done': 0, 'retried': 0, 'failed': 0}
+    for event in claim_events(batch_size):
+        if not _renew_lease(event):
+            logger.info('Evento de outbox %s tomado por otro worker, se omite', event.id)
+            continue
+        try:
+            with transaction.atomic():
+                HANDLERS[event.kind](event)
+                OutboxEvent.objects.filter(id=event.id).update(
+                    status=OutboxEvent.STATUS_DONE,
+                    processed_at=timezone.now(),
+                    last_error=None,
+                )
+        except Exception as exc:
+            logger.warning('Evento de outbox %s (%s) falló en el intento %s: %s', event.id, event.kind, event.attempts, exc)
+            counts['failed' if _record_failure(event, exc) else 'retried'] += 1
+        else:
+            counts['done'] += 1
+    return counts
+
+
+def purge_processed_events(batch_size: int = 1000) -> int:
+    """Eliminar en lotes los eventos procesados hace más de OUTBOX_RETENTION_DAYS (los FAILED se conservan)."""
+    cutoff = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    processed = OutboxEvent.objects.filter(status=OutboxEvent.STATUS_DONE, processed_at__lt=cutoff).order_by('id')
+    total = 0
+    while True:
+        ids = list(processed.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return total
+        deleted, _ = OutboxEvent.objects.filter(id__in=ids).delete()
+        total += deleted
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class OrderHistoryPagination(CursorPagination):
+    """
+    Paginación por keyset sobre (created_at, id), del más reciente al más antiguo
+    (idx_orders_user_created_id).
+
+    CursorPagination de DRF guarda solo el primer campo del orden y resuelve los empates
+    con un offset; aquí el cursor guarda el par completo y cada página continúa
+    estrictamente después de la última fila entregada, así que pedidos con el mismo
+    created_at no se saltan ni se repiten y los pedidos nuevos no desplazan las páginas.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def _encode_position(self, order) -> str:
+        return f'{order.created_at.isoformat()}|{order.id}'
+
+    def _decode_position(self, position: str) -> tuple[datetime, int]:
+        try:
+            created_at, order_id = position.rsplit('|', 1)
+            return datetime.fromisoformat(created_at), int(order_id)
+        except (AttributeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+
+        if position is not None:
+            created_at, order_id = self._decode_position(position)
+            if reverse:
+                # (created_at, id) > cursor: página anterior (más recientes)
+                queryset = queryset.filter(created_at__gte=created_at).exclude(created_at=created_at, id__lte=order_id)
+            else:
+                # (created_at, id) < cursor: página siguiente (más antiguos)
+                queryset = queryset.filter(created_at__lte=created_at).exclude(created_at=created_at, id__gte=order_id)
+
+        ordering = ('created_at', 'id') if reverse else self.ordering
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._encode_position(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._encode_position(self.page[0])))
@@ -0,0 +1,315 @@
+"""
+Pagos con Webpay Plus.
+
+Flujo: `start_webpay_payment` crea la transacción en la pasarela y registra
+Payment/PaymentTransaction; Webpay devuelve al comprador a WEBPAY_RETURN_URL con
+`token_ws` y `commit_webpay_return` la confirma (búsqueda por tbk_token, índice
+único). La creación se hace con la fila del pedido bloqueada y reutiliza la
+transacción INITIALIZED vigente, para que reintentos o solicitudes concurrentes no
+abran varios pagos del mismo pedido. Las demás llamadas a la pasarela se hacen fuera
+de las transacciones de base de datos; el resultado se aplica después en una
+transacción corta con la fila de PaymentTransaction bloqueada, de modo que un
+callback repetido o concurrente no lo aplica dos veces. Si la confirmación falla (timeout, error de red) la transacción
+queda pendiente y la resuelve `python manage.py reconcile_webpay`, que consulta el
+estado de las pendientes en paralelo.
+"""
+
+import logging
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Order, OrderStatus, Payment, PaymentStatus, PaymentTransaction
+from .outbox import email_event, enqueue
+from .state_machine import InvalidTransitionError, can_transition, transition_error, transition_orders
+from .webpay import WebpayClient, WebpayError, get_webpay_client
+
+
+logger = logging.getLogger(__name__)
+
+# Estados de pedido desde los que se puede iniciar (o reintentar) un pago
+PAYABLE_STATUSES = ('PENDING', 'FAILED')
+
+RESULT_APPROVED = 'approved'
+RESULT_REJECTED = 'rejected'
+RESULT_ABORTED = 'aborted'
+RESULT_PENDING = 'pending'
+
+# Estado local (PaymentTransaction.status) de transacciones que no llegan a la pasarela
+STATUS_INITIALIZED = 'INITIALIZED'
+STATUS_ABORTED = 'ABORTED'
+STATUS_EXPIRED = 'EXPIRED'
+
+# Minutos en que start_webpay_payment reutiliza una transacción INITIALIZED del pedido;
+# después el formulario de Webpay ya venció y se crea una nueva
+TRANSACTION_REUSE_MINUTES = 5
+
+# Token firmado que acredita al comprador invitado de un pedido (se entrega al crearlo)
+PAYMENT_TOKEN_SALT = 'orders.payment'
+PAYMENT_TOKEN_MAX_AGE = timedelta(days=1)
+
+
+class PaymentError(Exception):
+    """El pedido no admite la operación de pago solicitada."""
+
+
+def _payment_status(code: str) -> PaymentStatus:
+    return PaymentStatus.objects.get(code=code)
+
+
+def _is_approved(tx: PaymentTransaction, result: dict) -> bool:
+    try:
+        amount = Decimal(str(result.get('amount')))
+    except InvalidOperation:
+        return False
+    return result.get('response_code') == 0 and result.get('status') == 'AUTHORIZED' and amount == tx.amount
+
+
+def transaction_result(tx: PaymentTransaction) -> str:
+    if tx.processed_at is None:
+        return RESULT_PENDING
+    if tx.status == STATUS_ABORTED:
+        return RESULT_ABORTED
+    if tx.payment.status.code in ('CAPTURED', 'REFUNDED'):
+        return RESULT_APPROVED
+    return RESULT_REJECTED
+
+
+def _move_order(order: Order, code: str, note: str, user=None) -> None:
+    try:
+        transition_orders([order.id], OrderStatus.objects.get(code=code), user=user, note=note)
+    except InvalidTransitionError as exc:
+        # Por ejemplo, un pedido cancelado por un administrador mientras se pagaba
+        logger.warning('Pedido %s: no se cambia a %s tras el pago (%s)', order.id, code, exc)
+
+
+def _lock_order(order_id: int) -> Order:
+    # Sin select_related('status'): un SELECT ... FOR UPDATE con join que espera a otra
+    # transacción que cambió el estado vuelve a evaluar el join y no encuentra la fila
+    order = Order.objects.select_for_update().get(id=order_id)
+    order.status = OrderStatus.objects.get(id=order.status_id)
+    return order
+
+
+def order_payment_token(order: Order) -> str:
+    return signing.dumps(order.id, salt=PAYMENT_TOKEN_SALT)
+
+
+def check_payment_token(order: Order, token: Optional[str]) -> bool:
+    """Si `token` fue emitido por order_payment_token para este pedido y no venció."""
+    if not token:
+        return False
+    try:
+        return signing.loads(token, salt=PAYMENT_TOKEN_SALT, max_age=PAYMENT_TOKEN_MAX_AGE) == order.id
+    except signing.BadSignature:
+        return False
+
+
+def start_webpay_payment(order: Order, client: Optional[WebpayClient] = None) -> tuple[PaymentTransaction, str]:
+    """
+    Crear la transacción en Webpay. Retorna la transacción y la URL a la que enviar `token_ws`.
+
+    El pedido queda bloqueado mientras se llama a la pasarela (solo espera otra solicitud
+    de pago del mismo pedido), que recibe la transacción ya creada si sigue vigente.
+    """
+    with transaction.atomic():
+        order = _lock_order(order.id)
+        if order.status.code not in PAYABLE_STATUSES:
+            raise PaymentError('El pedido no está pendiente de pago')
+
+        current = (
+            PaymentTransaction.objects.filter(
+                payment__order=order,
+                status=STATUS_INITIALIZED,
+                processed_at__isnull=True,
+                created_at__gte=timezone.now() - timedelta(minutes=TRANSACTION_REUSE_MINUTES),
+            )
+            .order_by('-id')
+            .first()
+        )
+        if current is not None:
+            return current, current.payment_url
+
+        client = client or get_webpay_client()
+        buy_order = f'{order.id}-{secrets.token_hex(4)}'  # Webpay admite hasta 26 caracteres
+        session_id = secrets.token_hex(16)
+        result = client.create(buy_order, session_id, int(order.total_amount), settings.WEBPAY_RETURN_URL)
+
+        payment = Payment.objects.create(
+            order=order,
+            payment_method='webpay',
+            status=_payment_status('CREATED'),
+            amount=order.total_amount,
+        )
+        tx = PaymentTransaction.objects.create(
+            payment=payment,
+            tbk_token=result['token'],
+            payment_url=result['url'],
+            buy_order=buy_order,
+            session_id=session_id,
+            amount=order.total_amount,
+            status=STATUS_INITIALIZED,
+        )
+    return tx, result['url']
+
+
+def apply_gateway_result(transaction_id: int, result: dict) -> PaymentTransaction:
+    """
+    Registrar la respuesta de la pasarela (commit o status) y mover el pedido a PAID o FAILED.
+    Si otra solicitud ya la registró, no hace nada.
+    """
+    with transaction.atomic():
+        tx = (
+            PaymentTransaction.objects.select_for_update()
+            .select_related('payment__order', 'payment__status')
+            .get(id=transaction_id)
+        )
+        if tx.processed_at is not None:
+            return tx
+
+        approved = _is_approved(tx, result)
+        tx.status = result.get('status') or STATUS_ABORTED
+        tx.response_code = result.get('response_code')
+        tx.authorization_code = result.get('authorization_code')
+        tx.card_detail = (result.get('card_detail') or {}).get('card_number')
+        tx.processed_at = timezone.now()
+        tx.save(update_fields=['status', 'response_code', 'authorization_code', 'card_detail', 'processed_at', 'updated_at'])
+
+        payment = tx.payment
+        payment.status = _payment_status('CAPTURED' if approved else 'FAILED')
+        payment.save(update_fields=['status', 'updated_at'])
+
+        order = payment.order
+        if approved:
+            _move_order(order, 'PAID', f'Pago Webpay aprobado ({tx.buy_order})')
+            enqueue([email_event(order)])  # el worker del outbox envía la confirmación
+        else:
+            _move_order(order, 'FAILED', f'Pago Webpay no aprobado ({tx.buy_order}, {tx.status})')
+
+    return tx
+
+
+def _transaction_by(**lookup) -> Optional[PaymentTransaction]:
+    return (
+        PaymentTransaction.objects.select_related('payment__order', 'payment__status')
+        .filter(**lookup)
+        .first()
+    )
+
+
+def commit_webpay_return(params, client: Optional[WebpayClient] = None) -> Optional[PaymentTransaction]:
+    """
+    Procesar la vuelta del comprador desde Webpay (parámetros GET o POST):
+    - `TBK_TOKEN`: el comprador anuló el pago en el formulario de Webpay.
+    - `token_ws`: pago finalizado, se confirma con la pasarela.
+    - solo `TBK_ORDEN_COMPRA`: se agotó el tiempo en el formulario.
+    Retorna None si la transacción no existe.
+    """
+    token = params.get('token_ws')
+    if params.get('TBK_TOKEN'):
+        # Anulado (o error en el formulario, que además trae token_ws): no se confirma
+        tx = _transaction_by(tbk_token=params['TBK_TOKEN'])
+    elif token:
+        tx = _transaction_by(tbk_token=token)
+        if tx is None or tx.processed_at is not None:
+            return tx
+        try:
+            result = (client or get_webpay_client()).commit(token)
+        except WebpayError as exc:
+            # Queda pendiente: la resuelve reconcile_webpay consultando el estado
+            logger.warning('Commit Webpay fallido para %s: %s', tx.buy_order, exc)
+            return tx
+        return apply_gateway_result(tx.id, result)
+    elif params.get('TBK_ORDEN_COMPRA'):
+        tx = _transaction_by(buy_order=params['TBK_ORDEN_COMPRA'])
+    else:
+        return None
+
+    if tx is None or tx.processed_at is not None:
+        return tx
+    return apply_gateway_result(tx.id, {'status': STATUS_ABORTED})
+
+
+def reconcile_pending_transactions(older_than: timedelta, expire_after: timedelta, workers: int = 8,
+                                   limit: int = 500, client: Optional[WebpayClient] = None) -> dict:
+    """
+    Consultar en la pasarela las transacciones sin resultado creadas hace más de
+    `older_than` y registrar lo que responda. Las consultas HTTP se hacen en paralelo
+    (hilos, sin acceso a la base de datos); los resultados se aplican en este hilo.
+    Las que siguen INITIALIZED después de `expire_after` se dan por vencidas.
+    """
+    client = client or get_webpay_client()
+    now = timezone.now()
+    pending = list(
+        PaymentTransaction.objects.filter(processed_at__isnull=True, created_at__lt=now - older_than)
+        .order_by('id')
+        .values_list('id', 'tbk_token', 'created_at')[:limit]
+    )
+
+    def fetch(token):
+        try:
+            return client.status(token)
+        except WebpayError as exc:
+            return exc
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(fetch, [token for _, token, _ in pending]))
+
+    counts = {RESULT_APPROVED: 0, RESULT_REJECTED: 0, RESULT_PENDING: 0, 'errors': 0}
+    for (tx_id, token, created_at), result in zip(pending, results):
+        if isinstance(result, WebpayError):
+            logger.warning('Estado Webpay no disponible para la transacción %s: %s', tx_id, result)
+            counts['errors'] += 1
+            continue
+        if result.get('status') == STATUS_INITIALIZED:
+            if created_at >= now - expire_after:
+                counts[RESULT_PENDING] += 1
+                continue
+            result = {'status': STATUS_EXPIRED}
+        tx = apply_gateway_result(tx_id, result)
+        counts[RESULT_APPROVED if transaction_result(tx) == RESULT_APPROVED else RESULT_REJECTED] += 1
+    return counts
+
+
+def refund_order_payment(order: Order, user=None, client: Optional[WebpayClient] = None) -> PaymentTransaction:
+    """
+    Anular el pago confirmado del pedido por su monto total y cancelar el pedido (devuelve el stock).
+
+    Solo se anula si el pedido aún puede cancelarse (no se reembolsa un pedido en preparación
+    o despachado). El pedido y la transacción quedan bloqueados mientras se llama a la
+    pasarela: un reembolso concurrente espera y encuentra el pago ya anulado. Si la pasarela
+    falla no se modifica nada.
+    """
+    with transaction.atomic():
+        order = _lock_order(order.id)
+        if not can_transition(order.status.code, 'CANCELLED', refunded=True):
+            raise PaymentError(transition_error(order.status.code, 'CANCELLED'))
+
+        tx = (
+            PaymentTransaction.objects.select_for_update(of=('self',))
+            .select_related('payment')
+            .filter(payment__order=order, payment__status__code='CAPTURED')
+            .order_by('-id')
+            .first()
+        )
+        if tx is None:
+            raise PaymentError('El pedido no tiene un pago confirmado')
+
+        result = (client or get_webpay_client()).refund(tx.tbk_token, int(tx.amount))
+
+        tx.status = result.get('type') or 'REVERSED'
+        tx.save(update_fields=['status', 'updated_at'])
+        tx.payment.status = _payment_status('REFUNDED')
+        tx.payment.save(update_fields=['status', 'updated_at'])
+        transition_orders(
+            [order.id], OrderStatus.objects.get(code='CANCELLED'), user=user,
+            note=f'Pago reembolsado ({tx.buy_order})', refunded=True,
+        )
+    return tx
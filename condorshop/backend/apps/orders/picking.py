@@ -0,0 +1,88 @@
+"""
+Lista de picking de bodega.
+
+Suma las unidades a preparar por SKU (y por región de envío) para los pedidos de un
+estado y rango de fechas con una sola consulta agrupada sobre order_items unido a
+orders. Usa la copia del producto guardada en cada item (product_sku, product_name),
+por lo que no lee la tabla de productos.
+"""
+
+from datetime import date, datetime, time, timedelta
+from itertools import groupby
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from .models import OrderItem
+
+
+DEFAULT_PICK_STATUS = 'PREPARING'
+
+PICK_LIST_HEADER = ['SKU', 'Producto', 'Región', 'Cantidad', 'Pedidos', 'Total SKU']
+
+
+def pick_list_rows(status_code: str = DEFAULT_PICK_STATUS, date_from: Optional[date] = None,
+                   date_to: Optional[date] = None):
+    """
+    Filas (producto, SKU, región) con unidades y pedidos, ordenadas por SKU.
+
+    El rango de fechas es inclusivo y se aplica sobre created_at del pedido en la
+    zona horaria local.
+    """
+    items = OrderItem.objects.filter(order__status__code=status_code)
+    if date_from:
+        items = items.filter(order__created_at__gte=timezone.make_aware(datetime.combine(date_from, time.min)))
+    if date_to:
+        items = items.filter(order__created_at__lt=timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min)))
+
+    return (
+        items.values('product_id', 'product_sku', 'order__shipping_region_code')
+        .annotate(
+            product_name=Max('product_name'),
+            quantity=Sum('quantity'),
+            orders=Count('order_id', distinct=True),
+        )
+        .order_by('product_sku', 'product_id', 'order__shipping_region_code')
+    )
+
+
+def group_pick_list(rows: Iterable[dict], region_names: dict) -> Iterator[dict]:
+    """Agrupar las filas por producto con el total y el desglose por región."""
+    for (product_id, sku), group in groupby(rows, key=lambda row: (row['product_id'], row['product_sku'])):
+        group = list(group)
+        yield {
+            'product_id': product_id,
+            'sku': sku,
+            'name': group[0]['product_name'],
+            'quantity': sum(row['quantity'] for row in group),
+            # Un pedido tiene una sola región: los conteos por región no se solapan
+            'orders': sum(row['orders'] for row in group),
+            'locations': [
+                {
+                    'region_code': row['order__shipping_region_code'] or None,
+                    'region_name': region_names.get(row['order__shipping_region_code'], 'Sin región'),
+                    'quantity': row['quantity'],
+                    'orders': row['orders'],
+                }
+                for row in group
+            ],
+        }
+
+
+def iter_pick_list_csv_rows(rows, region_names: dict, chunk_size: int = None) -> Iterator[list[list]]:
+    """Lotes de filas CSV (una por SKU y región) leyendo el resultado agrupado por partes."""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    chunk = []
+    for entry in group_pick_list(rows.iterator(chunk_size=chunk_size), region_names):
+        for location in entry['locations']:
+            chunk.append([
+                entry['sku'] or '', entry['name'], location['region_name'],
+                location['quantity'], location['orders'], entry['quantity'],
+            ])
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -1,7 +1,7 @@
 from rest_framework import serializers
 
 from .models import Order, OrderItem, OrderStatus, OrderStatusHistory
-from apps.products.serializers import ProductListSerializer, to_int
+from apps.products.serializers import absolute_image_url, to_int
 
 
 class OrderStatusSerializer(serializers.ModelSerializer):
@@ -11,7 +11,9 @@ class OrderStatusSerializer(serializers.ModelSerializer):
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductListSerializer(read_only=True)
+    """Item tal como se compró: el producto se arma desde la copia guardada en el item
+    (no consulta el catálogo). `unit_price` es el precio final pagado."""
+    product = serializers.SerializerMethodField()
     unit_price = serializers.SerializerMethodField()
     total_price = serializers.SerializerMethodField()
 
@@ -19,6 +21,15 @@ class OrderItemSerializer(serializers.ModelSerializer):
         model = OrderItem
         fields = ('id', 'product', 'quantity', 'unit_price', 'total_price')
 
+    def get_product(self, obj):
+        return {
+            'id': obj.product_id,
+            'name': obj.product_name,
+            'slug': obj.product_slug,
+            'sku': obj.product_sku,
+            'main_image': absolute_image_url(obj.product_image_url, self.context.get('request')),
+        }
+
     def get_unit_price(self, obj):
         return to_int(obj.unit_price)
 
@@ -36,10 +47,10 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = (
             'id', 'status', 'customer_name', 'customer_email', 'customer_phone',
-            'shipping_street', 'shipping_city', 'shipping_region', 'shipping_postal_code',
+            'shipping_street', 'shipping_city', 'shipping_region', 'shipping_region_code', 'shipping_postal_code',
             'total_amount', 'shipping_cost', 'currency', 'created_at', 'updated_at', 'items'
         )
-        read_only_fields = ('id', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'shipping_region_code', 'created_at', 'updated_at')
 
     def get_total_amount(self, obj):
         return to_int(obj.total_amount)
@@ -48,6 +59,34 @@ class OrderSerializer(serializers.ModelSerializer):
         return to_int(obj.shipping_cost)
 
 
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """Resumen para el historial del cliente (sin items anidados).
+
+    Solo lee columnas de `orders` (item_count y thumbnail se fijan al crear el pedido).
+    """
+    status = OrderStatusSerializer(read_only=True)
+    total_amount = serializers.SerializerMethodField()
+    shipping_cost = serializers.SerializerMethodField()
+    item_count = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Order
+        fields = ('id', 'created_at', 'status', 'total_amount', 'shipping_cost', 'item_count', 'thumbnail')
+
+    def get_total_amount(self, obj):
+        return to_int(obj.total_amount)
+
+    def get_shipping_cost(self, obj):
+        return to_int(obj.shipping_cost)
+
+    def get_item_count(self, obj):
+        return obj.item_count or 0
+
+    def get_thumbnail(self, obj):
+        return absolute_image_url(obj.thumbnail, self.context.get('request'))
+
+
 class CreateOrderSerializer(serializers.Serializer):
     customer_name = serializers.CharField(max_length=200)
     customer_email = serializers.EmailField()
@@ -56,6 +95,9 @@ class CreateOrderSerializer(serializers.Serializer):
     shipping_city = serializers.CharField(max_length=100)
     shipping_region = serializers.CharField(max_length=100)
     shipping_postal_code = serializers.CharField(max_length=20, required=False, allow_blank=True)
+    # Guardar la dirección de envío en las direcciones del usuario (no son campos del pedido)
+    save_address = serializers.BooleanField(required=False, default=False)
+    address_label = serializers.CharField(max_length=100, required=False, allow_blank=True)
 
 
 class OrderStatusHistorySerializer(serializers.ModelSerializer):
@@ -70,8 +112,44 @@ class OrderStatusHistorySerializer(serializers.ModelSerializer):
         return obj.changed_by.email if obj.changed_by else None
 
 
+class OrderAdminListSerializer(serializers.ModelSerializer):
+    """Fila del listado de pedidos del panel: solo columnas de orders, estado y usuario (sin items ni historial)"""
+    status = OrderStatusSerializer(read_only=True)
+    user_email = serializers.SerializerMethodField()
+    total_amount = serializers.SerializerMethodField()
+    shipping_cost = serializers.SerializerMethodField()
+    thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Order
+        fields = (
+            'id', 'user', 'user_email', 'status',
+            'customer_name', 'customer_email',
+            'shipping_city', 'shipping_region', 'shipping_region_code',
+            'total_amount', 'shipping_cost', 'currency', 'item_count', 'thumbnail',
+            'created_at', 'updated_at'
+        )
+        read_only_fields = fields
+
+    def get_user_email(self, obj):
+        return obj.user.email if obj.user else None
+
+    def get_total_amount(self, obj):
+        return to_int(obj.total_amount)
+
+    def get_shipping_cost(self, obj):
+        return to_int(obj.shipping_cost)
+
+    def get_thumbnail(self, obj):
+        return absolute_image_url(obj.thumbnail, self.context.get('request'))
+
+
 class OrderAdminSerializer(serializers.ModelSerializer):
-    """Serializer para panel de admin con más detalles"""
+    """Serializer para panel de admin con más detalles.
+
+    Lee items, status_history__status y status_history__changed_by: precargarlos
+    (ver OrderAdminViewSet.get_queryset).
+    """
     status = OrderStatusSerializer(read_only=True)
     status_id = serializers.IntegerField(write_only=True, required=False)
     items = OrderItemSerializer(many=True, read_only=True)
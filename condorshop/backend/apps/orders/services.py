@@ -1,16 +1,33 @@
 """Servicios y utilidades para el dominio de pedidos."""
 
+import logging
 from decimal import Decimal, InvalidOperation
 from typing import Iterable, Optional, Sequence, Set
 
 from django.conf import settings
 from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
 
-from apps.products.models import Product
+from apps.cart.models import Cart
+from apps.cart.services import release_cart_reservations, reserved_quantities
+from apps.products.models import Product, ProductImage, StockMovement
+from apps.products.services import record_movements
 
-from .models import ShippingRule, ShippingZone
+from .models import (
+    AllocationTicket,
+    Order,
+    OrderItem,
+    OrderStatus,
+    OrderStatusHistory,
+)
+from .outbox import enqueue, order_created_events, sales_rollup_event, webhook_event
+from .shipping_index import get_shipping_index
 
 
+logger = logging.getLogger(__name__)
+
 DEFAULT_FREE_SHIPPING_THRESHOLD = Decimal("50000.00")
 DEFAULT_SHIPPING_COST = Decimal("5000.00")
 
@@ -81,38 +98,11 @@ def evaluate_shipping(region: Optional[str], subtotal, cart_items: Optional[Iter
             "applied_rule_id": None,
         }
 
-    # Resolver zona
-    zone = ShippingZone.objects.filter(
-        is_active=True,
-        regions__icontains=region,
-    ).first()
-
-    rules = ShippingRule.objects.filter(is_active=True)
-    if zone:
-        rules = rules.filter(zone__in=[zone, None])
-    else:
-        rules = rules.filter(zone__isnull=True)
-
-    rules = rules.order_by("-priority", "-created_at")
-
+    # Zona y regla se resuelven sobre el índice compilado en memoria (sin SQL)
+    index = get_shipping_index()
+    zone = index.zone_for(region)
     product_ids, category_ids = _extract_product_context(list(cart_items))
-
-    applied_rule = None
-
-    if product_ids:
-        product_rules = rules.filter(rule_type="PRODUCT", product_id__in=product_ids)
-        if product_rules.exists():
-            applied_rule = product_rules.first()
-
-    if not applied_rule and category_ids:
-        category_rules = rules.filter(rule_type="CATEGORY", category_id__in=category_ids)
-        if category_rules.exists():
-            applied_rule = category_rules.first()
-
-    if not applied_rule:
-        all_rules = rules.filter(rule_type="ALL")
-        if all_rules.exists():
-            applied_rule = all_rules.first()
+    applied_rule = index.match_rule(zone, product_ids, category_ids)
 
     if applied_rule:
         threshold = applied_rule.free_shipping_threshold
@@ -140,10 +130,357 @@ def evaluate_shipping(region: Optional[str], subtotal, cart_items: Optional[Iter
     }
 
 
+class InsufficientStockError(Exception):
+    """Stock insuficiente para un item del carrito al crear el pedido."""
+
+    def __init__(self, product, available, required):
+        self.product = product
+        self.available = max(available, 0)
+        self.required = required
+        super().__init__(f"Stock insuficiente para {product.name}")
+
+
+class EmptyCartError(Exception):
+    """El carrito no tiene items."""
+
+
+def _quantity_case(quantities: dict) -> Case:
+    """CASE id WHEN ... THEN cantidad, para descontar stock de varios productos en un UPDATE."""
+    return Case(
+        *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        default=Value(0),
+    )
+
+
+def main_image_urls(product_ids: Iterable[int]) -> dict[int, str]:
+    """URL de la imagen principal (menor position) de cada producto, en una sola consulta."""
+    urls: dict[int, str] = {}
+    rows = (
+        ProductImage.objects.filter(product_id__in=list(product_ids))
+        .order_by("product_id", "position", "id")
+        .values_list("product_id", "url")
+    )
+    for product_id, url in rows:
+        urls.setdefault(product_id, url)
+    return urls
+
+
+def snapshot_item(item: OrderItem, product: Product, image_url: Optional[str]) -> OrderItem:
+    """Copiar al item los datos del producto tal como estaban al momento de la compra."""
+    item.product_name = product.name
+    item.product_sku = product.sku
+    item.product_slug = product.slug
+    item.product_image_url = image_url
+    item.product_category_id = product.category_id
+    return item
+
+
+def order_thumbnail(items: Sequence[OrderItem]) -> Optional[str]:
+    """Miniatura del pedido: la imagen del primer item que tenga una."""
+    return next((item.product_image_url for item in items if item.product_image_url), None)
+
+
+def backfill_order_snapshots(order_ids: Sequence[int]) -> int:
+    """
+    Completar la copia del producto en los items y el resumen (item_count, thumbnail)
+    de los pedidos indicados, creados antes de guardar esa información.
+
+    Usa una consulta por tabla para todo el lote; los items que ya tienen copia se
+    respetan (conservan los datos del momento de la compra). Retorna los pedidos actualizados.
+    """
+    with transaction.atomic():
+        orders = list(Order.objects.filter(id__in=order_ids).order_by("id"))
+        items = list(OrderItem.objects.filter(order_id__in=order_ids).select_related("product").order_by("id"))
+        image_urls = main_image_urls({item.product_id for item in items})
+
+        items_by_order: dict[int, list[OrderItem]] = {}
+        missing = []
+        for item in items:
+            if not item.product_name:
+                snapshot_item(item, item.product, image_urls.get(item.product_id))
+                missing.append(item)
+            items_by_order.setdefault(item.order_id, []).append(item)
+
+        OrderItem.objects.bulk_update(
+            missing, ["product_name", "product_sku", "product_slug", "product_image_url", "product_category_id"]
+        )
+
+        for order in orders:
+            order_items = items_by_order.get(order.id, [])
+            order.item_count = sum(item.quantity for item in order_items)
+            order.thumbnail = order_thumbnail(order_items)
+        # bulk_update no modifica updated_at: el pedido no aparece como editado
+        Order.objects.bulk_update(orders, ["item_count", "thumbnail"])
+
+    return len(orders)
+
+
+CART_PROBLEM_INACTIVE = "INACTIVE"
+CART_PROBLEM_OUT_OF_STOCK = "OUT_OF_STOCK"
+CART_PROBLEM_INSUFFICIENT_STOCK = "INSUFFICIENT_STOCK"
+CART_PROBLEM_PRICE_CHANGED = "PRICE_CHANGED"
+
+
+def validate_cart(cart, region: Optional[str] = None) -> dict:
+    """
+    Revisar el carrito antes del checkout, sin bloqueos ni escrituras.
+
+    Usa la misma regla de disponibilidad que place_order (stock_qty - reservas
+    vigentes de otros carritos) con tres consultas en total: items del carrito,
+    productos (id__in) y reservas. Retorna los problemas por línea (producto
+    inactivo, sin stock, stock insuficiente, precio distinto al del carrito) y los
+    totales recalculados con el final_price vigente de los productos activos.
+    Es una revisión previa: create_order vuelve a validar con las filas bloqueadas.
+    """
+    cart_items = list(cart.items.all())
+    products = Product.objects.filter(id__in={item.product_id for item in cart_items}).in_bulk()
+    reserved = reserved_quantities(list(products), exclude_cart_id=cart.id)
+
+    lines = []
+    priced_items = []
+    for item in cart_items:
+        product = products[item.product_id]
+        item.product = product  # Evita cargas perezosas al evaluar el envío
+        final_price = product.final_price
+        available = max(product.stock_qty - reserved.get(product.id, 0), 0) if product.active else 0
+
+        problems = []
+        if not product.active:
+            problems.append(CART_PROBLEM_INACTIVE)
+        elif available == 0:
+            problems.append(CART_PROBLEM_OUT_OF_STOCK)
+        elif available < item.quantity:
+            problems.append(CART_PROBLEM_INSUFFICIENT_STOCK)
+        if product.active and item.unit_price != final_price:
+            problems.append(CART_PROBLEM_PRICE_CHANGED)
+        if product.active:
+            priced_items.append(item)
+
+        lines.append({
+            "product_id": product.id,
+            "name": product.name,
+            "quantity": item.quantity,
+            "unit_price": item.unit_price,
+            "final_price": final_price,
+            "available": available,
+            "problems": problems,
+        })
+
+    subtotal = sum((item.quantity * item.product.final_price for item in priced_items), Decimal("0"))
+    shipping = evaluate_shipping(region, subtotal, priced_items)
+    return {
+        "valid": bool(lines) and not any(line["problems"] for line in lines),
+        "items": lines,
+        "subtotal": subtotal,
+        "shipping_cost": shipping["cost"],
+        "total": subtotal + shipping["cost"],
+    }
+
+
+def place_order(cart, order_data: dict, user=None) -> Order:
+    """
+    Crear un pedido desde el carrito con un número de consultas independiente de su tamaño.
+
+    - Bloquea todos los productos en una sola consulta ordenada por id (sin deadlocks
+      entre checkouts concurrentes que comparten productos).
+    - Crea los items con bulk_create.
+    - Descuenta stock con un UPDATE de conjunto protegido por `stock_qty >= cantidad` y
+      registra las ventas en el historial de movimientos con un bulk_create.
+    - Guarda en cada item una copia del producto (nombre, SKU, slug, imagen) y en el
+      pedido el total de unidades y la miniatura, para leerlo sin tocar el catálogo.
+    - Registra en el outbox la suma a los rollups diarios de ventas (apps.analytics) y el
+      webhook `order.created` (si ORDER_WEBHOOK_URL está configurado). El rollup no se
+      actualiza aquí: la fila (día, región, PENDING) es la misma para todos los checkouts
+      y su bloqueo los serializaría hasta el commit.
+
+    Lanza EmptyCartError o InsufficientStockError; en ese caso no queda nada escrito.
+    """
+    with transaction.atomic():
+        cart_items = list(cart.items.all())
+        if not cart_items:
+            raise EmptyCartError("El carrito está vacío")
+
+        quantities = {item.product_id: item.quantity for item in cart_items}
+        products = {
+            product.id: product
+            for product in Product.objects.select_for_update().filter(id__in=quantities).order_by("id")
+        }
+        # Unidades retenidas por reservas vigentes de otros carritos
+        reserved = reserved_quantities(list(quantities), exclude_cart_id=cart.id)
+
+        for item in cart_items:
+            product = products[item.product_id]
+            item.product = product  # Evita cargas perezosas al evaluar el envío
+            available = product.stock_qty - reserved.get(product.id, 0)
+            if available < item.quantity:
+                raise InsufficientStockError(product, available, item.quantity)
+
+        subtotal = sum((item.quantity * item.unit_price for item in cart_items), Decimal("0"))
+        shipping = evaluate_shipping(order_data.get("shipping_region", ""), subtotal, cart_items)
+        shipping_cost = shipping["cost"]
+
+        image_urls = main_image_urls(quantities)
+        order_items = [
+            snapshot_item(
+                OrderItem(
+                    product=item.product,
+                    quantity=item.quantity,
+                    unit_price=item.unit_price,
+                    total_price=item.quantity * item.unit_price,
+                ),
+                item.product,
+                image_urls.get(item.product_id),
+            )
+            for item in cart_items
+        ]
+
+        pending_status = OrderStatus.objects.get(code="PENDING")
+        order = Order.objects.create(
+            user=user,
+            status=pending_status,
+            total_amount=subtotal + shipping_cost,
+            shipping_cost=shipping_cost,
+            item_count=sum(quantities.values()),
+            thumbnail=order_thumbnail(order_items),
+            **order_data
+        )
+
+        for order_item in order_items:
+            order_item.order = order
+        OrderItem.objects.bulk_create(order_items)
+
+        # Las filas ya están bloqueadas; la condición protege igualmente contra stock negativo
+        case = _quantity_case(quantities)
+        updated = Product.objects.filter(id__in=quantities, stock_qty__gte=case).update(
+            stock_qty=F("stock_qty") - case,
+            updated_at=timezone.now(),
+        )
+        if updated != len(quantities):
+            current = dict(Product.objects.filter(id__in=quantities).values_list("id", "stock_qty"))
+            product_id = next(
+                (pid for pid, quantity in quantities.items() if current.get(pid, 0) < quantity),
+                next(iter(quantities)),
+            )
+            raise InsufficientStockError(products[product_id], current.get(product_id, 0), quantities[product_id])
+        record_movements([
+            StockMovement(product_id=product_id, kind=StockMovement.KIND_SALE, quantity=-quantity, order=order, created_by=user)
+            for product_id, quantity in quantities.items()
+        ])
+
+        OrderStatusHistory.objects.create(
+            order=order,
+            status=pending_status,
+            changed_by=user,
+            note="Orden creada"
+        )
+
+        Cart.objects.filter(id=cart.id).update(is_active=False, updated_at=timezone.now())
+        cart.is_active = False
+        release_cart_reservations(cart)
+
+        enqueue([
+            sales_rollup_event(order),
+            webhook_event(order, "order.created", status=pending_status.code, total_amount=int(order.total_amount)),
+        ])
+
+    return order
+
+
+def queued_product_id(cart) -> Optional[int]:
+    """Id del primer producto del carrito en modo de asignación en cola, o None."""
+    return (
+        cart.items.filter(product__queued_allocation=True)
+        .order_by("product_id")
+        .values_list("product_id", flat=True)
+        .first()
+    )
+
+
+def enqueue_allocation(cart, product_id: int, order_data: dict, user=None) -> AllocationTicket:
+    """
+    Encolar el checkout del carrito en la cola del producto `product_id`.
+
+    No bloquea productos: el request responde de inmediato y el worker de ese
+    producto (run_allocator) crea el pedido. Reintentos del mismo carrito
+    reutilizan el ticket que sigue en cola. `order_data` puede incluir además
+    `save_address`, `address_label` e `ip_address` para los eventos del pedido.
+    """
+    ticket = AllocationTicket.objects.filter(cart=cart, status=AllocationTicket.STATUS_QUEUED).first()
+    if ticket:
+        return ticket
+
+    return AllocationTicket.objects.create(
+        cart=cart,
+        product_id=product_id,
+        user=user,
+        order_data=order_data,
+    )
+
+
+def allocate_queued_orders(product_id: int, batch_size: int = 100) -> tuple[int, int]:
+    """
+    Procesar un lote de tickets en cola de `product_id` en una sola transacción.
+
+    Un único worker por producto toma el bloqueo de la fila una vez por lote y crea
+    los pedidos en orden de llegada; cada ticket usa un savepoint, por lo que un ticket
+    sin stock, o cuyo pedido falla por cualquier otro error, se rechaza sin afectar al
+    resto ni dejar la cola detenida. La auditoría y la dirección guardada se registran en
+    el outbox dentro del mismo savepoint que el pedido. Retorna (asignados, rechazados).
+    """
+    granted = rejected = 0
+
+    with transaction.atomic():
+        tickets = list(
+            AllocationTicket.objects.select_related("cart", "user")
+            .filter(product_id=product_id, status=AllocationTicket.STATUS_QUEUED)
+            .order_by("id")[:batch_size]
+        )
+        if not tickets:
+            return 0, 0
+
+        # Bloqueo del producto caliente una sola vez para todo el lote
+        list(Product.objects.select_for_update().filter(id=product_id))
+
+        now = timezone.now()
+        for ticket in tickets:
+            ticket.processed_at = now
+            if not ticket.cart.is_active:
+                ticket.status = AllocationTicket.STATUS_REJECTED
+                ticket.error = "El carrito ya no está activo"
+                rejected += 1
+                continue
+            order_data = dict(ticket.order_data)
+            save_address = order_data.pop("save_address", False)
+            address_label = order_data.pop("address_label", "")
+            ip_address = order_data.pop("ip_address", None)
+            try:
+                with transaction.atomic():
+                    order = place_order(ticket.cart, order_data, user=ticket.user)
+                    enqueue(order_created_events(order, ticket.user, save_address, address_label, ip_address))
+            except (EmptyCartError, InsufficientStockError) as exc:
+                ticket.status = AllocationTicket.STATUS_REJECTED
+                ticket.error = str(exc)[:255]
+                rejected += 1
+            except Exception:
+                # Un ticket defectuoso no debe bloquear la cola: se rechaza y el lote continúa
+                logger.exception("Ticket %s: error inesperado al crear el pedido", ticket.id)
+                ticket.status = AllocationTicket.STATUS_REJECTED
+                ticket.error = "No se pudo crear el pedido"
+                rejected += 1
+            else:
+                ticket.order = order
+                ticket.status = AllocationTicket.STATUS_GRANTED
+                granted += 1
+
+        AllocationTicket.objects.bulk_update(tickets, ["status", "order", "error", "processed_at"])
+
+    return granted, rejected
+
+
 def send_order_confirmation_email(order):
     """
-    Prepara el envío de email de confirmación de pedido
-    Se completará cuando se integre Webpay
+    Enviar el email de confirmación del pedido. Lo ejecuta el worker del outbox
+    (python manage.py run_outbox) al aprobarse el pago; un error se reintenta.
     """
     subject = f'Confirmación de pedido #{order.id} - CondorShop'
     message = f"""
@@ -159,15 +496,12 @@ def send_order_confirmation_email(order):
     CondorShop
     """
 
-    # Por ahora solo prepara el email, no lo envía
-    # Se implementará cuando se integre Webpay
-    # send_mail(
-    #     subject=subject,
-    #     message=message,
-    #     from_email=settings.DEFAULT_FROM_EMAIL,
-    #     recipient_list=[order.customer_email],
-    #     fail_silently=False,
-    # )
-
+    send_mail(
+        subject=subject,
+        message=message,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[order.customer_email],
+        fail_silently=False,
+    )
     return True
 
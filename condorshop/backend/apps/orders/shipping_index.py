@@ -0,0 +1,142 @@
+"""
+Índice en memoria de zonas y reglas de envío.
+
+Las zonas y reglas activas se compilan una vez por proceso en diccionarios
+(código de región → zona, (zona, producto) / (zona, categoría) / zona → mejor
+regla), de modo que cotizar un envío no consulta zonas ni reglas. El índice se
+reconstruye solo cuando cambia la versión guardada en la caché compartida, que se
+renueva al guardar o eliminar una zona, sus regiones o una regla (ver signals.py y
+condorshop_api.process_cache).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from apps.locations.services import normalize_name, resolve_region_code
+
+from condorshop_api.process_cache import VersionedProcessCache
+
+from .models import ShippingRule, ShippingZone, ShippingZoneRegion
+
+
+SHIPPING_INDEX_VERSION_KEY = 'shipping_index_version'
+
+
+@dataclass(frozen=True)
+class CompiledZone:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    id: int
+    rule_type: str
+    base_cost: Decimal
+    free_shipping_threshold: Optional[Decimal]
+    # Orden equivalente a order_by('-priority', '-created_at'): menor = preferida
+    sort_key: tuple
+
+
+def _sort_key(priority: int, created_at: Optional[datetime]) -> tuple:
+    timestamp = created_at.timestamp() if created_at else 0.0
+    return (-priority, -timestamp)
+
+
+def _keep_best(mapping: dict, key, rule: CompiledRule) -> None:
+    current = mapping.get(key)
+    if current is None or rule.sort_key < current.sort_key:
+        mapping[key] = rule
+
+
+class ShippingIndex:
+    """Zonas y reglas activas compiladas en diccionarios de búsqueda directa."""
+
+    def __init__(
+        self,
+        zones: Iterable[ShippingZone],
+        rules: Iterable[ShippingRule],
+        region_links: Iterable[tuple] = (),
+    ):
+        compiled_zones = {zone.id: CompiledZone(id=zone.id, name=zone.name) for zone in zones}
+
+        # Zonas vinculadas a regiones canónicas (shipping_zone_regions)
+        self.region_code_to_zone: dict[str, CompiledZone] = {}
+        for region_code, zone_id in region_links:
+            if zone_id in compiled_zones:
+                self.region_code_to_zone.setdefault(region_code, compiled_zones[zone_id])
+
+        # Respaldo: nombres de texto de la lista `regions` (zonas sin regiones vinculadas)
+        self.region_to_zone: dict[str, CompiledZone] = {}
+        for zone in zones:
+            for region in zone.regions or []:
+                # Zonas ordenadas por id: ante regiones repetidas gana la primera
+                self.region_to_zone.setdefault(normalize_name(region), compiled_zones[zone.id])
+
+        # Llaves con zone_id=None = reglas que aplican a todas las zonas
+        self.product_rules: dict[tuple, CompiledRule] = {}
+        self.category_rules: dict[tuple, CompiledRule] = {}
+        self.all_rules: dict[Optional[int], CompiledRule] = {}
+
+        for rule in rules:
+            compiled_rule = CompiledRule(
+                id=rule.id,
+                rule_type=rule.rule_type,
+                base_cost=rule.base_cost,
+                free_shipping_threshold=rule.free_shipping_threshold,
+                sort_key=_sort_key(rule.priority, rule.created_at),
+            )
+            if rule.rule_type == 'PRODUCT' and rule.product_id:
+                _keep_best(self.product_rules, (rule.zone_id, rule.product_id), compiled_rule)
+            elif rule.rule_type == 'CATEGORY' and rule.category_id:
+                _keep_best(self.category_rules, (rule.zone_id, rule.category_id), compiled_rule)
+            elif rule.rule_type == 'ALL':
+                _keep_best(self.all_rules, rule.zone_id, compiled_rule)
+
+    @classmethod
+    def build(cls) -> 'ShippingIndex':
+        zones = list(ShippingZone.objects.filter(is_active=True).order_by('id'))
+        rules = ShippingRule.objects.filter(is_active=True)
+        region_links = ShippingZoneRegion.objects.order_by('zone_id').values_list('region__code', 'zone_id')
+        return cls(zones, rules, region_links)
+
+    def zone_for(self, region: Optional[str]) -> Optional[CompiledZone]:
+        region_code = resolve_region_code(region)
+        if region_code and region_code in self.region_code_to_zone:
+            return self.region_code_to_zone[region_code]
+        return self.region_to_zone.get(normalize_name(region))
+
+    def match_rule(self, zone: Optional[CompiledZone], product_ids, category_ids) -> Optional[CompiledRule]:
+        """Regla aplicable con precedencia PRODUCT > CATEGORY > ALL y luego prioridad."""
+        zone_ids = (zone.id, None) if zone else (None,)
+
+        for mapping, keys in (
+            (self.product_rules, product_ids),
+            (self.category_rules, category_ids),
+        ):
+            best = None
+            for zone_id in zone_ids:
+                for key in keys:
+                    rule = mapping.get((zone_id, key))
+                    if rule is not None and (best is None or rule.sort_key < best.sort_key):
+                        best = rule
+            if best is not None:
+                return best
+
+        candidates = [self.all_rules[zone_id] for zone_id in zone_ids if zone_id in self.all_rules]
+        return min(candidates, key=lambda rule: rule.sort_key) if candidates else None
+
+
+_shipping_index = VersionedProcessCache(SHIPPING_INDEX_VERSION_KEY, ShippingIndex.build)
+
+
+def bump_version() -> None:
+    """Invalidar el índice en todos los procesos (se llama al cambiar zonas o reglas)."""
+    _shipping_index.bump_version()
+
+
+def get_shipping_index() -> ShippingIndex:
+    """Índice vigente del proceso; se reconstruye solo si cambió la versión."""
+    return _shipping_index.get()
@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ShippingRule, ShippingZone, ShippingZoneRegion
+from .shipping_index import bump_version
+
+
+@receiver(post_save, sender=ShippingZone)
+@receiver(post_delete, sender=ShippingZone)
+@receiver(post_save, sender=ShippingRule)
+@receiver(post_delete, sender=ShippingRule)
+@receiver(post_save, sender=ShippingZoneRegion)
+@receiver(post_delete, sender=ShippingZoneRegion)
+def invalidate_shipping_index(sender, **kwargs):
+    """Renovar la versión del índice de envíos al cambiar una zona, sus regiones o una regla."""
+    bump_version()
+    # Otra vez al confirmar: un proceso pudo recompilar antes del commit con datos viejos
+    transaction.on_commit(bump_version)
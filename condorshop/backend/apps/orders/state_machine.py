@@ -0,0 +1,146 @@
+"""
+Máquina de estados de los pedidos.
+
+Define las transiciones permitidas y aplica un cambio de estado a uno o varios
+pedidos con un número de consultas independiente de su cantidad: un SELECT con
+bloqueo, un UPDATE, un bulk_create del historial, un bulk_create en el outbox (traslado
+de los rollups de ventas al estado nuevo y, con ORDER_WEBHOOK_URL configurado, los
+webhooks `order.status_changed`) y, al cancelar, la devolución de stock con un único
+UPDATE por conjunto y un bulk_create de sus movimientos. Los rollups los actualiza el
+worker del outbox: aprobar un pago no escribe en la fila compartida (día, región, estado).
+"""
+
+from typing import Optional, Sequence
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.products.models import StockMovement
+from apps.products.services import apply_movements
+
+from .models import Order, OrderItem, OrderStatus, OrderStatusHistory
+from .outbox import enqueue, sales_rollup_event, webhook_event
+
+
+TRANSITIONS = {
+    'PENDING': ('PAID', 'FAILED', 'PREPARING', 'CANCELLED'),
+    # Un pago rechazado se puede reintentar
+    'FAILED': ('PAID', 'CANCELLED'),
+    'PAID': ('PREPARING',),
+    'PREPARING': ('SHIPPED',),
+    'SHIPPED': ('DELIVERED',),
+}
+
+# Transiciones que solo se aplican al anular el pago (payments.refund_order_payment):
+# cancelar un pedido pagado sin reembolsarlo devolvería el stock y retendría el dinero
+REFUND_TRANSITIONS = {
+    'PAID': ('CANCELLED',),
+}
+
+# Estados a los que se llega devolviendo al inventario las unidades del pedido
+RESTOCK_STATUSES = ('CANCELLED',)
+
+
+def can_transition(current_code: str, new_code: str, refunded: bool = False) -> bool:
+    if refunded and new_code in REFUND_TRANSITIONS.get(current_code, ()):
+        return True
+    return new_code in TRANSITIONS.get(current_code, ())
+
+
+def transition_error(current_code: str, new_code: str) -> str:
+    if new_code in REFUND_TRANSITIONS.get(current_code, ()):
+        return f'Un pedido {current_code} solo pasa a {new_code} reembolsando su pago'
+    if current_code in TRANSITIONS:
+        return f'Transición inválida: {current_code} -> {new_code}'
+    return f'Transición no permitida desde {current_code}'
+
+
+class OrdersNotFoundError(Exception):
+    def __init__(self, order_ids):
+        self.order_ids = sorted(order_ids)
+        super().__init__(f"Pedidos no encontrados: {self.order_ids}")
+
+
+class InvalidTransitionError(Exception):
+    """Uno o más pedidos no pueden pasar al estado pedido; no se modifica ninguno."""
+
+    def __init__(self, invalid: list[tuple[int, str]], new_code: str):
+        self.invalid = invalid
+        self.new_code = new_code
+        super().__init__(transition_error(invalid[0][1], new_code))
+
+
+def _restock(items: Sequence[OrderItem], user=None) -> None:
+    """Devolver las unidades al stock, con un movimiento por pedido y producto."""
+    quantities = {}
+    for item in items:
+        key = (item.order_id, item.product_id)
+        quantities[key] = quantities.get(key, 0) + item.quantity
+    apply_movements([
+        StockMovement(
+            product_id=product_id,
+            kind=StockMovement.KIND_CANCELLATION,
+            quantity=quantity,
+            order_id=order_id,
+            created_by=user,
+        )
+        for (order_id, product_id), quantity in sorted(quantities.items())
+    ])
+
+
+def transition_orders(order_ids: Sequence[int], new_status: OrderStatus, user=None, note: Optional[str] = None,
+                      refunded: bool = False) -> list[Order]:
+    """
+    Cambiar el estado de todos los pedidos o de ninguno.
+
+    Lanza OrdersNotFoundError si falta algún id e InvalidTransitionError si alguna
+    transición no está permitida. `refunded` habilita REFUND_TRANSITIONS; solo lo usa
+    refund_order_payment. Retorna los pedidos con el estado nuevo.
+    """
+    order_ids = sorted(set(order_ids))
+    status_codes = dict(OrderStatus.objects.values_list('id', 'code'))
+
+    with transaction.atomic():
+        orders = list(Order.objects.select_for_update().filter(id__in=order_ids).order_by('id'))
+        missing = set(order_ids) - {order.id for order in orders}
+        if missing:
+            raise OrdersNotFoundError(missing)
+
+        old_codes = {order.id: status_codes[order.status_id] for order in orders}
+        invalid = [
+            (order.id, old_codes[order.id])
+            for order in orders
+            if not can_transition(old_codes[order.id], new_status.code, refunded=refunded)
+        ]
+        if invalid:
+            raise InvalidTransitionError(invalid, new_status.code)
+
+        now = timezone.now()
+        Order.objects.filter(id__in=order_ids).update(status=new_status, updated_at=now)
+
+        OrderStatusHistory.objects.bulk_create([
+            OrderStatusHistory(
+                order=order,
+                status=new_status,
+                changed_by=user,
+                note=note or f'Cambio de {old_codes[order.id]} a {new_status.code}',
+            )
+            for order in orders
+        ])
+
+        if new_status.code in RESTOCK_STATUSES:
+            items = list(OrderItem.objects.filter(order_id__in=order_ids).only('order_id', 'product_id', 'quantity'))
+            _restock(items, user=user)
+
+        enqueue(
+            [sales_rollup_event(order, new_status.code, previous_status=old_codes[order.id]) for order in orders]
+            + [
+                webhook_event(order, 'order.status_changed', previous_status=old_codes[order.id], status=new_status.code)
+                for order in orders
+            ]
+        )
+
+    for order in orders:
+        order.status = new_status
+        order.updated_at = now
+    return orders
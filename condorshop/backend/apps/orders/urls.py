@@ -4,8 +4,14 @@ from . import views
 urlpatterns = [
     # Checkout endpoints
     path('mode', views.checkout_mode, name='checkout_mode'),
+    path('bootstrap', views.checkout_bootstrap, name='checkout_bootstrap'),
     path('shipping-quote', views.shipping_quote, name='shipping_quote'),
+    path('reserve', views.reserve_stock, name='reserve_stock'),
+    path('validate', views.validate_checkout_cart, name='validate_checkout_cart'),
     path('create', views.create_order, name='create_order'),
+    path('allocation/<uuid:token>', views.allocation_status, name='allocation_status'),
+    path('webpay/create', views.webpay_create, name='webpay_create'),
+    path('webpay/return', views.webpay_return, name='webpay_return'),
     # Order history endpoints (for authenticated users)
     path('', views.list_user_orders, name='list_user_orders'),
     path('<int:order_id>/', views.get_order_detail, name='get_order_detail'),
@@ -1,14 +1,46 @@
+from decimal import Decimal
+from types import SimpleNamespace
+from urllib.parse import urlencode
+
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticatedOrReadOnly, IsAuthenticated
 from rest_framework.response import Response
+from django.conf import settings
 from django.db import transaction
+from django.http import HttpResponseRedirect
+from django.db.models import Prefetch, prefetch_related_objects
 from django_ratelimit.decorators import ratelimit
-from .models import Order, OrderItem, OrderStatus
-from .serializers import OrderSerializer, CreateOrderSerializer
-from .services import evaluate_shipping, send_order_confirmation_email
-from apps.cart.models import Cart
+from .idempotency import idempotent
+from .models import AllocationTicket, Order
+from .outbox import enqueue, order_created_events
+from .pagination import OrderHistoryPagination
+from .payments import (
+    RESULT_REJECTED,
+    PaymentError,
+    check_payment_token,
+    commit_webpay_return,
+    order_payment_token,
+    start_webpay_payment,
+    transaction_result,
+)
+from .serializers import OrderSerializer, OrderSummarySerializer, CreateOrderSerializer
+from .webpay import WebpayError
+from .services import (
+    EmptyCartError,
+    InsufficientStockError,
+    enqueue_allocation,
+    evaluate_shipping,
+    place_order,
+    queued_product_id,
+    validate_cart,
+)
+from apps.cart.models import Cart, CartItem
+from apps.cart.serializers import CartSerializer
+from apps.cart.services import reprice_cart_items, reserve_cart_stock
 from apps.products.models import Product
+from apps.users.models import Address
+from apps.users.serializers import AddressSerializer
 
 
 def calculate_shipping_cost(subtotal, region=None, cart_items=None):
@@ -30,6 +62,44 @@ def get_shipping_quote(region, subtotal, cart_items):
     }
 
 
+def get_checkout_cart(request):
+    """
+    Obtener el carrito activo del checkout (usuario autenticado o header X-Session-Token).
+    Retorna (cart, None) o (None, Response de error).
+    """
+    if request.user.is_authenticated:
+        try:
+            return Cart.objects.get(user=request.user, is_active=True), None
+        except Cart.DoesNotExist:
+            return None, Response(
+                {'error': 'Carrito no encontrado'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+    session_token = request.headers.get('X-Session-Token')
+    if not session_token:
+        return None, Response(
+            {'error': 'Token de sesión requerido'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        return Cart.objects.get(session_token=session_token, is_active=True), None
+    except Cart.DoesNotExist:
+        return None, Response(
+            {'error': 'Carrito no encontrado'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+
+def _client_ip(request):
+    forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    return forwarded_for.split(',')[0].strip() if forwarded_for else request.META.get('REMOTE_ADDR')
+
+
+MAX_QUOTE_REGIONS = 32
+
+
+@transaction.non_atomic_requests
 @api_view(['POST'])
 @permission_classes([AllowAny])
 @ratelimit(key='ip', rate='20/m', method='POST')
@@ -38,42 +108,80 @@ def shipping_quote(request):
     Obtener cotización de envío
     POST /api/checkout/shipping-quote
     Body: { "region": "...", "cart_items": [{ "product_id": 1, "quantity": 2 }] }
+    Multi-región: { "regions": ["...", "..."], "cart_items": [...] } → { "quotes": [...] }
     """
     region = request.data.get('region')
+    regions = request.data.get('regions')
     cart_items_data = request.data.get('cart_items', [])
     subtotal = request.data.get('subtotal', 0)
-    
-    if not region:
+
+    if regions is not None:
+        if (
+            not isinstance(regions, list)
+            or not regions
+            or len(regions) > MAX_QUOTE_REGIONS
+            or not all(isinstance(value, str) and value for value in regions)
+        ):
+            return Response(
+                {'error': f'regions debe ser una lista de 1 a {MAX_QUOTE_REGIONS} regiones'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    elif not region:
         return Response(
             {'error': 'La región es requerida'},
             status=status.HTTP_400_BAD_REQUEST
         )
-    
-    # Build item list for shipping calculation
-    items_for_calc = []
-    for item_data in cart_items_data:
-        product_id = item_data.get('product_id')
-        if not product_id:
+
+    # Cantidades por producto (los ids repetidos se suman)
+    quantities = {}
+    for item_data in cart_items_data if isinstance(cart_items_data, list) else []:
+        if not isinstance(item_data, dict) or not item_data.get('product_id'):
             continue
-        
         try:
-            product = Product.objects.select_related('category').get(id=product_id)
-            items_for_calc.append(type('Item', (), {
-                'product_id': product_id,
-                'product': product,
-            })())
-        except Product.DoesNotExist:
+            product_id = int(item_data['product_id'])
+            quantity = int(item_data.get('quantity', 1))
+        except (TypeError, ValueError):
             continue
-    
-    # Calculate subtotal if not provided
+        quantities[product_id] = quantities.get(product_id, 0) + max(quantity, 1)
+
+    # Un único SELECT para todos los productos del carrito
+    products = Product.objects.filter(id__in=quantities) if quantities else []
+    items_for_calc = [
+        SimpleNamespace(product_id=product.id, product=product, quantity=quantities[product.id])
+        for product in products
+    ]
+
+    # Calcular subtotal con el precio vigente si no se envió
     if not subtotal and items_for_calc:
-        subtotal = sum(
-            item.product.price * item_data.get('quantity', 1)
-            for item, item_data in zip(items_for_calc, cart_items_data)
-        )
-    
-    quote = get_shipping_quote(region, subtotal, items_for_calc)
-    return Response(quote)
+        subtotal = sum(item.product.final_price * item.quantity for item in items_for_calc)
+
+    if regions is None:
+        return Response(get_shipping_quote(region, subtotal, items_for_calc))
+
+    # Cotizaciones sobre el índice de envíos en memoria: sin consultas adicionales por región
+    return Response({
+        'quotes': [
+            {'region': value, **get_shipping_quote(value, subtotal, items_for_calc)}
+            for value in regions
+        ]
+    })
+
+
+def _checkout_mode_data(user, addresses):
+    """Datos del modo de checkout compartidos por checkout_mode y checkout_bootstrap."""
+    return {
+        'is_authenticated': user is not None,
+        # Campos de dirección heredados del usuario
+        'has_address': bool(user and user.street and user.city and user.region),
+        'saved_addresses': AddressSerializer(addresses, many=True).data,
+        'user_email': user.email if user else None,
+    }
+
+
+def _saved_addresses(user):
+    if user is None:
+        return []
+    return list(Address.objects.filter(user=user).order_by('-is_default', '-created_at'))
 
 
 @api_view(['GET'])
@@ -85,195 +193,309 @@ def checkout_mode(request):
     Retorna información sobre direcciones guardadas del usuario
     """
     user = request.user if request.user.is_authenticated else None
-    has_address = False
-    saved_addresses = []
-    
+    return Response(_checkout_mode_data(user, _saved_addresses(user)))
+
+
+@transaction.non_atomic_requests
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def checkout_bootstrap(request):
+    """
+    Datos iniciales de la página de checkout en una sola llamada
+    GET /api/checkout/bootstrap?region=...
+    Reúne checkout_mode, el carrito con precios vigentes (GET /api/cart/) y la cotización
+    de envío para `region` o, si no se indica, la región de la dirección predeterminada.
+    Número fijo de consultas: carrito, items con producto y categoría, imágenes y direcciones.
+    """
+    user = request.user if request.user.is_authenticated else None
+    addresses = _saved_addresses(user)
+    default_address = next((address for address in addresses if address.is_default), None)
+
+    carts = Cart.objects.filter(is_active=True).prefetch_related(
+        Prefetch('items', queryset=CartItem.objects.select_related('product__category')),
+        'items__product__images',
+    )
+    session_token = request.headers.get('X-Session-Token')
     if user:
-    # Check legacy address fields
-        has_address = bool(user.street and user.city and user.region)
-        
-        # Load saved addresses
-        try:
-            from apps.users.models import Address
-            addresses = Address.objects.filter(user=user).order_by('-is_default', '-created_at')
-            from apps.users.serializers import AddressSerializer
-            saved_addresses = AddressSerializer(addresses, many=True).data
-        except Exception:
-            pass  # best-effort if the Address model is unavailable
-    
+        cart = carts.filter(user=user).first()
+    else:
+        cart = carts.filter(session_token=session_token).first() if session_token else None
+
+    region = request.query_params.get('region') or (default_address.region if default_address else None)
+    if region is None and user:
+        region = user.region
+    quote = None
+    if cart is not None:
+        items = cart.items.all()
+        reprice_cart_items(items)
+        if region:
+            subtotal = sum((item.subtotal for item in items), Decimal('0'))
+            quote = {'region': region, **get_shipping_quote(region, subtotal, items)}
+
     return Response({
-        'is_authenticated': user is not None,
-        'has_address': has_address,
-        'saved_addresses': saved_addresses,
-        'user_email': user.email if user else None
+        **_checkout_mode_data(user, addresses),
+        'default_address': AddressSerializer(default_address).data if default_address else None,
+        'cart': CartSerializer(cart).data if cart is not None else None,
+        'shipping_quote': quote,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@ratelimit(key='ip', rate='20/m', method='POST')
+def reserve_stock(request):
+    """
+    Reservar stock del carrito al iniciar el checkout
+    POST /api/checkout/reserve
+    Retiene las unidades por STOCK_RESERVATION_MINUTES; create_order las respeta.
+    """
+    cart, error_response = get_checkout_cart(request)
+    if error_response:
+        return error_response
+
+    if not cart.items.exists():
+        return Response(
+            {'error': 'El carrito está vacío'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    expires_at, shortages = reserve_cart_stock(cart)
+    if shortages:
+        return Response(
+            {'error': 'Stock insuficiente', 'items': shortages},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response({'cart_id': cart.id, 'expires_at': expires_at})
+
+
+@transaction.non_atomic_requests
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@ratelimit(key='ip', rate='60/m', method='GET')
+def validate_checkout_cart(request):
+    """
+    Revisar el carrito antes de crear el pedido (solo lectura, sin bloqueos)
+    GET /api/checkout/validate?region=...
+    Retorna los problemas por línea (INACTIVE, OUT_OF_STOCK, INSUFFICIENT_STOCK,
+    PRICE_CHANGED) y los totales con los precios vigentes.
+    """
+    cart, error_response = get_checkout_cart(request)
+    if error_response:
+        return error_response
+
+    result = validate_cart(cart, request.query_params.get('region'))
+    if not result['items']:
+        return Response(
+            {'error': 'El carrito está vacío'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response({
+        'valid': result['valid'],
+        'items': [
+            {
+                **line,
+                'unit_price': int(line['unit_price']),
+                'final_price': int(line['final_price']),
+                'subtotal': int(line['final_price'] * line['quantity']),
+            }
+            for line in result['items']
+        ],
+        'subtotal': int(result['subtotal']),
+        'shipping_cost': int(result['shipping_cost']),
+        'total': int(result['total']),
     })
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@idempotent('create_order')
 @ratelimit(key='user', rate='10/h', method='POST')
 @transaction.atomic
 def create_order(request):
     """
     Crear pedido desde el carrito
     POST /api/orders/create
+    Admite el header Idempotency-Key: los reintentos reciben la respuesta original.
+    Los pedidos de invitados incluyen `payment_token`, requerido para iniciar el pago.
+    Auditoría, dirección guardada y webhook quedan en el outbox (run_outbox), sin esperar.
     """
     serializer = CreateOrderSerializer(data=request.data)
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    order_data = dict(serializer.validated_data)
 
     # Obtener carrito
-    if request.user.is_authenticated:
-        try:
-            cart = Cart.objects.get(user=request.user, is_active=True)
-        except Cart.DoesNotExist:
-            return Response(
-                {'error': 'Carrito no encontrado'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-    else:
-        session_token = request.headers.get('X-Session-Token')
-        if not session_token:
-            return Response(
-                {'error': 'Token de sesión requerido'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        try:
-            cart = Cart.objects.get(session_token=session_token, is_active=True)
-        except Cart.DoesNotExist:
-            return Response(
-                {'error': 'Carrito no encontrado'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+    cart, error_response = get_checkout_cart(request)
+    if error_response:
+        return error_response
+
+    user = request.user if request.user.is_authenticated else None
 
-    cart_items = cart.items.select_related('product').all()
-    if not cart_items.exists():
+    # Venta flash: si el carrito incluye un producto en cola, encolar y responder con un ticket.
+    # El ticket conserva save_address/address_label y la IP para los eventos del allocator.
+    hot_product_id = queued_product_id(cart)
+    if hot_product_id is not None:
+        ticket = enqueue_allocation(
+            cart, hot_product_id, {**order_data, 'ip_address': _client_ip(request)}, user=user
+        )
         return Response(
-            {'error': 'El carrito está vacío'},
+            {
+                'ticket': str(ticket.token),
+                'status': ticket.status,
+                'poll_url': f'/api/checkout/allocation/{ticket.token}',
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    save_address = order_data.pop('save_address')
+    address_label = order_data.pop('address_label', '')
+
+    # Validar stock, crear pedido y descontar stock en un único lote bloqueado
+    try:
+        order = place_order(cart, order_data, user=user)
+    except EmptyCartError as exc:
+        return Response(
+            {'error': str(exc)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except InsufficientStockError as exc:
+        return Response(
+            {
+                'error': str(exc),
+                'available': exc.available,
+                'required': exc.required
+            },
             status=status.HTTP_400_BAD_REQUEST
         )
 
-    # Validar stock y bloquear filas
-    products_to_update = []
-    items_data = []
-    
-    for cart_item in cart_items:
-        # Bloquear la fila del producto para lectura con SELECT FOR UPDATE
-        product = Product.objects.select_for_update().get(id=cart_item.product.id)
-        
-        if product.stock_qty < cart_item.quantity:
-            return Response(
-                {
-                    'error': f'Stock insuficiente para {product.name}',
-                    'available': product.stock_qty,
-                    'required': cart_item.quantity
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Preparar para actualizar stock
-        product.stock_qty -= cart_item.quantity
-        products_to_update.append(product)
-        
-        # Preparar datos del item
-        items_data.append({
-            'product': product,
-            'quantity': cart_item.quantity,
-            'unit_price': cart_item.unit_price,
-            'total_price': cart_item.quantity * cart_item.unit_price
-        })
-
-    # Calcular totales
-    subtotal = sum(item['total_price'] for item in items_data)
-    shipping_region = serializer.validated_data.get('shipping_region', '')
-    shipping_cost = calculate_shipping_cost(subtotal, shipping_region, cart_items)
-    total_amount = subtotal + shipping_cost
-
-    # Obtener estado PENDING
-    pending_status = OrderStatus.objects.get(code='PENDING')
-
-    # Crear orden
-    order_data = serializer.validated_data
-    order = Order.objects.create(
-        user=request.user if request.user.is_authenticated else None,
-        status=pending_status,
-        total_amount=total_amount,
-        shipping_cost=shipping_cost,
-        **order_data
-    )
+    # Efectos secundarios en el outbox, en la misma transacción: el worker los ejecuta después
+    enqueue(order_created_events(order, user, save_address, address_label, ip_address=_client_ip(request)))
+
+    # Preparar respuesta: los items llevan la copia del producto, sin consultar el catálogo
+    prefetch_related_objects([order], 'items')
+    data = OrderSerializer(order, context={'request': request}).data
+    if user is None:
+        data['payment_token'] = order_payment_token(order)
+    return Response(data, status=status.HTTP_201_CREATED)
+
+
+@transaction.non_atomic_requests
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def allocation_status(request, token):
+    """
+    Consultar el estado de un ticket de venta flash
+    GET /api/checkout/allocation/<token>
+    Estados: QUEUED, GRANTED (incluye el pedido y, si es de invitado, su `payment_token`)
+    o REJECTED (incluye el motivo).
+    """
+    try:
+        ticket = AllocationTicket.objects.select_related('order__status').get(token=token)
+    except AllocationTicket.DoesNotExist:
+        return Response(
+            {'error': 'Ticket no encontrado'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    data = {'ticket': str(ticket.token), 'status': ticket.status}
+    if ticket.status == AllocationTicket.STATUS_GRANTED and ticket.order:
+        prefetch_related_objects([ticket.order], 'items')
+        data['order'] = OrderSerializer(ticket.order, context={'request': request}).data
+        if ticket.order.user_id is None:
+            data['order']['payment_token'] = order_payment_token(ticket.order)
+    elif ticket.status == AllocationTicket.STATUS_REJECTED:
+        data['error'] = ticket.error
 
-    # Crear items de la orden
-    order_items = []
-    for item_data in items_data:
-        order_item = OrderItem.objects.create(
-            order=order,
-            product=item_data['product'],
-            quantity=item_data['quantity'],
-            unit_price=item_data['unit_price'],
-            total_price=item_data['total_price']
+    return Response(data)
+
+
+@transaction.non_atomic_requests
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@idempotent('webpay_create')
+def webpay_create(request):
+    """
+    Iniciar el pago de un pedido con Webpay Plus
+    POST /api/checkout/webpay/create
+    Body: { "order_id": 1, "payment_token": "..." } (el token solo se pide en pedidos de
+    invitados: es el `payment_token` de la respuesta de create_order)
+    Respuesta: { token, url }; el frontend envía `token_ws` por POST a `url`. Admite
+    Idempotency-Key, y mientras el pago siga vigente los reintentos reciben la misma transacción.
+    """
+    try:
+        order_id = int(request.data.get('order_id'))
+    except (TypeError, ValueError):
+        return Response(
+            {'error': 'order_id es requerido'},
+            status=status.HTTP_400_BAD_REQUEST
         )
-        order_items.append(order_item)
-
-    # Actualizar stock de productos
-    for product in products_to_update:
-        product.save()
-
-    # Registrar historial de estado
-    from .models import OrderStatusHistory
-    OrderStatusHistory.objects.create(
-        order=order,
-        status=pending_status,
-        changed_by=request.user if request.user.is_authenticated else None,
-        note='Orden creada'
-    )
 
-    # Desactivar carrito
-    cart.is_active = False
-    cart.save()
-    
-    # Guardar dirección si el usuario está autenticado y lo solicitó
-    if request.user.is_authenticated and serializer.validated_data.get('save_address'):
-        try:
-            from apps.users.models import Address
-            address_data = {
-                'user': request.user,
-                'label': serializer.validated_data.get('address_label') or None,
-                'street': serializer.validated_data['shipping_street'],
-                'city': serializer.validated_data['shipping_city'],
-                'region': serializer.validated_data['shipping_region'],
-                'postal_code': serializer.validated_data.get('shipping_postal_code') or None,
-                'is_default': False  # No marcar como default automáticamente
-            }
-            # Extraer número y apartamento si están en la calle (opcional)
-            # Por ahora guardamos la calle completa, pero se puede mejorar
-            Address.objects.create(**address_data)
-        except Exception as e:
-            # No fallar la orden si falla guardar la dirección
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f'Error saving address for order {order.id}: {e}')
-
-    # Preparar email de confirmación (se enviará cuando se integre Webpay)
-    # send_order_confirmation_email(order)
-    
-    # Preparar respuesta
-    response_serializer = OrderSerializer(order)
-    return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+    order = Order.objects.select_related('status').filter(id=order_id).first()
+    if order is not None and order.user_id:
+        allowed = request.user.is_authenticated and request.user.id == order.user_id
+    elif order is not None:
+        allowed = check_payment_token(order, request.data.get('payment_token'))
+    if order is None or not allowed:
+        return Response(
+            {'error': 'Pedido no encontrado'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    try:
+        tx, url = start_webpay_payment(order)
+    except PaymentError as exc:
+        return Response(
+            {'error': str(exc)},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except WebpayError:
+        return Response(
+            {'error': 'No fue posible iniciar el pago con Webpay'},
+            status=status.HTTP_502_BAD_GATEWAY
+        )
+
+    return Response({'token': tx.tbk_token, 'url': url, 'buy_order': tx.buy_order}, status=status.HTTP_201_CREATED)
+
+
+@transaction.non_atomic_requests
+@api_view(['GET', 'POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def webpay_return(request):
+    """
+    Retorno del comprador desde Webpay (WEBPAY_RETURN_URL)
+    GET/POST /api/checkout/webpay/return
+    Confirma la transacción y redirige a WEBPAY_FRONTEND_RESULT_URL con
+    ?order=<id>&status=approved|rejected|aborted|pending.
+    """
+    params = request.data if request.method == 'POST' else request.query_params
+    tx = commit_webpay_return(params)
+
+    query = {'status': transaction_result(tx) if tx else RESULT_REJECTED}
+    if tx:
+        query['order'] = tx.payment.order_id
+    return HttpResponseRedirect(f'{settings.WEBPAY_FRONTEND_RESULT_URL}?{urlencode(query)}')
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_user_orders(request):
     """
-    Listar pedidos del usuario autenticado
-    GET /api/orders/
+    Listar pedidos del usuario autenticado (resumen paginado por cursor)
+    GET /api/orders/?cursor=...&page_size=20
+    El detalle con items se obtiene en GET /api/orders/{id}/
     """
-    orders = Order.objects.filter(user=request.user).select_related(
-        'status'
-    ).prefetch_related('items__product', 'status_history').order_by('-created_at')
-    
-    serializer = OrderSerializer(orders, many=True)
-    return Response(serializer.data)
+    orders = (
+        Order.objects.filter(user=request.user)
+        .select_related('status')
+    )
+
+    paginator = OrderHistoryPagination()
+    page = paginator.paginate_queryset(orders, request)
+    serializer = OrderSummarySerializer(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
 
 
 @api_view(['GET'])
@@ -284,15 +506,14 @@ def get_order_detail(request, order_id):
     GET /api/orders/{id}/
     """
     try:
-        order = Order.objects.select_related('status').prefetch_related(
-            'items__product', 'status_history'
-        ).get(id=order_id, user=request.user)
+        order = Order.objects.select_related('status').prefetch_related('items').get(
+            id=order_id, user=request.user
+        )
     except Order.DoesNotExist:
         return Response(
             {'error': 'Pedido no encontrado'},
             status=status.HTTP_404_NOT_FOUND
         )
     
-    serializer = OrderSerializer(order)
+    serializer = OrderSerializer(order, context={'request': request})
     return Response(serializer.data)
-
@@ -0,0 +1,110 @@
+"""
+Cliente HTTP de Webpay Plus (API REST de Transbank).
+
+Se usa una sola requests.Session por proceso: las conexiones a la pasarela quedan
+abiertas (keep-alive) en un pool y se reutilizan entre pagos, con timeouts de
+conexión y de lectura. Los errores de conexión (la solicitud no alcanzó a enviarse)
+se reintentan con backoff en todas las operaciones; los errores de lectura y las
+respuestas 5xx solo en la consulta de estado (GET), porque crear, confirmar y
+anular no son idempotentes en la pasarela.
+"""
+
+import threading
+from typing import Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+TRANSACTIONS_PATH = '/rswebpaytransaction/api/webpay/v1.2/transactions'
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class WebpayError(Exception):
+    """La pasarela no respondió o rechazó la solicitud."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+class WebpayClient:
+    def __init__(self, base_url: str, commerce_code: str, api_key: str,
+                 timeout: tuple[float, float] = (3.05, 15), max_retries: int = 2, pool_size: int = 10):
+        self.base_url = base_url.rstrip('/') + TRANSACTIONS_PATH
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Tbk-Api-Key-Id': commerce_code,
+            'Tbk-Api-Key-Secret': api_key,
+            'Content-Type': 'application/json',
+        })
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            allowed_methods=frozenset({'GET'}),
+            status_forcelist=RETRY_STATUSES,
+            backoff_factor=0.2,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def _request(self, method: str, path: str = '', payload: Optional[dict] = None) -> dict:
+        try:
+            response = self.session.request(method, self.base_url + path, json=payload, timeout=self.timeout)
+        except requests.RequestException as exc:
+            raise WebpayError(f'Error de comunicación con Webpay: {exc}') from exc
+
+        if response.status_code >= 400:
+            try:
+                message = response.json().get('error_message')
+            except ValueError:
+                message = None
+            raise WebpayError(message or f'Webpay respondió {response.status_code}', response.status_code)
+        return response.json() if response.content else {}
+
+    def create(self, buy_order: str, session_id: str, amount: int, return_url: str) -> dict:
+        """Crear la transacción. Retorna {token, url}."""
+        return self._request('POST', payload={
+            'buy_order': buy_order,
+            'session_id': session_id,
+            'amount': amount,
+            'return_url': return_url,
+        })
+
+    def commit(self, token: str) -> dict:
+        """Confirmar la transacción al volver el comprador desde Webpay."""
+        return self._request('PUT', f'/{token}')
+
+    def status(self, token: str) -> dict:
+        return self._request('GET', f'/{token}')
+
+    def refund(self, token: str, amount: int) -> dict:
+        """Anular o reversar. Retorna {type: REVERSED | NULLIFIED, ...}."""
+        return self._request('POST', f'/{token}/refunds', {'amount': amount})
+
+
+_clients: dict[tuple, WebpayClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_webpay_client() -> WebpayClient:
+    """Cliente compartido del proceso (uno por URL y credenciales configuradas)."""
+    key = (settings.WEBPAY_BASE_URL, settings.WEBPAY_COMMERCE_CODE, settings.WEBPAY_API_KEY)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = WebpayClient(
+                *key,
+                timeout=(settings.WEBPAY_CONNECT_TIMEOUT, settings.WEBPAY_READ_TIMEOUT),
+                max_retries=settings.WEBPAY_MAX_RETRIES,
+                pool_size=settings.WEBPAY_POOL_SIZE,
+            )
+    return client
@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django import forms
 from django.core.exceptions import ValidationError
-from .models import Category, Product, ProductImage
+from .models import Category, Product, ProductImage, StockMovement
+from .services import set_stock_levels
 
 
 @admin.register(Category)
@@ -134,7 +135,7 @@ class ProductAdmin(admin.ModelAdmin):
             'fields': ('name', 'slug', 'category', 'description', 'brand', 'sku', 'active')
         }),
         ('Precio y Stock', {
-            'fields': ('price', 'stock_qty')
+            'fields': ('price', 'stock_qty', 'queued_allocation')
         }),
         ('Descuentos', {
             'fields': ('discount_price', 'discount_amount', 'discount_percent'),
@@ -156,6 +157,16 @@ class ProductAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         return qs.select_related('category')
+
+    def save_model(self, request, obj, form, change):
+        # Un cambio de stock se registra como ajuste (el resto de los campos se guarda sobre el saldo vigente)
+        target = obj.stock_qty if change and 'stock_qty' in form.changed_data else None
+        if target is not None:
+            obj.stock_qty = Product.objects.select_for_update().values_list('stock_qty', flat=True).get(pk=obj.pk)
+        super().save_model(request, obj, form, change)
+        if target is not None:
+            set_stock_levels({obj.pk: target}, user=request.user, note='Edición desde el admin')
+            obj.stock_qty = target
     
     # Traducir headers de columnas
     def name(self, obj):
@@ -212,3 +223,21 @@ class ProductAdmin(admin.ModelAdmin):
     has_discount.boolean = True
     has_discount.short_description = 'Tiene Descuento'
 
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'product', 'kind', 'quantity', 'order', 'created_by', 'note')
+    list_filter = ('kind', 'created_at')
+    search_fields = ('product__sku', 'product__name', 'note')
+    raw_id_fields = ('product', 'order', 'created_by')
+    list_select_related = ('product', 'created_by')
+
+    # Historial de solo inserción: se consulta, no se edita
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
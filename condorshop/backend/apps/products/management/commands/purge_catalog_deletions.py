@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.products.models import CatalogDeletion
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina en lotes las bajas del catálogo más antiguas que CATALOG_DELETION_RETENTION_DAYS '
+        '(los cursores de sincronización más antiguos ya no se aceptan)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Cantidad de registros eliminados por sentencia (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        cutoff = timezone.now() - timedelta(days=settings.CATALOG_DELETION_RETENTION_DAYS)
+        expired = CatalogDeletion.objects.filter(deleted_at__lt=cutoff).order_by('id')
+
+        total = 0
+        while True:
+            ids = list(expired.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted, _ = CatalogDeletion.objects.filter(id__in=ids).delete()
+            total += deleted
+
+        self.stdout.write(self.style.SUCCESS(f'Bajas de catálogo depuradas: {total}'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.products.services import rebuild_stock_snapshots, stock_discrepancies
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el stock de cada producto con la suma de sus movimientos (una consulta agrupada) '
+        'y recalcula los que no coinciden'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informar las diferencias, sin modificar el stock',
+        )
+
+    def handle(self, *args, **options):
+        discrepancies = stock_discrepancies()
+        for product_id, (stock_qty, balance) in sorted(discrepancies.items()):
+            self.stdout.write(f'  Producto {product_id}: stock {stock_qty}, movimientos {balance}')
+
+        if not discrepancies:
+            self.stdout.write(self.style.SUCCESS('El stock coincide con el historial de movimientos'))
+            return
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Productos con diferencias: {len(discrepancies)} (sin cambios)'))
+            return
+
+        with transaction.atomic():
+            updated = rebuild_stock_snapshots(discrepancies)
+        self.stdout.write(self.style.SUCCESS(f'Stock recalculado desde el historial: {updated} productos'))
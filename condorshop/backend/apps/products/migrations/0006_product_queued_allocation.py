@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_convert_discount_data_to_integers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='queued_allocation',
+            field=models.BooleanField(db_column='queued_allocation', default=False, help_text='Venta flash: los pedidos con este producto se encolan y un worker asigna el stock en lotes (python manage.py run_allocator).', verbose_name='Asignación en cola'),
+        ),
+    ]
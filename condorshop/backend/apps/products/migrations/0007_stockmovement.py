@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-19 09:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_opening_balances(apps, schema_editor):
+    """Un movimiento de ajuste por producto con el stock actual como saldo inicial."""
+    Product = apps.get_model('products', 'Product')
+    StockMovement = apps.get_model('products', 'StockMovement')
+    last_id = 0
+    while True:
+        rows = list(
+            Product.objects.filter(id__gt=last_id, stock_qty__gt=0)
+            .order_by('id')
+            .values_list('id', 'stock_qty')[:1000]
+        )
+        if not rows:
+            break
+        StockMovement.objects.bulk_create([
+            StockMovement(product_id=product_id, kind='ADJUSTMENT', quantity=stock_qty, note='Saldo inicial')
+            for product_id, stock_qty in rows
+        ])
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_paymenttransaction_pending_index'),
+        ('products', '0006_product_queued_allocation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(db_column='id', primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('SALE', 'Venta'), ('CANCELLATION', 'Cancelación'), ('RESTOCK', 'Reposición'), ('ADJUSTMENT', 'Ajuste'), ('SYNC', 'Sincronización')], db_column='kind', max_length=20, verbose_name='Tipo')),
+                ('quantity', models.IntegerField(db_column='quantity', help_text='Unidades con signo: negativas salen del stock', verbose_name='Cantidad')),
+                ('note', models.CharField(blank=True, db_column='note', default='', max_length=255, verbose_name='Nota')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')),
+                ('created_by', models.ForeignKey(blank=True, db_column='created_by', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL, verbose_name='Registrado por')),
+                ('order', models.ForeignKey(blank=True, db_column='order_id', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='orders.order', verbose_name='Pedido')),
+                ('product', models.ForeignKey(db_column='product_id', on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='products.product', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Stock',
+                'verbose_name_plural': 'Movimientos de Stock',
+                'db_table': 'stock_movements',
+                'indexes': [models.Index(fields=['product', 'id'], name='idx_stock_movement_product')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_stockmovement'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogDeletion',
+            fields=[
+                ('id', models.BigAutoField(db_column='id', primary_key=True, serialize=False)),
+                ('entity', models.CharField(choices=[('PRODUCT', 'Producto'), ('CATEGORY', 'Categoría')], db_column='entity', max_length=20, verbose_name='Entidad')),
+                ('object_id', models.IntegerField(db_column='object_id', verbose_name='ID eliminado')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_column='deleted_at', verbose_name='Eliminado el')),
+            ],
+            options={
+                'verbose_name': 'Eliminación de Catálogo',
+                'verbose_name_plural': 'Eliminaciones de Catálogo',
+                'db_table': 'catalog_deletions',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['updated_at', 'id'], name='idx_category_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated_at', 'id'], name='idx_product_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogdeletion',
+            index=models.Index(fields=['deleted_at'], name='idx_catalog_deletion_date'),
+        ),
+    ]
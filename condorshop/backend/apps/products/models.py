@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -18,6 +19,7 @@ class Category(models.Model):
         verbose_name_plural = 'Categorías'
         indexes = [
             models.Index(fields=['slug'], name='idx_category_slug'),
+            models.Index(fields=['updated_at', 'id'], name='idx_category_updated'),
         ]
 
     def __str__(self):
@@ -72,6 +74,12 @@ class Product(models.Model):
     brand = models.CharField(max_length=100, null=True, blank=True, db_column='brand', verbose_name='Marca')
     sku = models.CharField(max_length=64, unique=True, db_column='sku', verbose_name='SKU')
     active = models.BooleanField(default=True, db_column='active', verbose_name='Activo')
+    queued_allocation = models.BooleanField(
+        default=False,
+        db_column='queued_allocation',
+        help_text='Venta flash: los pedidos con este producto se encolan y un worker asigna el stock en lotes (python manage.py run_allocator).',
+        verbose_name='Asignación en cola'
+    )
     created_at = models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')
     updated_at = models.DateTimeField(auto_now=True, db_column='updated_at', verbose_name='Actualizado el')
 
@@ -85,6 +93,7 @@ class Product(models.Model):
             models.Index(fields=['active'], name='idx_product_active'),
             models.Index(fields=['price'], name='idx_product_price'),
             models.Index(fields=['stock_qty'], name='idx_product_stock'),
+            models.Index(fields=['updated_at', 'id'], name='idx_product_updated'),
         ]
 
     def __str__(self):
@@ -218,3 +227,95 @@ class ProductImage(models.Model):
     def __str__(self):
         return f"{self.product.name} - Imagen {self.position}"
 
+
+class StockMovement(models.Model):
+    """
+    Historial de solo inserción de los cambios de stock. `Product.stock_qty` es el
+    saldo vigente; la suma de los movimientos de un producto debe coincidir con él
+    (python manage.py reconcile_stock).
+    """
+    KIND_SALE = 'SALE'
+    KIND_CANCELLATION = 'CANCELLATION'
+    KIND_RESTOCK = 'RESTOCK'
+    KIND_ADJUSTMENT = 'ADJUSTMENT'
+    KIND_SYNC = 'SYNC'
+    KIND_CHOICES = [
+        (KIND_SALE, 'Venta'),
+        (KIND_CANCELLATION, 'Cancelación'),
+        (KIND_RESTOCK, 'Reposición'),
+        (KIND_ADJUSTMENT, 'Ajuste'),
+        (KIND_SYNC, 'Sincronización'),
+    ]
+
+    id = models.BigAutoField(primary_key=True, db_column='id')
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        db_column='product_id',
+        related_name='stock_movements',
+        verbose_name='Producto'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, db_column='kind', verbose_name='Tipo')
+    quantity = models.IntegerField(db_column='quantity', verbose_name='Cantidad', help_text='Unidades con signo: negativas salen del stock')
+    order = models.ForeignKey(
+        'orders.Order',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_column='order_id',
+        related_name='stock_movements',
+        verbose_name='Pedido'
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_column='created_by',
+        related_name='stock_movements',
+        verbose_name='Registrado por'
+    )
+    note = models.CharField(max_length=255, blank=True, default='', db_column='note', verbose_name='Nota')
+    created_at = models.DateTimeField(auto_now_add=True, db_column='created_at', verbose_name='Creado el')
+
+    class Meta:
+        db_table = 'stock_movements'
+        verbose_name = 'Movimiento de Stock'
+        verbose_name_plural = 'Movimientos de Stock'
+        indexes = [
+            # Historial de un producto: un rango del índice, en orden de registro
+            models.Index(fields=['product', 'id'], name='idx_stock_movement_product'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.kind} {self.quantity:+d}"
+
+
+class CatalogDeletion(models.Model):
+    """
+    Registro de productos y categorías eliminados, para que la sincronización
+    incremental del catálogo (apps/products/sync.py) entregue sus bajas. Se depura
+    con python manage.py purge_catalog_deletions.
+    """
+    ENTITY_PRODUCT = 'PRODUCT'
+    ENTITY_CATEGORY = 'CATEGORY'
+    ENTITY_CHOICES = [
+        (ENTITY_PRODUCT, 'Producto'),
+        (ENTITY_CATEGORY, 'Categoría'),
+    ]
+
+    id = models.BigAutoField(primary_key=True, db_column='id')
+    entity = models.CharField(max_length=20, choices=ENTITY_CHOICES, db_column='entity', verbose_name='Entidad')
+    object_id = models.IntegerField(db_column='object_id', verbose_name='ID eliminado')
+    deleted_at = models.DateTimeField(auto_now_add=True, db_column='deleted_at', verbose_name='Eliminado el')
+
+    class Meta:
+        db_table = 'catalog_deletions'
+        verbose_name = 'Eliminación de Catálogo'
+        verbose_name_plural = 'Eliminaciones de Catálogo'
+        indexes = [
+            models.Index(fields=['deleted_at'], name='idx_catalog_deletion_date'),
+        ]
+
+    def __str__(self):
+        return f"{self.entity} {self.object_id}"
@@ -17,6 +17,17 @@ def to_int(value):
         return int(value)
 
 
+def absolute_image_url(url, request=None):
+    """URL absoluta para imágenes servidas desde /media/ (las externas se retornan tal cual)."""
+    if not url:
+        return None
+    if url.startswith('/media/'):
+        if request:
+            return request.build_absolute_uri(url)
+        return f'http://localhost:8000{url}'
+    return url
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -100,15 +111,14 @@ class ProductListSerializer(serializers.ModelSerializer):
 
     def get_main_image(self, obj):
         """Retorna la primera imagen ordenada por position con URL absoluta"""
-        main_img = obj.images.order_by('position').first()
+        # Reutilizar imágenes precargadas (prefetch_related) para evitar N+1 en listados
+        prefetched = getattr(obj, '_prefetched_objects_cache', {}).get('images')
+        if prefetched is not None:
+            main_img = min(prefetched, key=lambda image: image.position, default=None)
+        else:
+            main_img = obj.images.order_by('position').first()
         if main_img:
-            # Construir URL absoluta
-            if main_img.url.startswith('/media/'):
-                request = self.context.get('request')
-                if request:
-                    return request.build_absolute_uri(main_img.url)
-                return f'http://localhost:8000{main_img.url}'
-            return main_img.url
+            return absolute_image_url(main_img.url, self.context.get('request'))
         return None
 
 
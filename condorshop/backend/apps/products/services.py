@@ -0,0 +1,124 @@
+"""
+Movimientos de stock.
+
+Cada cambio de `Product.stock_qty` se registra en `stock_movements` en la misma
+transacción, con un bulk_create por operación (un pedido, una cancelación masiva,
+un ajuste). `stock_qty` queda como saldo vigente para leer el catálogo sin sumar el
+historial; `rebuild_stock_snapshots` lo recalcula desde los movimientos.
+"""
+
+from typing import Iterable, Optional, Sequence
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Product, StockMovement
+
+
+class NegativeStockError(Exception):
+    def __init__(self, product_id: int, available: int, change: int):
+        self.product_id = product_id
+        self.available = available
+        self.change = change
+        super().__init__(f'Stock insuficiente. Disponible: {available}')
+
+
+def _change_case(changes: dict) -> Case:
+    return Case(
+        *[When(id=product_id, then=Value(change)) for product_id, change in changes.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def record_movements(movements: Sequence[StockMovement]) -> None:
+    """Registrar movimientos cuyo efecto en stock_qty ya aplicó quien llama (p. ej. place_order)."""
+    StockMovement.objects.bulk_create(movements)
+
+
+def apply_movements(movements: Sequence[StockMovement]) -> None:
+    """Aplicar los movimientos a stock_qty (un UPDATE con CASE) y registrarlos (un bulk_create)."""
+    changes = {}
+    for movement in movements:
+        changes[movement.product_id] = changes.get(movement.product_id, 0) + movement.quantity
+    changes = {product_id: change for product_id, change in changes.items() if change}
+    if changes:
+        Product.objects.filter(id__in=changes).update(
+            stock_qty=F('stock_qty') + _change_case(changes),
+            updated_at=timezone.now(),
+        )
+    record_movements(movements)
+
+
+def change_stock(product_id: int, quantity: int, kind: str, user=None, note: str = '') -> StockMovement:
+    """Sumar (o restar) unidades a un producto. Lanza NegativeStockError si quedaría bajo cero."""
+    with transaction.atomic():
+        available = Product.objects.select_for_update().values_list('stock_qty', flat=True).get(id=product_id)
+        if available + quantity < 0:
+            raise NegativeStockError(product_id, available, quantity)
+        movement = StockMovement(product_id=product_id, kind=kind, quantity=quantity, created_by=user, note=note)
+        apply_movements([movement])
+    return movement
+
+
+def set_stock_levels(levels: dict, kind: str = StockMovement.KIND_ADJUSTMENT, user=None, note: str = '') -> list[StockMovement]:
+    """
+    Fijar el stock de varios productos ({product_id: unidades}), p. ej. tras un conteo
+    de bodega. Registra solo las diferencias contra el saldo vigente (bloqueado).
+    """
+    with transaction.atomic():
+        current = dict(
+            Product.objects.select_for_update().filter(id__in=levels).order_by('id').values_list('id', 'stock_qty')
+        )
+        movements = [
+            StockMovement(product_id=product_id, kind=kind, quantity=levels[product_id] - stock_qty, created_by=user, note=note)
+            for product_id, stock_qty in current.items()
+            if levels[product_id] != stock_qty
+        ]
+        apply_movements(movements)
+    return movements
+
+
+def movement_history(product_id: int, before_id: Optional[int] = None, limit: int = 50) -> list[StockMovement]:
+    """Movimientos de un producto del más reciente al más antiguo (rango de idx_stock_movement_product)."""
+    movements = StockMovement.objects.filter(product_id=product_id)
+    if before_id:
+        movements = movements.filter(id__lt=before_id)
+    return list(movements.select_related('created_by').order_by('-id')[:limit])
+
+
+def ledger_balances(product_ids: Optional[Iterable[int]] = None) -> dict[int, int]:
+    """Saldo de cada producto según sus movimientos (una consulta agrupada)."""
+    movements = StockMovement.objects.all()
+    if product_ids is not None:
+        movements = movements.filter(product_id__in=list(product_ids))
+    return dict(movements.values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total'))
+
+
+def stock_discrepancies() -> dict[int, tuple[int, int]]:
+    """{product_id: (stock_qty, saldo del historial)} de los productos que no coinciden."""
+    balances = ledger_balances()
+    return {
+        product_id: (stock_qty, balances.get(product_id, 0))
+        for product_id, stock_qty in Product.objects.values_list('id', 'stock_qty').iterator()
+        if stock_qty != balances.get(product_id, 0)
+    }
+
+
+def rebuild_stock_snapshots(product_ids: Iterable[int]) -> int:
+    """
+    Recalcular stock_qty desde el historial con un único UPDATE (subconsulta agrupada
+    por producto), consistente aunque haya ventas en curso. Retorna las filas actualizadas.
+    """
+    ledger_total = (
+        StockMovement.objects.filter(product_id=OuterRef('id'))
+        .values('product_id')
+        .annotate(total=Sum('quantity'))
+        .values('total')
+    )
+    return Product.objects.filter(id__in=list(product_ids)).update(
+        stock_qty=Coalesce(Subquery(ledger_total, output_field=IntegerField()), Value(0)),
+        updated_at=timezone.now(),
+    )
@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import CatalogDeletion, Category, Product, ProductImage, StockMovement
+
+
+@receiver(post_save, sender=Product)
+def record_initial_stock(sender, instance, created, raw=False, **kwargs):
+    """El stock con el que se crea un producto es su primer movimiento."""
+    if created and not raw and instance.stock_qty:
+        StockMovement.objects.create(
+            product=instance,
+            kind=StockMovement.KIND_ADJUSTMENT,
+            quantity=instance.stock_qty,
+            note='Stock inicial',
+        )
+
+
+def _deleting_product(origin):
+    return isinstance(origin, Product) or getattr(origin, 'model', None) is Product
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def touch_image_product(sender, instance, raw=False, origin=None, **kwargs):
+    """
+    Las imágenes viajan dentro del producto en la sincronización del catálogo:
+    cualquier cambio en ellas actualiza updated_at del producto.
+    """
+    if not raw and not _deleting_product(origin):
+        Product.objects.filter(id=instance.product_id).update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=Category)
+def touch_category_products(sender, instance, **kwargs):
+    """Los productos de una categoría eliminada quedan sin categoría (SET_NULL): se marcan como modificados."""
+    Product.objects.filter(category_id=instance.id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Product)
+def record_product_deletion(sender, instance, **kwargs):
+    CatalogDeletion.objects.create(entity=CatalogDeletion.ENTITY_PRODUCT, object_id=instance.id)
+
+
+@receiver(post_delete, sender=Category)
+def record_category_deletion(sender, instance, **kwargs):
+    CatalogDeletion.objects.create(entity=CatalogDeletion.ENTITY_CATEGORY, object_id=instance.id)
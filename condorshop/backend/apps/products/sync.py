@@ -0,0 +1,115 @@
+"""
+Sincronización incremental del catálogo (app móvil, cachés de borde).
+
+Un cliente guarda el `next_cursor` de cada respuesta y en la siguiente llamada recibe
+solo lo que cambió desde entonces:
+- productos activos modificados (con sus imágenes) y categorías modificadas, recorridos
+  por (updated_at, id) sobre idx_product_updated / idx_category_updated;
+- bajas: productos desactivados y filas eliminadas (registro `catalog_deletions`).
+
+Cada flujo avanza con su propia posición dentro del cursor, de modo que una página
+trae a lo más `limit` filas de cada uno. Solo se entregan cambios anteriores a
+ahora - CATALOG_SYNC_LAG_SECONDS, para no saltarse transacciones aún sin confirmar.
+Un cursor emitido hace más de CATALOG_DELETION_RETENTION_DAYS puede haber perdido
+bajas ya depuradas: el cliente debe sincronizar desde cero.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import CatalogDeletion, Category, Product
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+class StaleCursorError(Exception):
+    pass
+
+
+def _position(value):
+    return [value[0].isoformat(), value[1]] if value else None
+
+
+def _parse_position(value):
+    return (datetime.fromisoformat(value[0]), int(value[1])) if value else None
+
+
+def encode_cursor(issued_at: datetime, products, categories, deletion_id: int) -> str:
+    raw = json.dumps([issued_at.isoformat(), _position(products), _position(categories), deletion_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token: str):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        issued_at, products, categories, deletion_id = json.loads(raw)
+        return datetime.fromisoformat(issued_at), _parse_position(products), _parse_position(categories), int(deletion_id)
+    except (ValueError, TypeError, IndexError):
+        raise InvalidCursorError('Cursor inválido')
+
+
+def _after(queryset, position, limit):
+    """Hasta limit + 1 filas posteriores a (updated_at, id) en el orden del índice."""
+    if position:
+        updated_at, row_id = position
+        queryset = queryset.filter(updated_at__gte=updated_at).exclude(updated_at=updated_at, id__lte=row_id)
+    return list(queryset.order_by('updated_at', 'id')[:limit + 1])
+
+
+def catalog_changes(cursor: Optional[str], limit: int) -> dict:
+    """
+    Siguiente página de cambios del catálogo. Sin cursor entrega el catálogo completo
+    (la primera sincronización) y las bajas registradas desde ese momento.
+    """
+    now = timezone.now()
+    horizon = now - timedelta(seconds=settings.CATALOG_SYNC_LAG_SECONDS)
+    if cursor:
+        issued_at, product_position, category_position, deletion_id = decode_cursor(cursor)
+        if issued_at < now - timedelta(days=settings.CATALOG_DELETION_RETENTION_DAYS):
+            raise StaleCursorError('El cursor expiró; sincronice el catálogo desde el inicio')
+    else:
+        product_position = category_position = None
+        # Un cliente nuevo no tiene nada que borrar: las bajas cuentan desde ahora
+        deletion_id = CatalogDeletion.objects.aggregate(last=Max('id'))['last'] or 0
+
+    products = _after(
+        Product.objects.filter(updated_at__lte=horizon).select_related('category').prefetch_related('images'),
+        product_position,
+        limit,
+    )
+    categories = _after(Category.objects.filter(updated_at__lte=horizon), category_position, limit)
+    deletions = list(
+        CatalogDeletion.objects.filter(id__gt=deletion_id, deleted_at__lte=horizon)
+        .order_by('id')
+        .values_list('id', 'entity', 'object_id')[:limit + 1]
+    )
+    has_more = any(len(rows) > limit for rows in (products, categories, deletions))
+    products, categories, deletions = products[:limit], categories[:limit], deletions[:limit]
+
+    if products:
+        product_position = (products[-1].updated_at, products[-1].id)
+    if categories:
+        category_position = (categories[-1].updated_at, categories[-1].id)
+    if deletions:
+        deletion_id = deletions[-1][0]
+
+    deleted_products = [product.id for product in products if not product.active]
+    deleted_products += [object_id for _, entity, object_id in deletions if entity == CatalogDeletion.ENTITY_PRODUCT]
+    return {
+        'products': [product for product in products if product.active],
+        'categories': categories,
+        'deleted_products': deleted_products,
+        'deleted_categories': [
+            object_id for _, entity, object_id in deletions if entity == CatalogDeletion.ENTITY_CATEGORY
+        ],
+        'next_cursor': encode_cursor(now, product_position, category_position, deletion_id),
+        'has_more': has_more,
+    }
@@ -11,6 +11,11 @@ from .serializers import (
     CategorySerializer
 )
 from .filters import ProductFilter
+from .sync import InvalidCursorError, StaleCursorError, catalog_changes
+
+
+SYNC_PAGE_SIZE = 200
+SYNC_MAX_PAGE_SIZE = 1000
 
 
 class ProductViewSet(viewsets.ReadOnlyModelViewSet):
@@ -18,6 +23,7 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     ViewSet para productos
     - GET /api/products/ - Listado con búsqueda, filtros y ordenamiento
     - GET /api/products/{slug}/ - Detalle por slug
+    - GET /api/products/sync/ - Cambios del catálogo desde un cursor
     """
     queryset = Product.objects.filter(active=True).select_related('category').prefetch_related('images')
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -48,6 +54,39 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
             )
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def sync(self, request):
+        """
+        Sincronización incremental del catálogo
+        GET /api/products/sync/ - Catálogo completo (primera sincronización, paginada)
+        GET /api/products/sync/?cursor=<next_cursor> - Solo lo modificado o eliminado desde ese cursor
+        Repetir mientras has_more sea true y guardar el último next_cursor.
+        """
+        try:
+            limit = int(request.query_params.get('limit', SYNC_PAGE_SIZE))
+        except ValueError:
+            limit = SYNC_PAGE_SIZE
+        limit = min(max(limit, 1), SYNC_MAX_PAGE_SIZE)
+
+        try:
+            changes = catalog_changes(request.query_params.get('cursor'), limit)
+        except InvalidCursorError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except StaleCursorError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_410_GONE)
+
+        context = self.get_serializer_context()
+        return Response({
+            'products': ProductDetailSerializer(changes['products'], many=True, context=context).data,
+            'categories': CategorySerializer(changes['categories'], many=True).data,
+            'deleted': {
+                'products': changes['deleted_products'],
+                'categories': changes['deleted_categories'],
+            },
+            'next_cursor': changes['next_cursor'],
+            'has_more': changes['has_more'],
+        })
+
 
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     """
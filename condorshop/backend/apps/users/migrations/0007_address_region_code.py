@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:42
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalize(value):
+    decomposed = unicodedata.normalize('NFKD', str(value or ''))
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+
+_PREFIXES = ('region de la ', 'region de los ', 'region del ', 'region de ', 'region ')
+
+
+def backfill_address_region_codes(apps, schema_editor):
+    """Completar region_code de direcciones existentes (un UPDATE por valor distinto)."""
+    Address = apps.get_model('users', 'Address')
+    Region = apps.get_model('locations', 'Region')
+    RegionAlias = apps.get_model('locations', 'RegionAlias')
+
+    aliases = {}
+    for code, name in Region.objects.values_list('code', 'name'):
+        aliases[_normalize(code)] = code
+        aliases[_normalize(name)] = code
+    aliases.update(RegionAlias.objects.values_list('alias', 'region__code'))
+
+    for value in Address.objects.values_list('region', flat=True).distinct():
+        normalized = _normalize(value)
+        code = aliases.get(normalized)
+        for prefix in _PREFIXES:
+            if code is None and normalized.startswith(prefix):
+                code = aliases.get(normalized[len(prefix):])
+        if code:
+            Address.objects.filter(region=value).update(region_code=code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0002_seed_regions'),
+        ('users', '0006_remove_passwordresettoken_idx_reset_user_used_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='address',
+            name='region_code',
+            field=models.CharField(blank=True, db_column='region_code', help_text='Código canónico de la región (locations.Region), resuelto desde region', max_length=10, null=True, verbose_name='Código de región'),
+        ),
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['region_code'], name='idx_address_region_code'),
+        ),
+        migrations.RunPython(backfill_address_region_codes, migrations.RunPython.noop),
+    ]
@@ -156,6 +156,14 @@ class Address(models.Model):
     )
     city = models.CharField(max_length=100, db_column='city', verbose_name='Comuna')
     region = models.CharField(max_length=100, db_column='region', verbose_name='Región')
+    region_code = models.CharField(
+        max_length=10,
+        blank=True,
+        null=True,
+        db_column='region_code',
+        help_text='Código canónico de la región (locations.Region), resuelto desde region',
+        verbose_name='Código de región'
+    )
     postal_code = models.CharField(max_length=20, blank=True, null=True, db_column='postal_code', verbose_name='Código postal')
     is_default = models.BooleanField(
         default=False,
@@ -173,6 +181,7 @@ class Address(models.Model):
         indexes = [
             models.Index(fields=['user'], name='idx_address_user'),
             models.Index(fields=['user', 'is_default'], name='idx_address_user_default'),
+            models.Index(fields=['region_code'], name='idx_address_region_code'),
         ]
         ordering = ['-is_default', '-created_at']
 
@@ -188,6 +197,8 @@ class Address(models.Model):
         return f"{address_str}, {self.city}, {self.region}"
     
     def save(self, *args, **kwargs):
+        from apps.locations.services import resolve_region_code
+        self.region_code = resolve_region_code(self.region)
         # Si se marca como default, quitar default de otras direcciones del usuario
         if self.is_default:
             Address.objects.filter(user=self.user, is_default=True).exclude(id=self.id).update(is_default=False)
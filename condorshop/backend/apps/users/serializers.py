@@ -93,8 +93,8 @@ class AddressSerializer(serializers.ModelSerializer):
     """Serializer para direcciones guardadas"""
     class Meta:
         model = Address
-        fields = ('id', 'label', 'street', 'number', 'apartment', 'city', 'region', 'postal_code', 'is_default', 'created_at', 'updated_at')
-        read_only_fields = ('id', 'created_at', 'updated_at')
+        fields = ('id', 'label', 'street', 'number', 'apartment', 'city', 'region', 'region_code', 'postal_code', 'is_default', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'region_code', 'created_at', 'updated_at')
     
     def validate(self, attrs):
         """Validar que solo haya una dirección por defecto"""
@@ -11,7 +11,10 @@ from django.core.mail import send_mail
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.contrib.auth.password_validation import validate_password
 from django_ratelimit.decorators import ratelimit
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView
+from apps.cart.services import merge_guest_cart
 from .serializers import UserRegistrationSerializer, UserProfileSerializer, AddressSerializer, AddressCreateSerializer
 from .models import PasswordResetToken, Address
 
@@ -28,6 +31,15 @@ FRONTEND_RESET_URL = getattr(settings, 'FRONTEND_RESET_URL', 'http://localhost:5
 PASSWORD_RESET_TIMEOUT_HOURS = getattr(settings, 'PASSWORD_RESET_TIMEOUT_HOURS', 1)
 
 
+def merge_session_cart(request, user):
+    """Fusionar el carrito invitado (header X-Session-Token) en el carrito del usuario (best-effort)."""
+    try:
+        merge_guest_cart(user, request.headers.get('X-Session-Token'))
+    except Exception as exc:
+        logger = logging.getLogger(__name__)
+        logger.warning("Error fusionando carrito invitado del usuario %s: %s", user.id, exc)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 @ratelimit(key='ip', rate='5/m', method='POST')
@@ -41,6 +53,7 @@ def register(request):
     if serializer.is_valid():
         try:
             user = serializer.save()
+            merge_session_cart(request, user)
             # Generate JWT token
             refresh = RefreshToken.for_user(user)
             return Response({
@@ -111,6 +124,8 @@ def login(request):
             status=status.HTTP_401_UNAUTHORIZED
         )
     
+    merge_session_cart(request, user)
+
     # Generate JWT token
     refresh = RefreshToken.for_user(user)
     return Response({
@@ -128,6 +143,23 @@ def login(request):
     })
 
 
+class CartMergingTokenObtainPairView(TokenObtainPairView):
+    """
+    Obtener token JWT (SimpleJWT) fusionando el carrito invitado
+    POST /api/auth/token/
+    """
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as exc:
+            raise InvalidToken(exc.args[0])
+
+        merge_session_cart(request, serializer.user)
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+
 @api_view(['GET', 'PATCH'])
 @permission_classes([IsAuthenticated])
 def profile(request):
@@ -0,0 +1,51 @@
+"""
+Valores compilados una vez por proceso e invalidados en todos los workers.
+
+Cada valor (índice de envíos, mapa de alias de regiones) se guarda en memoria del
+proceso junto a la versión con que se compiló. La versión vive en la caché compartida
+(CACHES['default']): al cambiar los datos se renueva y cada proceso recompila en su
+próxima lectura. Leer la versión no cuesta SQL con Redis o Memcached, pero con
+`dbcache://` es una consulta a la tabla de caché por lectura (ver README, CACHE_URL).
+"""
+
+import threading
+import uuid
+from typing import Callable, Generic, Optional, TypeVar
+
+from django.core.cache import cache
+
+
+T = TypeVar('T')
+
+
+class VersionedProcessCache(Generic[T]):
+    """Valor de `build()` por proceso, reconstruido solo si cambió la versión en `version_key`."""
+
+    def __init__(self, version_key: str, build: Callable[[], T]):
+        self.version_key = version_key
+        self.build = build
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._version: Optional[str] = None
+
+    def current_version(self) -> str:
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(self.version_key)
+        return version
+
+    def bump_version(self) -> None:
+        """Invalidar el valor en todos los procesos."""
+        cache.set(self.version_key, uuid.uuid4().hex, timeout=None)
+
+    def get(self) -> T:
+        version = self.current_version()
+        if self._value is not None and self._version == version:
+            return self._value
+
+        with self._lock:
+            if self._value is None or self._version != version:
+                self._value = self.build()
+                self._version = version
+            return self._value
@@ -4,6 +4,7 @@ Django settings for condorshop_api project.
 import os
 from pathlib import Path
 import environ
+from django.core.exceptions import ImproperlyConfigured
 
 import pymysql
 pymysql.install_as_MySQLdb()
@@ -27,6 +28,39 @@ ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=['localhost', '127.0.0.1'])
 
 FRONTEND_RESET_URL = env('FRONTEND_RESET_URL', default='http://localhost:5173/reset-password')
 PASSWORD_RESET_TIMEOUT_HOURS = env.int('PASSWORD_RESET_TIMEOUT_HOURS', default=1)
+# Minutos que se retiene el stock de un carrito al iniciar el checkout
+STOCK_RESERVATION_MINUTES = env.int('STOCK_RESERVATION_MINUTES', default=15)
+# Horas que se conserva la respuesta asociada a un header Idempotency-Key
+IDEMPOTENCY_KEY_TTL_HOURS = env.int('IDEMPOTENCY_KEY_TTL_HOURS', default=24)
+# Filas leídas por consulta al exportar CSV desde el panel de administración
+EXPORT_CHUNK_SIZE = env.int('EXPORT_CHUNK_SIZE', default=2000)
+# Horas que se reutiliza (y luego se elimina) el archivo de un trabajo de exportación
+EXPORT_JOB_TTL_HOURS = env.int('EXPORT_JOB_TTL_HOURS', default=24)
+# Segundos de margen del feed de cambios de pedidos (no entrega cambios más recientes)
+ORDER_CHANGE_FEED_LAG_SECONDS = env.int('ORDER_CHANGE_FEED_LAG_SECONDS', default=5)
+# Sincronización incremental del catálogo: margen en segundos y días que se conservan las bajas
+CATALOG_SYNC_LAG_SECONDS = env.int('CATALOG_SYNC_LAG_SECONDS', default=5)
+CATALOG_DELETION_RETENTION_DAYS = env.int('CATALOG_DELETION_RETENTION_DAYS', default=90)
+
+# Webpay Plus (Transbank). Por defecto, ambiente de integración con las credenciales públicas de prueba
+WEBPAY_BASE_URL = env('WEBPAY_BASE_URL', default='https://webpay3gint.transbank.cl')
+WEBPAY_COMMERCE_CODE = env('WEBPAY_COMMERCE_CODE', default='597055555532')
+WEBPAY_API_KEY = env('WEBPAY_API_KEY', default='579B532A7440BB0C9079DED94D31EA1615BACEB56610332264630D42D0A36B1C')
+# URL del backend a la que Webpay devuelve al comprador y página del frontend que muestra el resultado
+WEBPAY_RETURN_URL = env('WEBPAY_RETURN_URL', default='http://localhost:8000/api/checkout/webpay/return')
+WEBPAY_FRONTEND_RESULT_URL = env('WEBPAY_FRONTEND_RESULT_URL', default='http://localhost:5173/checkout/result')
+# Timeouts (segundos), reintentos y conexiones abiertas del cliente HTTP de Webpay
+WEBPAY_CONNECT_TIMEOUT = env.float('WEBPAY_CONNECT_TIMEOUT', default=3.05)
+WEBPAY_READ_TIMEOUT = env.float('WEBPAY_READ_TIMEOUT', default=15)
+WEBPAY_MAX_RETRIES = env.int('WEBPAY_MAX_RETRIES', default=2)
+WEBPAY_POOL_SIZE = env.int('WEBPAY_POOL_SIZE', default=10)
+
+# Outbox de pedidos (python manage.py run_outbox): webhook de eventos, reintentos y retención
+ORDER_WEBHOOK_URL = env('ORDER_WEBHOOK_URL', default='')
+ORDER_WEBHOOK_SECRET = env('ORDER_WEBHOOK_SECRET', default='')
+OUTBOX_MAX_ATTEMPTS = env.int('OUTBOX_MAX_ATTEMPTS', default=8)
+OUTBOX_RETRY_SECONDS = env.int('OUTBOX_RETRY_SECONDS', default=30)
+OUTBOX_RETENTION_DAYS = env.int('OUTBOX_RETENTION_DAYS', default=7)
 
 # Application definition
 INSTALLED_APPS = [
@@ -44,9 +78,11 @@ INSTALLED_APPS = [
     # Local apps
     'condorshop_api.apps.CondorShopAPIConfig',
     'apps.users',
+    'apps.locations',
     'apps.products',
     'apps.cart',
     'apps.orders',
+    'apps.analytics',
     'apps.admin_panel',
     'apps.audit',
 ]
@@ -100,6 +136,27 @@ DATABASES = {
     }
 }
 
+# Caché compartida (rate limiting, versión del índice de envíos y de los alias de regiones).
+# La invalidación cambia una clave de versión en la caché, que todos los workers deben ver:
+# locmem es por proceso y solo sirve en desarrollo (DEBUG). En producción CACHE_URL es
+# obligatoria: Redis o Memcached (ej: rediscache://127.0.0.1:6379/1) no agregan SQL por
+# cotización; dbcache:// funciona sin otro servicio pero cuesta una consulta por cada versión
+# leída y requiere python manage.py createcachetable (ver README).
+if DEBUG:
+    CACHES = {'default': env.cache('CACHE_URL', default='locmemcache://')}
+else:
+    if not env('CACHE_URL', default=''):
+        raise ImproperlyConfigured(
+            'CACHE_URL es obligatoria con DEBUG=False (ej: rediscache://127.0.0.1:6379/1 o '
+            'dbcache://django_cache tras python manage.py createcachetable).'
+        )
+    CACHES = {'default': env.cache('CACHE_URL')}
+    if CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+        raise ImproperlyConfigured(
+            'CACHE_URL=locmemcache:// no es compartida entre procesos: los demás workers seguirían '
+            'usando un índice de envíos obsoleto. Usar rediscache://, pymemcache:// o dbcache:// en producción.'
+        )
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -190,6 +247,7 @@ CORS_ALLOW_HEADERS = [
     'x-csrftoken',
     'x-requested-with',
     'x-session-token',  # Para carrito de invitados
+    'idempotency-key',  # Reintentos seguros de checkout y pagos
 ]
 
 # Exponer headers personalizados para que el frontend pueda leerlos
@@ -228,6 +286,8 @@ EMAIL_HOST_USER = env('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', default='')
 EMAIL_USE_TLS = env.bool('EMAIL_USE_TLS', default=False)
 EMAIL_USE_SSL = env.bool('EMAIL_USE_SSL', default=False)
+# Acota la duración del handler de email del outbox (debe ser menor que su reserva, 300 s)
+EMAIL_TIMEOUT = env.int('EMAIL_TIMEOUT', default=10)
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='noreply@condorshop.cl')
 
 # Anymail settings (example with Mailgun)
@@ -0,0 +1,117 @@
+import csv
+import gzip
+import io
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.admin_panel.models import ExportJob
+from apps.orders.models import Order
+from tests.factories import ProductFactory
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    return tmp_path
+
+
+def _create_orders(status, count):
+    for index in range(count):
+        Order.objects.create(
+            status=status,
+            customer_name=f"Cliente {index}",
+            customer_email=f"cliente{index}@example.com",
+            shipping_street="Calle 1",
+            shipping_city="Santiago",
+            shipping_region="Metropolitana",
+            total_amount=1000,
+        )
+
+
+def _download_rows(admin_client, job_id):
+    response = admin_client.get(f"/api/admin/exports/{job_id}/download/")
+    assert response.status_code == 200
+    content = b"".join(response.streaming_content)
+    return list(csv.reader(io.StringIO(gzip.decompress(content).decode("utf-8"))))
+
+
+@pytest.mark.django_db
+def test_export_job_lifecycle(admin_client, pending_status):
+    _create_orders(pending_status, 5)
+
+    response = admin_client.post(
+        "/api/admin/exports/", {"kind": "ORDERS", "filters": {"status": str(pending_status.id)}}, format="json"
+    )
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.json()["status"] == "QUEUED"
+    assert response.json()["download_url"] is None
+
+    call_command("run_export_jobs", chunk_size=2)
+
+    status_data = admin_client.get(f"/api/admin/exports/{job_id}/").json()
+    assert status_data["status"] == "COMPLETED"
+    assert status_data["row_count"] == 5
+    assert status_data["download_url"].endswith(f"/api/admin/exports/{job_id}/download/")
+
+    rows = _download_rows(admin_client, job_id)
+    assert rows[0][0] == "ID"
+    assert len(rows) == 6
+
+
+@pytest.mark.django_db
+def test_identical_filters_reuse_job(admin_client):
+    ProductFactory.create_batch(3)
+    payload = {"kind": "PRODUCTS", "filters": {"active": "true"}}
+
+    first = admin_client.post("/api/admin/exports/", payload, format="json").json()
+    queued_again = admin_client.post("/api/admin/exports/", payload, format="json")
+    assert queued_again.status_code == 200
+    assert queued_again.json()["id"] == first["id"]
+
+    call_command("run_export_jobs")
+    reused = admin_client.post("/api/admin/exports/", {"kind": "PRODUCTS", "filters": {"active": " true "}}, format="json")
+    assert reused.json()["id"] == first["id"]
+    assert reused.json()["reused"] is True
+
+    # Fuera de EXPORT_JOB_TTL_HOURS se genera un archivo nuevo
+    ExportJob.objects.update(finished_at=timezone.now() - timedelta(days=2))
+    assert admin_client.post("/api/admin/exports/", payload, format="json").status_code == 202
+
+
+@pytest.mark.django_db
+def test_download_supports_range_requests(admin_client, pending_status):
+    _create_orders(pending_status, 50)
+    job_id = admin_client.post("/api/admin/exports/", {"kind": "ORDERS"}, format="json").json()["id"]
+    call_command("run_export_jobs")
+    full = b"".join(admin_client.get(f"/api/admin/exports/{job_id}/download/").streaming_content)
+
+    partial = admin_client.get(f"/api/admin/exports/{job_id}/download/", HTTP_RANGE="bytes=10-19")
+    assert partial.status_code == 206
+    assert partial["Content-Range"] == f"bytes 10-19/{len(full)}"
+    assert b"".join(partial.streaming_content) == full[10:20]
+
+    tail = admin_client.get(f"/api/admin/exports/{job_id}/download/", HTTP_RANGE="bytes=-5")
+    assert b"".join(tail.streaming_content) == full[-5:]
+
+    beyond = admin_client.get(f"/api/admin/exports/{job_id}/download/", HTTP_RANGE=f"bytes={len(full)}-")
+    assert beyond.status_code == 416
+    assert beyond["Content-Range"] == f"bytes */{len(full)}"
+
+
+@pytest.mark.django_db
+def test_export_job_rejects_unknown_filters(admin_client):
+    response = admin_client.post("/api/admin/exports/", {"kind": "AUDIT_LOGS", "filters": {"sku": "x"}}, format="json")
+
+    assert response.status_code == 400
+    assert "filters" in response.json()
+
+
+@pytest.mark.django_db
+def test_download_before_completion_conflicts(admin_client):
+    job_id = admin_client.post("/api/admin/exports/", {"kind": "AUDIT_LOGS"}, format="json").json()["id"]
+
+    assert admin_client.get(f"/api/admin/exports/{job_id}/download/").status_code == 409
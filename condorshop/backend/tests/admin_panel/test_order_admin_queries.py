@@ -0,0 +1,85 @@
+import pytest
+
+from apps.orders.models import OrderStatus, OrderStatusHistory
+from apps.orders.services import place_order
+from apps.products.models import ProductImage
+from tests.factories import CartFactory, CartItemFactory, ProductFactory, UserFactory
+
+
+ORDER_DATA = {
+    "customer_name": "Cliente",
+    "customer_email": "cliente@example.com",
+    "shipping_street": "Calle 1",
+    "shipping_city": "Santiago",
+    "shipping_region": "Región Metropolitana",
+}
+
+
+def _create_order(items=3, history=2):
+    user = UserFactory()
+    cart = CartFactory(user=user, session_token=None)
+    for index in range(items):
+        product = ProductFactory()
+        ProductImage.objects.create(product=product, url=f"https://cdn.example.com/{product.sku}.jpg", position=0)
+        CartItemFactory(cart=cart, product=product, quantity=index + 1)
+    order = place_order(cart, ORDER_DATA, user=user)
+    status = OrderStatus.objects.get_or_create(code="PREPARING")[0]
+    for _ in range(history):
+        OrderStatusHistory.objects.create(order=order, status=status, changed_by=UserFactory(), note="Cambio")
+    return order
+
+
+@pytest.mark.django_db
+def test_admin_order_list_is_flat(admin_client, pending_status, django_assert_num_queries):
+    for _ in range(3):
+        _create_order()
+
+    def fetch():
+        return admin_client.get("/api/admin/orders/")
+
+    # Savepoint/release, COUNT de la paginación, SELECT de pedidos con estado y usuario
+    # e INSERT de auditoría
+    with django_assert_num_queries(5):
+        response = fetch()
+    first_page = response.json()["results"]
+    assert len(first_page) == 3
+    assert "items" not in first_page[0]
+    assert first_page[0]["item_count"] == 6
+    assert first_page[0]["user_email"]
+
+    for _ in range(5):
+        _create_order(items=5, history=4)
+    with django_assert_num_queries(5):
+        assert len(fetch().json()["results"]) == 8
+
+
+@pytest.mark.django_db
+def test_admin_order_detail_prefetches_tree(admin_client, pending_status, django_assert_num_queries):
+    small = _create_order(items=1, history=1)
+    large = _create_order(items=6, history=5)
+
+    # Savepoint/release, pedido con estado y usuario, items, historial con estado y autor
+    # e INSERT de auditoría
+    with django_assert_num_queries(6):
+        small_data = admin_client.get(f"/api/admin/orders/{small.id}/").json()
+    with django_assert_num_queries(6):
+        large_data = admin_client.get(f"/api/admin/orders/{large.id}/").json()
+
+    assert len(small_data["items"]) == 1
+    assert len(large_data["items"]) == 6
+    assert len(large_data["status_history"]) == 6
+    assert large_data["status_history"][0]["changed_by_email"]
+
+
+@pytest.mark.django_db
+def test_admin_status_change_returns_new_history_entry(admin_client, pending_status):
+    order = _create_order(history=0)
+    preparing = OrderStatus.objects.get(code="PREPARING")
+
+    response = admin_client.patch(
+        f"/api/admin/orders/{order.id}/status/", {"status_id": preparing.id, "note": "En bodega"}, format="json"
+    )
+
+    assert response.status_code == 200
+    assert response.json()["status"]["code"] == "PREPARING"
+    assert "En bodega" in [entry["note"] for entry in response.json()["status_history"]]
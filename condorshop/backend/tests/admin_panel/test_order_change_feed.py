@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderStatus
+from apps.orders.state_machine import transition_orders
+
+
+@pytest.fixture(autouse=True)
+def no_lag(settings):
+    settings.ORDER_CHANGE_FEED_LAG_SECONDS = 0
+
+
+def _orders(status, count):
+    return [
+        Order.objects.create(
+            status=status,
+            customer_name=f"Cliente {index}",
+            customer_email="cliente@example.com",
+            shipping_street="Calle 1",
+            shipping_city="Santiago",
+            shipping_region="Metropolitana",
+            total_amount=10000,
+        )
+        for index in range(count)
+    ]
+
+
+def _feed(client, **params):
+    response = client.get("/api/admin/orders/changes/", params)
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+@pytest.mark.django_db
+def test_feed_pages_through_ties_and_resumes(admin_client, pending_status):
+    orders = _orders(pending_status, 5)
+    # Un cambio masivo deja el mismo updated_at en todos los pedidos
+    Order.objects.update(updated_at=timezone.now() - timedelta(minutes=1))
+
+    seen, cursor = [], None
+    while True:
+        page = _feed(admin_client, limit=2, **({"cursor": cursor} if cursor else {}))
+        seen += [order["id"] for order in page["results"]]
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            break
+    assert seen == [order.id for order in orders]
+
+    # Sin cambios: página vacía y el mismo cursor para seguir consultando
+    idle = _feed(admin_client, cursor=cursor)
+    assert (idle["results"], idle["next_cursor"], idle["has_more"]) == ([], cursor, False)
+
+    preparing = OrderStatus.objects.create(code="PREPARING")
+    transition_orders([orders[1].id], preparing, note="En bodega")
+
+    update = _feed(admin_client, cursor=cursor)
+    assert [order["id"] for order in update["results"]] == [orders[1].id]
+    assert update["results"][0]["status"]["code"] == "PREPARING"
+    assert update["results"][0]["status_history"][0]["note"] == "En bodega"
+
+
+@pytest.mark.django_db
+def test_feed_since_lag_and_invalid_cursor(admin_client, pending_status, settings):
+    old, recent = _orders(pending_status, 2)
+    Order.objects.filter(id=old.id).update(updated_at=timezone.now() - timedelta(days=2))
+    since = (timezone.now() - timedelta(days=1)).isoformat()
+
+    assert [order["id"] for order in _feed(admin_client, since=since)["results"]] == [recent.id]
+
+    settings.ORDER_CHANGE_FEED_LAG_SECONDS = 60
+    assert [order["id"] for order in _feed(admin_client)["results"]] == [old.id]
+
+    assert admin_client.get("/api/admin/orders/changes/?cursor=xyz").status_code == 400
+    assert admin_client.get("/api/admin/orders/changes/?since=ayer").status_code == 400
+
+
+@pytest.mark.django_db
+def test_feed_query_count_does_not_grow_with_page(admin_client, pending_status, django_assert_num_queries):
+    _orders(pending_status, 30)
+
+    # savepoint, usuario, pedidos, items, historial, release
+    with django_assert_num_queries(6):
+        page = _feed(admin_client, limit=25)
+
+    assert len(page["results"]) == 25
+    assert page["has_more"]
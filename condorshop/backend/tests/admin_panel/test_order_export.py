@@ -0,0 +1,73 @@
+import csv
+import gzip
+import io
+
+import pytest
+from django.test import override_settings
+
+from apps.orders.models import Order
+
+
+def _create_orders(status, count, **overrides):
+    return [
+        Order.objects.create(
+            status=status,
+            customer_name=f"Cliente {index}",
+            customer_email=overrides.get("customer_email", f"cliente{index}@example.com"),
+            shipping_street="Calle 1",
+            shipping_city="Santiago",
+            shipping_region="Metropolitana",
+            total_amount=10000 + index,
+        )
+        for index in range(count)
+    ]
+
+
+def _rows(content: bytes):
+    return list(csv.reader(io.StringIO(content.decode("utf-8"))))
+
+
+@pytest.mark.django_db
+def test_export_streams_csv_rows(admin_client, pending_status):
+    orders = _create_orders(pending_status, 3)
+
+    response = admin_client.get("/api/admin/orders/export/")
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Disposition"] == 'attachment; filename="orders_export.csv"'
+    rows = _rows(b"".join(response.streaming_content))
+    assert rows[0] == ["ID", "Fecha", "Cliente", "Email", "Total", "Estado", "Ciudad", "Región"]
+    assert [int(row[0]) for row in rows[1:]] == [order.id for order in orders]
+    assert rows[1][2:] == ["Cliente 0", "cliente0@example.com", "10000.00", "PENDING", "Santiago", "Metropolitana"]
+
+
+@pytest.mark.django_db
+def test_export_gzip_and_filters(admin_client, pending_status):
+    _create_orders(pending_status, 2)
+    target = _create_orders(pending_status, 1, customer_email="vip@example.com")[0]
+
+    response = admin_client.get("/api/admin/orders/export/?compress=gzip&customer_email=vip@example.com")
+
+    assert response["Content-Type"] == "application/gzip"
+    assert response["Content-Disposition"].endswith('orders_export.csv.gz"')
+    rows = _rows(gzip.decompress(b"".join(response.streaming_content)))
+    assert [row[0] for row in rows[1:]] == [str(target.id)]
+
+
+@pytest.mark.django_db
+@override_settings(EXPORT_CHUNK_SIZE=2)
+def test_export_reads_orders_in_bounded_chunks(admin_client, pending_status, django_assert_num_queries):
+    _create_orders(pending_status, 5)
+    response = admin_client.get("/api/admin/orders/export/")
+
+    # Lotes de 2 por clave: 2 + 2 + 1 filas y una consulta vacía que termina el recorrido
+    with django_assert_num_queries(4):
+        rows = _rows(b"".join(response.streaming_content))
+
+    assert len(rows) == 6
+
+
+@pytest.mark.django_db
+def test_export_requires_admin(auth_client):
+    assert auth_client.get("/api/admin/orders/export/").status_code == 403
@@ -0,0 +1,105 @@
+import csv
+import gzip
+import io
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from apps.orders.models import Order, OrderStatus
+from apps.orders.services import place_order
+from tests.factories import CartFactory, CartItemFactory, ProductFactory
+
+
+def _order(products, region="Región Metropolitana", quantity=1):
+    cart = CartFactory(user=None)
+    for product in products:
+        CartItemFactory(cart=cart, product=product, quantity=quantity)
+    return place_order(cart, {
+        "customer_name": "Cliente",
+        "customer_email": "cliente@example.com",
+        "shipping_street": "Calle 1",
+        "shipping_city": "Ciudad",
+        "shipping_region": region,
+    })
+
+
+@pytest.fixture
+def preparing(pending_status):
+    return OrderStatus.objects.get_or_create(code="PREPARING")[0]
+
+
+def _prepare(orders, status):
+    Order.objects.filter(id__in=[order.id for order in orders]).update(status=status)
+
+
+@pytest.mark.django_db
+def test_pick_list_totals_per_sku_and_region(admin_client, preparing, regions):
+    shirt = ProductFactory(sku="SKU-A", name="Polera", stock_qty=100)
+    mug = ProductFactory(sku="SKU-B", name="Taza", stock_qty=100)
+    _prepare([
+        _order([shirt, mug], quantity=2),
+        _order([shirt], quantity=3),
+        _order([shirt], region="Biobío", quantity=1),
+    ], preparing)
+    _order([mug], quantity=5)  # PENDING: no entra en la lista
+
+    response = admin_client.get("/api/admin/orders/pick-list/")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "PREPARING"
+    assert data["total_units"] == 8
+    shirt_entry, mug_entry = data["results"]
+    assert (shirt_entry["sku"], shirt_entry["name"], shirt_entry["quantity"], shirt_entry["orders"]) == ("SKU-A", "Polera", 6, 3)
+    assert {loc["region_code"]: (loc["quantity"], loc["orders"]) for loc in shirt_entry["locations"]} == {
+        "RM": (5, 2),
+        "BI": (1, 1),
+    }
+    assert (mug_entry["sku"], mug_entry["quantity"], mug_entry["orders"]) == ("SKU-B", 2, 1)
+
+
+@pytest.mark.django_db
+def test_pick_list_is_one_grouped_query(admin_client, preparing, regions, django_assert_num_queries):
+    products = [ProductFactory(stock_qty=100) for _ in range(3)]
+    _prepare([_order(products) for _ in range(6)], preparing)
+
+    # savepoint, usuario, regiones, agregado, release
+    with django_assert_num_queries(5) as captured:
+        response = admin_client.get("/api/admin/orders/pick-list/")
+
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 3
+    assert sum("FROM \"order_items\"" in query["sql"] for query in captured.captured_queries) == 1
+
+
+@pytest.mark.django_db
+def test_pick_list_filters_by_date_range(admin_client, preparing):
+    product = ProductFactory(stock_qty=100)
+    old, recent = _order([product], quantity=4), _order([product], quantity=1)
+    _prepare([old, recent], preparing)
+    Order.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=10))
+    today = timezone.localdate().isoformat()
+
+    response = admin_client.get(f"/api/admin/orders/pick-list/?date_from={today}&date_to={today}")
+
+    assert response.json()["total_units"] == 1
+    assert admin_client.get("/api/admin/orders/pick-list/?date_from=ayer").status_code == 400
+
+
+@pytest.mark.django_db
+def test_pick_list_export_streams_csv(admin_client, preparing, regions):
+    product = ProductFactory(sku="SKU-A", name="Polera", stock_qty=100)
+    _prepare([_order([product], quantity=2), _order([product], region="Biobío", quantity=1)], preparing)
+
+    response = admin_client.get("/api/admin/orders/pick-list/export/?compress=gzip")
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Disposition"].endswith('pick_list.csv.gz"')
+    rows = list(csv.reader(io.StringIO(gzip.decompress(b"".join(response.streaming_content)).decode("utf-8"))))
+    assert rows[0] == ["SKU", "Producto", "Región", "Cantidad", "Pedidos", "Total SKU"]
+    assert sorted(rows[1:]) == [
+        ["SKU-A", "Polera", "Biobío", "1", "1", "3"],
+        ["SKU-A", "Polera", "Metropolitana de Santiago", "2", "1", "3"],
+    ]
@@ -0,0 +1,165 @@
+import decimal
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.analytics.models import DailyCategorySalesRollup, DailySalesRollup
+from apps.analytics.services import rebuild_day
+from apps.orders.models import OrderStatus
+from apps.orders.outbox import HANDLERS, claim_events, process_events
+from apps.orders.services import place_order
+from apps.orders.state_machine import transition_orders
+from tests.factories import CartFactory, CartItemFactory, CategoryFactory, ProductFactory
+
+
+def _order_data(region="Región Metropolitana"):
+    return {
+        "customer_name": "Cliente",
+        "customer_email": "cliente@example.com",
+        "shipping_street": "Calle 1",
+        "shipping_city": "Ciudad",
+        "shipping_region": region,
+    }
+
+
+def _place(items, region="Región Metropolitana"):
+    cart = CartFactory(user=None)
+    for product, quantity in items:
+        CartItemFactory(cart=cart, product=product, quantity=quantity, unit_price=product.final_price)
+    return place_order(cart, _order_data(region))
+
+
+def _snapshot():
+    sales = sorted(
+        DailySalesRollup.objects.values_list("day", "region_code", "status_code", "order_count", "units", "revenue")
+    )
+    categories = sorted(
+        DailyCategorySalesRollup.objects.filter(order_count__gt=0).values_list(
+            "day", "category_id", "status_code", "order_count", "units", "revenue"
+        )
+    )
+    return [row for row in sales if row[3]], categories
+
+
+@pytest.fixture
+def catalog():
+    shoes, shirts = CategoryFactory(name="Zapatos"), CategoryFactory(name="Poleras")
+    return {
+        "shoe": ProductFactory(category=shoes, price=decimal.Decimal("30000.00")),
+        "shirt": ProductFactory(category=shirts, price=decimal.Decimal("10000.00")),
+    }
+
+
+@pytest.mark.django_db
+def test_incremental_rollups_match_rebuild(admin_client, pending_status, regions, catalog):
+    cancelled = OrderStatus.objects.create(code="CANCELLED")
+    first = _place([(catalog["shoe"], 1), (catalog["shirt"], 2)])
+    _place([(catalog["shirt"], 1)], region="Biobío")
+
+    # El cambio de estado llega antes que el worker: las sumas conmutan
+    response = admin_client.patch(
+        f"/api/admin/orders/{first.id}/status/", {"status_id": cancelled.id}, format="json"
+    )
+    assert response.status_code == 200
+    assert process_events()["done"] == 3
+
+    incremental = _snapshot()
+    today = timezone.localdate().isoformat()
+    call_command("rebuild_sales_rollups", date_from=today, date_to=today)
+
+    assert _snapshot() == incremental
+    pending = DailySalesRollup.objects.get(status_code="PENDING", order_count__gt=0)
+    assert pending.region_code == "BI"
+    assert pending.units == 1
+
+
+@pytest.mark.django_db
+def test_status_change_moves_rollups_from_the_outbox(pending_status, regions, catalog):
+    paid = OrderStatus.objects.create(code="PAID")
+    order = _place([(catalog["shoe"], 1)])
+    process_events()
+
+    # El cambio de estado no escribe en los rollups: solo registra el evento
+    transition_orders([order.id], paid)
+    assert DailySalesRollup.objects.get(status_code="PENDING").order_count == 1
+    assert not DailySalesRollup.objects.filter(status_code="PAID").exists()
+
+    # Un evento repetido (lease vencido) no traslada el pedido dos veces
+    (event,) = claim_events(batch_size=10)
+    HANDLERS[event.kind](event)
+    HANDLERS[event.kind](event)
+    counts = dict(DailySalesRollup.objects.values_list("status_code", "order_count"))
+    assert counts == {"PENDING": 0, "PAID": 1}
+
+
+@pytest.mark.django_db
+def test_checkout_rollup_is_counted_once(pending_status, regions, catalog):
+    _place([(catalog["shoe"], 1)])
+    assert not DailySalesRollup.objects.exists()
+
+    # Dos workers ejecutan el mismo evento (la reserva del primero venció)
+    (event,) = claim_events(batch_size=10)
+    HANDLERS[event.kind](event)
+    HANDLERS[event.kind](event)
+    assert process_events() == {"done": 0, "retried": 0, "failed": 0}
+    assert DailySalesRollup.objects.get().order_count == 1
+
+    # El recálculo del día cubre los eventos aún pendientes
+    _place([(catalog["shirt"], 2)])
+    rebuild_day(timezone.localdate())
+    process_events()
+    rollup = DailySalesRollup.objects.get()
+    assert (rollup.order_count, rollup.units) == (2, 3)
+
+
+@pytest.mark.django_db
+def test_analytics_endpoints_read_rollups(
+    admin_client, pending_status, regions, catalog, django_assert_max_num_queries
+):
+    _place([(catalog["shoe"], 1), (catalog["shirt"], 2)])
+    _place([(catalog["shoe"], 2)], region="Biobío")
+    process_events()
+    today = timezone.localdate()
+    query = f"?date_from={today.isoformat()}&date_to={today.isoformat()}"
+
+    # Savepoint/release, una consulta de agregación y el INSERT de auditoría
+    with django_assert_max_num_queries(4):
+        summary = admin_client.get(f"/api/admin/analytics/summary/{query}").json()
+    assert summary["orders"] == 2
+    assert summary["units"] == 5
+    assert summary["average_order_value"] == summary["revenue"] // 2
+
+    regions = admin_client.get(f"/api/admin/analytics/regions/{query}").json()["results"]
+    assert {row["region_code"] for row in regions} == {"RM", "BI"}
+
+    categories = admin_client.get(f"/api/admin/analytics/categories/{query}").json()["results"]
+    assert categories[0]["category_name"] == "Zapatos"
+    assert categories[0]["units"] == 3
+    assert categories[0]["orders"] == 2
+
+    statuses = admin_client.get(f"/api/admin/analytics/statuses/{query}").json()["results"]
+    assert statuses == [{"status": "PENDING", **{key: summary[key] for key in statuses[0] if key != "status"}}]
+
+
+@pytest.mark.django_db
+def test_daily_series_fills_days_without_sales(admin_client, pending_status, catalog):
+    _place([(catalog["shirt"], 1)])
+    process_events()
+    today = timezone.localdate()
+    start = today - timezone.timedelta(days=2)
+
+    results = admin_client.get(
+        f"/api/admin/analytics/daily/?date_from={start.isoformat()}&date_to={today.isoformat()}"
+    ).json()["results"]
+
+    assert [row["orders"] for row in results] == [0, 0, 1]
+    assert results[-1]["day"] == today.isoformat()
+
+
+@pytest.mark.django_db
+def test_analytics_rejects_invalid_ranges(admin_client):
+    assert admin_client.get("/api/admin/analytics/summary/?date_from=ayer").status_code == 400
+    response = admin_client.get("/api/admin/analytics/summary/?date_from=2025-02-01&date_to=2025-01-01")
+    assert response.status_code == 400
+    assert "error" in response.json()
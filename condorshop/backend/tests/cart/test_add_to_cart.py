@@ -0,0 +1,127 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+import pytest
+from django.db import connection
+from rest_framework.test import APIClient
+
+from apps.cart import services
+from apps.cart.models import CartItem
+from apps.cart.services import CartStockError, add_item
+from tests.factories import CartFactory, CartItemFactory, ProductFactory
+
+
+@pytest.mark.django_db
+def test_add_to_cart_increments_existing_item(api_client):
+    product = ProductFactory(stock_qty=10)
+    cart = CartFactory(session_token="guest-add-token")
+
+    for _ in range(2):
+        response = api_client.post(
+            "/api/cart/add",
+            {"product_id": product.id, "quantity": 3},
+            format="json",
+            HTTP_X_SESSION_TOKEN=cart.session_token,
+        )
+        assert response.status_code == 201, response.content
+
+    item = CartItem.objects.get(cart=cart, product=product)
+    assert item.quantity == 6
+    assert item.unit_price == product.final_price
+
+
+@pytest.mark.django_db
+def test_add_to_cart_rejects_increment_over_stock(api_client):
+    product = ProductFactory(stock_qty=5)
+    cart = CartFactory(session_token="guest-stock-token")
+    CartItemFactory(cart=cart, product=product, quantity=4)
+
+    response = api_client.post(
+        "/api/cart/add",
+        {"product_id": product.id, "quantity": 2},
+        format="json",
+        HTTP_X_SESSION_TOKEN=cart.session_token,
+    )
+
+    assert response.status_code == 400
+    assert response.json()["error"] == "Stock insuficiente. Disponible: 5"
+    assert CartItem.objects.get(cart=cart, product=product).quantity == 4
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(
+    not connection.features.has_select_for_update,
+    reason="Requiere un motor con bloqueo por fila (MySQL/PostgreSQL)",
+)
+def test_parallel_adds_do_not_lose_updates():
+    product = ProductFactory(stock_qty=100)
+    cart = CartFactory(session_token="guest-parallel-token")
+
+    def add_one(_):
+        try:
+            client = APIClient()
+            return client.post(
+                "/api/cart/add",
+                {"product_id": product.id, "quantity": 1},
+                format="json",
+                HTTP_X_SESSION_TOKEN=cart.session_token,
+            ).status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=50) as executor:
+        statuses = list(executor.map(add_one, range(50)))
+
+    assert statuses == [201] * 50
+    assert CartItem.objects.get(cart=cart, product=product).quantity == 50
+
+
+class FakeMySQLConnection:
+    """Conexión MySQL simulada: la lectura bloqueante retorna `previous` y el upsert `rowcount`."""
+
+    vendor = "mysql"
+
+    def __init__(self, previous, rowcount):
+        self.previous = previous
+        self.upsert_rowcount = rowcount
+        self.statements = []
+        self.rowcount = -1
+
+    def cursor(self):
+        return nullcontext(self)
+
+    def execute(self, sql, params):
+        self.statements.append(sql)
+        if sql.lstrip().startswith("INSERT"):
+            self.rowcount = self.upsert_rowcount
+
+    def fetchone(self):
+        return (self.previous,)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "previous, rowcount, added",
+    [
+        (None, 0, False),  # sin stock para insertar
+        (None, 1, True),  # fila insertada
+        (4, 2, True),  # incremento aplicado
+        (4, 1, False),  # incremento rechazado: la fila queda igual
+        (4, 0, False),
+    ],
+)
+def test_add_item_mysql_outcome_from_rowcount(monkeypatch, previous, rowcount, added):
+    product = ProductFactory(stock_qty=5)
+    cart = CartFactory(session_token="guest-mysql-token")
+    fake = FakeMySQLConnection(previous, rowcount)
+    monkeypatch.setattr(services, "connection", fake)
+
+    if added:
+        add_item(cart, product, 1)
+    else:
+        with pytest.raises(CartStockError):
+            add_item(cart, product, 1)
+
+    lock_sql, upsert_sql = fake.statements
+    assert "FOR UPDATE" in lock_sql
+    assert "AS new" in upsert_sql and "VALUES(" not in upsert_sql
@@ -0,0 +1,24 @@
+import pytest
+
+from tests.factories import CartFactory, CartItemFactory
+
+
+@pytest.mark.django_db
+def test_cart_count_sums_quantities_in_one_query(api_client, django_assert_num_queries):
+    cart = CartFactory(session_token="guest-count-token")
+    CartItemFactory(cart=cart, quantity=2)
+    CartItemFactory(cart=cart, quantity=3)
+
+    with django_assert_num_queries(1):
+        response = api_client.get("/api/cart/count", HTTP_X_SESSION_TOKEN=cart.session_token)
+
+    assert response.status_code == 200
+    assert response.json() == {"count": 5}
+
+
+@pytest.mark.django_db
+def test_cart_count_without_session_is_zero(api_client, django_assert_num_queries):
+    with django_assert_num_queries(0):
+        response = api_client.get("/api/cart/count")
+
+    assert response.json() == {"count": 0}
@@ -0,0 +1,49 @@
+import pytest
+
+from apps.cart.models import Cart, CartItem
+from tests.factories import CartFactory, CartItemFactory, ProductFactory
+
+
+@pytest.mark.django_db
+def test_login_merges_guest_cart_into_user_cart(api_client, user):
+    shared = ProductFactory(stock_qty=6)
+    guest_only = ProductFactory(stock_qty=10)
+    user_cart = CartFactory(user=user, session_token=None)
+    CartItemFactory(cart=user_cart, product=shared, quantity=2)
+    guest_cart = CartFactory(session_token="guest-merge-token")
+    CartItemFactory(cart=guest_cart, product=shared, quantity=5)
+    CartItemFactory(cart=guest_cart, product=guest_only, quantity=1)
+
+    response = api_client.post(
+        "/api/auth/login",
+        {"email": user.email, "password": "Password123!"},
+        format="json",
+        HTTP_X_SESSION_TOKEN=guest_cart.session_token,
+    )
+
+    assert response.status_code == 200
+    quantities = dict(CartItem.objects.filter(cart=user_cart).values_list("product_id", "quantity"))
+    assert quantities == {shared.id: 6, guest_only.id: 1}  # 2 + 5 acotado al stock
+    guest_cart.refresh_from_db()
+    assert guest_cart.is_active is False
+    assert not guest_cart.items.exists()
+
+
+@pytest.mark.django_db
+def test_token_obtain_adopts_guest_cart_when_user_has_none(api_client, user):
+    guest_cart = CartFactory(session_token="guest-adopt-token")
+    CartItemFactory(cart=guest_cart, quantity=3)
+
+    response = api_client.post(
+        "/api/auth/token/",
+        {"email": user.email, "password": "Password123!"},
+        format="json",
+        HTTP_X_SESSION_TOKEN=guest_cart.session_token,
+    )
+
+    assert response.status_code == 200
+    assert "access" in response.json()
+    cart = Cart.objects.get(user=user, is_active=True)
+    assert cart.id == guest_cart.id
+    assert cart.session_token is None
+    assert cart.items.get().quantity == 3
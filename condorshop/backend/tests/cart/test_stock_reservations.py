@@ -0,0 +1,148 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.cart.models import CartItem, StockReservation
+from apps.cart.services import reserve_cart_stock
+from tests.factories import CartFactory, CartItemFactory, ProductFactory
+
+
+CHECKOUT_PAYLOAD = {
+    "customer_name": "Invitado Tester",
+    "customer_email": "guest@example.com",
+    "shipping_street": "Los Álamos 456",
+    "shipping_city": "Concepción",
+    "shipping_region": "Biobío",
+}
+
+
+@pytest.mark.django_db
+def test_reservation_holds_stock_against_other_carts(api_client, pending_status):
+    product = ProductFactory(stock_qty=3)
+    first = CartFactory(session_token="reserve-first")
+    second = CartFactory(session_token="reserve-second")
+    CartItemFactory(cart=first, product=product, quantity=2)
+    CartItemFactory(cart=second, product=product, quantity=2)
+
+    response = api_client.post("/api/checkout/reserve", HTTP_X_SESSION_TOKEN=first.session_token)
+    assert response.status_code == 200, response.content
+    assert StockReservation.objects.get(cart=first).quantity == 2
+
+    response = api_client.post("/api/checkout/reserve", HTTP_X_SESSION_TOKEN=second.session_token)
+    assert response.status_code == 400
+    assert response.json()["items"][0]["available"] == 1
+
+    response = api_client.post(
+        "/api/orders/create", CHECKOUT_PAYLOAD, format="json", HTTP_X_SESSION_TOKEN=second.session_token
+    )
+    assert response.status_code == 400
+
+    response = api_client.post(
+        "/api/orders/create", CHECKOUT_PAYLOAD, format="json", HTTP_X_SESSION_TOKEN=first.session_token
+    )
+    assert response.status_code == 201, response.content
+    assert not StockReservation.objects.filter(cart=first).exists()
+
+
+@pytest.mark.django_db
+def test_expired_reservations_are_ignored_and_swept():
+    product = ProductFactory(stock_qty=1)
+    StockReservation.objects.create(
+        cart=CartFactory(),
+        product=product,
+        quantity=1,
+        expires_at=timezone.now() - timedelta(minutes=1),
+    )
+    cart = CartFactory()
+    CartItemFactory(cart=cart, product=product, quantity=1)
+
+    expires_at, shortages = reserve_cart_stock(cart)
+    assert shortages == []
+    assert expires_at > timezone.now()
+
+    call_command("expire_stock_reservations", batch_size=1)
+    assert list(StockReservation.objects.values_list("cart_id", flat=True)) == [cart.id]
+
+
+@pytest.mark.django_db
+def test_add_to_cart_counts_other_carts_reservations(api_client):
+    product = ProductFactory(stock_qty=3)
+    holder = CartFactory(session_token="reserve-holder")
+    CartItemFactory(cart=holder, product=product, quantity=2)
+    assert reserve_cart_stock(holder)[1] == []
+    cart = CartFactory(session_token="reserve-shopper")
+
+    response = api_client.post(
+        "/api/cart/add", {"product_id": product.id, "quantity": 2}, format="json",
+        HTTP_X_SESSION_TOKEN=cart.session_token,
+    )
+    assert response.status_code == 400
+    assert response.json()["error"] == "Stock insuficiente. Disponible: 1"
+
+    response = api_client.post(
+        "/api/cart/add", {"product_id": product.id, "quantity": 1}, format="json",
+        HTTP_X_SESSION_TOKEN=cart.session_token,
+    )
+    assert response.status_code == 201, response.content
+    response = api_client.post(
+        "/api/cart/add", {"product_id": product.id, "quantity": 1}, format="json",
+        HTTP_X_SESSION_TOKEN=cart.session_token,
+    )
+    assert response.status_code == 400
+    assert CartItem.objects.get(cart=cart, product=product).quantity == 1
+
+    # Las reservas propias no se descuentan
+    response = api_client.post(
+        "/api/cart/add", {"product_id": product.id, "quantity": 1}, format="json",
+        HTTP_X_SESSION_TOKEN=holder.session_token,
+    )
+    assert response.status_code == 201, response.content
+
+
+@pytest.mark.django_db
+def test_update_cart_item_counts_other_carts_reservations(api_client):
+    product = ProductFactory(stock_qty=5)
+    holder = CartFactory(session_token="reserve-holder")
+    CartItemFactory(cart=holder, product=product, quantity=3)
+    assert reserve_cart_stock(holder)[1] == []
+    cart = CartFactory(session_token="reserve-editor")
+    item = CartItemFactory(cart=cart, product=product, quantity=1)
+
+    response = api_client.patch(
+        f"/api/cart/items/{item.id}", {"quantity": 3}, format="json", HTTP_X_SESSION_TOKEN=cart.session_token
+    )
+    assert response.status_code == 400
+    assert response.json()["error"] == "Stock insuficiente. Disponible: 2"
+
+    response = api_client.patch(
+        f"/api/cart/items/{item.id}", {"quantity": 2}, format="json", HTTP_X_SESSION_TOKEN=cart.session_token
+    )
+    assert response.status_code == 200, response.content
+    item.refresh_from_db()
+    assert item.quantity == 2
+
+
+@pytest.mark.django_db
+def test_login_merge_caps_quantities_at_unreserved_stock(api_client, user):
+    product = ProductFactory(stock_qty=6)
+    holder = CartFactory(session_token="reserve-holder")
+    CartItemFactory(cart=holder, product=product, quantity=2)
+    assert reserve_cart_stock(holder)[1] == []
+    user_cart = CartFactory(user=user, session_token=None)
+    CartItemFactory(cart=user_cart, product=product, quantity=2)
+    guest_cart = CartFactory(session_token="reserve-guest")
+    CartItemFactory(cart=guest_cart, product=product, quantity=3)
+    # La reserva del propio invitado no se descuenta
+    assert reserve_cart_stock(guest_cart)[1] == []
+
+    response = api_client.post(
+        "/api/auth/login",
+        {"email": user.email, "password": "Password123!"},
+        format="json",
+        HTTP_X_SESSION_TOKEN=guest_cart.session_token,
+    )
+
+    assert response.status_code == 200
+    assert CartItem.objects.get(cart=user_cart, product=product).quantity == 4  # 2 + 3 acotado a 6 - 2
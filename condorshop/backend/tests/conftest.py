@@ -1,4 +1,8 @@
+import importlib
+
 import pytest
+from django.apps import apps
+from django.core.cache import cache
 from rest_framework.test import APIClient
 
 from apps.orders.models import OrderStatus
@@ -21,8 +25,30 @@ def auth_client(api_client, user):
     return api_client
 
 
+@pytest.fixture
+def admin_client():
+    client = APIClient()
+    client.force_authenticate(user=UserFactory(role="admin"))
+    return client
+
+
 @pytest.fixture
 def pending_status():
     return OrderStatus.objects.get_or_create(code="PENDING", defaults={"description": "Pendiente"})[0]
 
 
+@pytest.fixture
+def regions(db):
+    # Los tests corren sin migraciones: cargar el catálogo de regiones de 0002_seed_regions
+    importlib.import_module("apps.locations.migrations.0002_seed_regions").seed_regions(apps, None)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    # Los tests corren en un solo proceso: caché local, que sobrevive al rollback de cada test
+    # (versión del índice de envíos, rate limits). Los conteos de consultas no incluyen las
+    # lecturas de versión de CACHE_URL=dbcache://; su costo se mide aparte en test_shipping_index
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    cache.clear()
+    yield
+    cache.clear()
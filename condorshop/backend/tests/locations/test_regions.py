@@ -0,0 +1,63 @@
+import pytest
+
+from apps.locations.models import Region
+from apps.locations.services import resolve_region_code
+from apps.orders.models import ShippingZone, ShippingZoneRegion
+from apps.orders.services import evaluate_shipping, place_order
+from apps.users.models import Address
+from tests.factories import CartFactory, CartItemFactory, ProductFactory
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "value, code",
+    [
+        ("Región Metropolitana", "RM"),
+        ("metropolitana", "RM"),
+        ("Región Metropolitana de Santiago", "RM"),
+        ("RM", "RM"),
+        ("Región del Biobío", "BI"),
+        ("bio bio", "BI"),
+        ("O'Higgins", "LI"),
+        ("ohiggins", "LI"),
+        ("Región de Los Ríos", "LR"),
+        ("NUBLE", "NB"),
+        ("Atlántida", None),
+        ("", None),
+    ],
+)
+def test_resolve_region_code_handles_spelling_variants(regions, value, code):
+    assert resolve_region_code(value) == code
+
+
+@pytest.mark.django_db
+def test_zone_matches_by_region_code(regions):
+    zone = ShippingZone.objects.create(name="Sur", code="SUR", regions=[])
+    ShippingZoneRegion.objects.create(zone=zone, region=Region.objects.get(code="BI"))
+    items = [CartItemFactory(product=ProductFactory())]
+
+    assert evaluate_shipping("Región del Biobío", 10000, items)["zone"] == "Sur"
+    assert evaluate_shipping("biobio", 10000, items)["zone"] == "Sur"
+    assert evaluate_shipping("Maule", 10000, items)["zone"] is None
+
+
+@pytest.mark.django_db
+def test_address_stores_region_code(regions, user):
+    address = Address.objects.create(user=user, street="Av. Alemania 100", city="Temuco", region="Araucanía")
+
+    assert address.region_code == "AR"
+
+
+@pytest.mark.django_db
+def test_order_stores_shipping_region_code(regions, pending_status):
+    cart = CartFactory()
+    CartItemFactory(cart=cart, product=ProductFactory())
+    order = place_order(cart, {
+        "customer_name": "Tester",
+        "customer_email": "tester@example.com",
+        "shipping_street": "Calle 1",
+        "shipping_city": "Valparaíso",
+        "shipping_region": "Región de Valparaíso",
+    })
+
+    assert order.shipping_region_code == "VS"
@@ -0,0 +1,125 @@
+import pytest
+
+from apps.audit.models import AuditLog
+from apps.orders.models import AllocationTicket, Order, OutboxEvent
+from apps.orders.outbox import process_events
+from apps.orders.services import allocate_queued_orders, enqueue_allocation
+from apps.users.models import Address
+from tests.factories import CartFactory, CartItemFactory, ProductFactory
+
+
+PAYLOAD = {
+    "customer_name": "Invitado Flash",
+    "customer_email": "flash@example.com",
+    "shipping_street": "Calle Falsa 123",
+    "shipping_city": "Santiago",
+    "shipping_region": "Región Metropolitana",
+}
+
+
+def _queue_checkout(api_client, product, token, quantity=1):
+    cart = CartFactory(user=None, session_token=token)
+    CartItemFactory(cart=cart, product=product, quantity=quantity)
+    return api_client.post("/api/orders/create", PAYLOAD, format="json", HTTP_X_SESSION_TOKEN=token)
+
+
+@pytest.mark.django_db
+def test_queued_product_checkout_returns_ticket_without_touching_stock(api_client, pending_status):
+    product = ProductFactory(stock_qty=5, queued_allocation=True)
+
+    response = _queue_checkout(api_client, product, "flash-1", quantity=2)
+
+    assert response.status_code == 202, response.content
+    data = response.json()
+    assert data["status"] == "QUEUED"
+    assert not Order.objects.exists()
+    product.refresh_from_db()
+    assert product.stock_qty == 5
+
+    poll = api_client.get(data["poll_url"])
+    assert poll.status_code == 200
+    assert poll.json()["status"] == "QUEUED"
+
+    # Reintento del mismo carrito: mismo ticket
+    retry = api_client.post("/api/orders/create", PAYLOAD, format="json", HTTP_X_SESSION_TOKEN="flash-1")
+    assert retry.json()["ticket"] == data["ticket"]
+
+
+@pytest.mark.django_db
+def test_allocator_grants_in_arrival_order_and_rejects_when_sold_out(api_client, pending_status):
+    product = ProductFactory(stock_qty=3, queued_allocation=True)
+    tickets = [
+        _queue_checkout(api_client, product, f"flash-{index}", quantity=2).json()
+        for index in range(2)
+    ]
+
+    granted, rejected = allocate_queued_orders(product.id)
+
+    assert (granted, rejected) == (1, 1)
+    product.refresh_from_db()
+    assert product.stock_qty == 1
+
+    first = api_client.get(tickets[0]["poll_url"]).json()
+    assert first["status"] == "GRANTED"
+    assert first["order"]["items"][0]["quantity"] == 2
+
+    second = api_client.get(tickets[1]["poll_url"]).json()
+    assert second["status"] == "REJECTED"
+    assert "Stock insuficiente" in second["error"]
+    assert AllocationTicket.objects.filter(status=AllocationTicket.STATUS_QUEUED).count() == 0
+
+
+@pytest.mark.django_db
+def test_allocator_rejects_ticket_with_unexpected_error_and_keeps_going(api_client, pending_status):
+    product = ProductFactory(stock_qty=3, queued_allocation=True)
+    broken_cart = CartFactory(user=None, session_token="flash-broken")
+    CartItemFactory(cart=broken_cart, product=product, quantity=1)
+    broken = enqueue_allocation(broken_cart, product.id, {**PAYLOAD, "unknown_field": "x"})
+    ticket = _queue_checkout(api_client, product, "flash-ok").json()
+
+    granted, rejected = allocate_queued_orders(product.id)
+
+    assert (granted, rejected) == (1, 1)
+    broken.refresh_from_db()
+    assert broken.status == AllocationTicket.STATUS_REJECTED
+    assert broken.error == "No se pudo crear el pedido"
+    assert broken.order is None
+    assert api_client.get(ticket["poll_url"]).json()["status"] == "GRANTED"
+    product.refresh_from_db()
+    assert product.stock_qty == 2
+    assert Order.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_allocated_order_records_audit_and_saved_address(auth_client, user, pending_status):
+    product = ProductFactory(stock_qty=3, queued_allocation=True)
+    cart = CartFactory(user=user, session_token=None)
+    CartItemFactory(cart=cart, product=product, quantity=1)
+
+    response = auth_client.post(
+        "/api/orders/create",
+        {**PAYLOAD, "save_address": True, "address_label": "Casa"},
+        format="json",
+        REMOTE_ADDR="10.0.0.7",
+    )
+    assert response.status_code == 202, response.content
+    assert allocate_queued_orders(product.id) == (1, 0)
+
+    order = Order.objects.get()
+    assert sorted(OutboxEvent.objects.filter(order=order).values_list("kind", flat=True)) == [
+        "AUDIT", "SALES_ROLLUP", "SAVE_ADDRESS",
+    ]
+
+    process_events()
+    address = Address.objects.get(user=user)
+    assert (address.label, address.street) == ("Casa", "Calle Falsa 123")
+    log = AuditLog.objects.get(table_name="orders", record_id=order.id)
+    assert log.user == user
+    assert log.ip_address == "10.0.0.7"
+
+
+@pytest.mark.django_db
+def test_allocation_status_unknown_ticket_returns_404(api_client):
+    response = api_client.get("/api/checkout/allocation/00000000-0000-0000-0000-000000000000")
+
+    assert response.status_code == 404
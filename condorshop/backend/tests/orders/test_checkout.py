@@ -1,9 +1,18 @@
+import datetime
 import decimal
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-from apps.cart.models import Cart
-from apps.orders.models import Order
+from apps.cart.models import Cart, StockReservation
+from apps.locations.services import resolve_region_code
+from apps.orders.models import Order, ShippingRule, ShippingZone
+from apps.orders.services import InsufficientStockError, place_order
+from apps.orders.shipping_index import get_shipping_index
+from apps.products.models import Product, ProductImage
+from apps.users.models import Address
 from tests.factories import CartFactory, CartItemFactory, ProductFactory
 
 
@@ -93,3 +102,190 @@ def test_guest_checkout_creates_order_with_session_token(api_client, pending_sta
     assert not cart.is_active
 
 
+def _order_data():
+    return {
+        "customer_name": "Tester",
+        "customer_email": "tester@example.com",
+        "customer_phone": "",
+        "shipping_street": "Calle Falsa 123",
+        "shipping_city": "Santiago",
+        "shipping_region": "Región Metropolitana",
+        "shipping_postal_code": "",
+    }
+
+
+def _cart_with_items(count, quantity=1, stock=10, token=None):
+    cart = CartFactory(user=None, session_token=token or f"bench-{count}")
+    for _ in range(count):
+        CartItemFactory(cart=cart, product=ProductFactory(stock_qty=stock), quantity=quantity)
+    return cart
+
+
+@pytest.mark.django_db
+def test_place_order_query_count_does_not_grow_with_cart_size(pending_status):
+    small_cart = _cart_with_items(1)
+    large_cart = _cart_with_items(8)
+    # Compilar el índice de envíos y el mapa de regiones fuera de la medición
+    get_shipping_index()
+    resolve_region_code("Región Metropolitana")
+
+    with CaptureQueriesContext(connection) as small:
+        place_order(small_cart, _order_data())
+    with CaptureQueriesContext(connection) as large:
+        order = place_order(large_cart, _order_data())
+
+    assert len(large) == len(small)
+    assert order.items.count() == 8
+    assert all(item.product.stock_qty == 9 for item in order.items.select_related("product"))
+
+
+@pytest.mark.django_db
+def test_place_order_insufficient_stock_writes_nothing(pending_status):
+    cart = _cart_with_items(2, quantity=3, stock=5)
+    short_item = cart.items.first()
+    short_item.product.stock_qty = 2
+    short_item.product.save()
+
+    with pytest.raises(InsufficientStockError) as exc_info:
+        place_order(cart, _order_data())
+
+    assert exc_info.value.product.id == short_item.product_id
+    assert exc_info.value.available == 2
+    assert exc_info.value.required == 3
+    assert not Order.objects.exists()
+    assert sorted(item.product.stock_qty for item in cart.items.select_related("product")) == [2, 5]
+    cart.refresh_from_db()
+    assert cart.is_active
+
+
+@pytest.mark.django_db
+def test_multi_region_shipping_quote_fetches_products_once(api_client, django_assert_max_num_queries):
+    zone = ShippingZone.objects.create(name="Centro", code="CENTRO", regions=["Región Metropolitana"])
+    ShippingRule.objects.create(zone=zone, rule_type="ALL", base_cost=decimal.Decimal("2500.00"))
+    products = [ProductFactory(price=decimal.Decimal("10000.00")) for _ in range(5)]
+    payload = {
+        "regions": ["Región Metropolitana", "Biobío", "Los Lagos"],
+        "cart_items": [{"product_id": product.id, "quantity": 1} for product in products],
+    }
+    api_client.post("/api/checkout/shipping-quote", payload, format="json")  # compila el índice
+
+    with django_assert_max_num_queries(1) as captured:
+        response = api_client.post("/api/checkout/shipping-quote", payload, format="json")
+
+    assert response.status_code == 200
+    assert sum("FROM \"products\"" in query["sql"] for query in captured.captured_queries) == 1
+    quotes = {quote["region"]: quote for quote in response.json()["quotes"]}
+    assert quotes["Región Metropolitana"]["cost"] == 2500
+    assert quotes["Biobío"]["zone"] is None
+
+
+@pytest.mark.django_db
+def test_shipping_quote_subtotal_uses_final_price(api_client):
+    product = ProductFactory(price=decimal.Decimal("60000.00"), discount_price=40000)
+
+    response = api_client.post(
+        "/api/checkout/shipping-quote",
+        {"region": "Región Metropolitana", "cart_items": [{"product_id": product.id, "quantity": 1}]},
+        format="json",
+    )
+
+    # 40.000 con descuento no alcanza el umbral de envío gratis (50.000)
+    assert response.status_code == 200
+    assert response.json()["cost"] > 0
+
+
+@pytest.mark.django_db
+def test_validate_cart_reports_problems_per_line(api_client, django_assert_num_queries):
+    ok = ProductFactory(price=decimal.Decimal("10000.00"), stock_qty=5)
+    short = ProductFactory(stock_qty=3)
+    held = ProductFactory(stock_qty=1)
+    inactive = ProductFactory(active=False)
+    repriced = ProductFactory(price=decimal.Decimal("20000.00"), stock_qty=5)
+    cart = CartFactory(session_token="validate-cart")
+    for product, quantity in ((ok, 2), (short, 4), (held, 1), (inactive, 1), (repriced, 1)):
+        CartItemFactory(cart=cart, product=product, quantity=quantity)
+    StockReservation.objects.create(
+        cart=CartFactory(), product=held, quantity=1, expires_at=timezone.now() + datetime.timedelta(minutes=5)
+    )
+    Product.objects.filter(id=repriced.id).update(discount_price=15000)
+    url = "/api/checkout/validate?region=Biobío"
+    api_client.get(url, HTTP_X_SESSION_TOKEN=cart.session_token)  # compila el índice de envíos
+
+    # carrito, items, productos (id__in), reservas
+    with django_assert_num_queries(4):
+        response = api_client.get(url, HTTP_X_SESSION_TOKEN=cart.session_token)
+
+    assert response.status_code == 200, response.content
+    data = response.json()
+    problems = {line["product_id"]: line["problems"] for line in data["items"]}
+    assert problems == {
+        ok.id: [],
+        short.id: ["INSUFFICIENT_STOCK"],
+        held.id: ["OUT_OF_STOCK"],
+        inactive.id: ["INACTIVE"],
+        repriced.id: ["PRICE_CHANGED"],
+    }
+    assert not data["valid"]
+    # Precios vigentes de los productos activos; el inactivo no suma
+    assert data["subtotal"] == 2 * 10000 + 4 * 19990 + 19990 + 15000
+    assert data["total"] == data["subtotal"] + data["shipping_cost"]
+    assert Product.objects.get(id=short.id).stock_qty == 3
+
+
+@pytest.mark.django_db
+def test_validate_cart_accepts_valid_cart(api_client):
+    cart = CartFactory(session_token="validate-ok")
+    CartItemFactory(cart=cart, product=ProductFactory(stock_qty=2), quantity=2)
+
+    response = api_client.get("/api/checkout/validate", HTTP_X_SESSION_TOKEN=cart.session_token)
+
+    assert response.status_code == 200
+    assert response.json()["valid"]
+    assert api_client.get("/api/checkout/validate", HTTP_X_SESSION_TOKEN="sin-carrito").status_code == 404
+
+
+@pytest.mark.django_db
+def test_checkout_bootstrap_fixed_queries(auth_client, user, django_assert_num_queries):
+    zone = ShippingZone.objects.create(name="Sur", code="SUR", regions=["Biobío"])
+    ShippingRule.objects.create(zone=zone, rule_type="ALL", base_cost=decimal.Decimal("3500.00"))
+    Address.objects.create(user=user, street="Calle 1", city="Santiago", region="Región Metropolitana")
+    home = Address.objects.create(user=user, street="Los Álamos 456", city="Concepción", region="Biobío", is_default=True)
+    cart = CartFactory(user=user, session_token=None)
+    products = [ProductFactory(price=decimal.Decimal("10000.00")) for _ in range(4)]
+    for product in products:
+        ProductImage.objects.create(product=product, url=f"/media/products/{product.id}.jpg")
+        CartItemFactory(cart=cart, product=product, quantity=1)
+    Product.objects.filter(id=products[0].id).update(discount_price=8000)
+
+    first = auth_client.get("/api/checkout/bootstrap")  # actualiza el precio y compila el índice de envíos
+    assert first.status_code == 200, first.content
+
+    # direcciones, carrito, items con producto y categoría, imágenes
+    with django_assert_num_queries(4):
+        response = auth_client.get("/api/checkout/bootstrap")
+
+    data = response.json()
+    assert data["is_authenticated"] and data["user_email"] == user.email
+    assert data["default_address"]["id"] == home.id
+    assert [address["id"] for address in data["saved_addresses"]][0] == home.id
+    assert data["cart"]["subtotal"] == 38000
+    assert all(item["product"]["main_image"] for item in data["cart"]["items"])
+    assert data["shipping_quote"] == {
+        "region": "Biobío", "cost": 3500, "free_shipping_threshold": None, "zone": "Sur", "rule_type": "ALL",
+    }
+
+    other = auth_client.get("/api/checkout/bootstrap?region=Los Lagos").json()["shipping_quote"]
+    assert (other["region"], other["zone"]) == ("Los Lagos", None)
+
+
+@pytest.mark.django_db
+def test_checkout_bootstrap_for_guest(api_client):
+    cart = CartFactory(session_token="bootstrap-guest")
+    CartItemFactory(cart=cart, product=ProductFactory(price=decimal.Decimal("60000.00")), quantity=1)
+
+    data = api_client.get("/api/checkout/bootstrap", HTTP_X_SESSION_TOKEN=cart.session_token).json()
+
+    assert not data["is_authenticated"]
+    assert (data["saved_addresses"], data["default_address"], data["shipping_quote"]) == ([], None, None)
+    assert data["cart"]["id"] == cart.id
+    assert api_client.get("/api/checkout/bootstrap").json()["cart"] is None
@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+from django.db import connection, transaction
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from apps.orders.idempotency import idempotent
+from apps.orders.models import IdempotencyKey, Order
+from tests.factories import CartFactory, CartItemFactory, ProductFactory
+
+
+PAYLOAD = {
+    "customer_name": "Invitado Tester",
+    "customer_email": "guest@example.com",
+    "shipping_street": "Los Álamos 456",
+    "shipping_city": "Concepción",
+    "shipping_region": "Biobío",
+}
+
+
+def _post(api_client, payload, key, token="idem-token"):
+    return api_client.post(
+        "/api/orders/create",
+        payload,
+        format="json",
+        HTTP_X_SESSION_TOKEN=token,
+        HTTP_IDEMPOTENCY_KEY=key,
+    )
+
+
+@pytest.mark.django_db
+def test_retry_with_same_key_replays_response_without_new_order(auth_client, user, pending_status):
+    product = ProductFactory(stock_qty=5)
+    cart = CartFactory(user=user, session_token=None)
+    CartItemFactory(cart=cart, product=product, quantity=2)
+
+    first = auth_client.post("/api/orders/create", PAYLOAD, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+    # El cliente reintenta con un carrito nuevo (el anterior quedó inactivo)
+    new_cart = CartFactory(user=user, session_token=None)
+    CartItemFactory(cart=new_cart, product=product, quantity=2)
+    retry = auth_client.post("/api/orders/create", PAYLOAD, format="json", HTTP_IDEMPOTENCY_KEY="key-1")
+
+    assert first.status_code == 201, first.content
+    assert retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry["Idempotent-Replayed"] == "true"
+    assert Order.objects.count() == 1
+    product.refresh_from_db()
+    assert product.stock_qty == 3
+
+
+@pytest.mark.django_db
+def test_same_key_with_different_body_is_rejected(api_client, pending_status):
+    cart = CartFactory(user=None, session_token="idem-token")
+    CartItemFactory(cart=cart, product=ProductFactory(), quantity=1)
+
+    assert _post(api_client, PAYLOAD, "key-2").status_code == 201
+    response = _post(api_client, {**PAYLOAD, "shipping_city": "Talca"}, "key-2")
+
+    assert response.status_code == 422
+
+
+@pytest.mark.django_db
+def test_keys_are_scoped_per_client(api_client, pending_status):
+    for token in ("client-a", "client-b"):
+        cart = CartFactory(user=None, session_token=token)
+        CartItemFactory(cart=cart, product=ProductFactory(), quantity=1)
+        assert _post(api_client, PAYLOAD, "shared-key", token=token).status_code == 201
+
+    assert Order.objects.count() == 2
+    assert IdempotencyKey.objects.filter(key="shared-key").count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(
+    not connection.features.has_select_for_update,
+    reason="Requiere un motor con bloqueo por fila (MySQL/PostgreSQL)",
+)
+def test_duplicate_key_sees_response_committed_after_request_snapshot():
+    calls = []
+
+    @api_view(["POST"])
+    @permission_classes([AllowAny])
+    @idempotent("test")
+    def view(request):
+        calls.append(request.data)
+        return Response({"call": len(calls)}, status=201)
+
+    def post():
+        return view(APIRequestFactory().post("/", {"a": 1}, format="json", HTTP_IDEMPOTENCY_KEY="snapshot-key"))
+
+    def first_request():
+        try:
+            with transaction.atomic():
+                post()
+        finally:
+            connection.close()
+
+    with transaction.atomic():
+        # Como un request con ATOMIC_REQUESTS que ya leyó: en MySQL (REPEATABLE READ) fija la instantánea
+        assert not IdempotencyKey.objects.filter(key="snapshot-key").exists()
+        thread = threading.Thread(target=first_request)
+        thread.start()
+        thread.join()
+
+        retry = post()
+
+    assert retry.status_code == 201
+    assert retry["Idempotent-Replayed"] == "true"
+    assert retry.data == {"call": 1}
+    assert len(calls) == 1
@@ -0,0 +1,136 @@
+import pytest
+from django.core.management import call_command
+
+from apps.orders.models import Order, OrderItem
+from apps.orders.services import place_order
+from apps.products.models import Product, ProductImage
+from tests.factories import CartFactory, CartItemFactory, ProductFactory
+
+
+ORDER_DATA = {
+    "customer_name": "Cliente",
+    "customer_email": "cliente@example.com",
+    "shipping_street": "Calle 1",
+    "shipping_city": "Santiago",
+    "shipping_region": "Región Metropolitana",
+}
+
+
+def _create_order(user, items=2):
+    cart = CartFactory(user=user, session_token=None)
+    for index in range(items):
+        product = ProductFactory()
+        ProductImage.objects.create(product=product, url=f"https://cdn.example.com/{product.sku}-{index}.jpg", position=0)
+        CartItemFactory(cart=cart, product=product, quantity=index + 1)
+    return place_order(cart, ORDER_DATA, user=user)
+
+
+@pytest.mark.django_db
+def test_order_history_returns_paginated_summaries(auth_client, user, pending_status):
+    orders = [_create_order(user) for _ in range(3)]
+
+    response = auth_client.get("/api/orders/?page_size=2")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [order["id"] for order in data["results"]] == [orders[2].id, orders[1].id]
+    first = data["results"][0]
+    assert first["item_count"] == 3
+    assert first["thumbnail"].endswith("-0.jpg")
+    assert "items" not in first
+
+    next_page = auth_client.get(data["next"]).json()
+    assert [order["id"] for order in next_page["results"]] == [orders[0].id]
+    assert next_page["next"] is None
+
+
+@pytest.mark.django_db
+def test_order_history_pages_orders_with_same_created_at(auth_client, user, pending_status):
+    orders = [_create_order(user, items=1) for _ in range(5)]
+    Order.objects.filter(id__in=[order.id for order in orders]).update(created_at=orders[0].created_at)
+
+    seen, pages = [], []
+    url = "/api/orders/?page_size=2"
+    while url:
+        data = auth_client.get(url).json()
+        pages.append(data)
+        seen.extend(order["id"] for order in data["results"])
+        url = data["next"]
+
+    assert seen == sorted((order.id for order in orders), reverse=True)
+    assert len(pages) == 3
+
+    # Un pedido nuevo no desplaza la página siguiente, y `previous` vuelve a la anterior
+    _create_order(user, items=1)
+    second = auth_client.get(pages[0]["next"]).json()
+    assert [order["id"] for order in second["results"]] == seen[2:4]
+    previous = auth_client.get(second["previous"]).json()
+    assert [order["id"] for order in previous["results"]] == seen[:2]
+
+
+@pytest.mark.django_db
+def test_order_history_rejects_invalid_cursor(auth_client, user, pending_status):
+    response = auth_client.get("/api/orders/?cursor=no-es-un-cursor")
+
+    assert response.status_code == 404
+
+
+@pytest.mark.django_db
+def test_order_history_query_count_does_not_depend_on_items(auth_client, user, pending_status, django_assert_num_queries):
+    for _ in range(5):
+        _create_order(user, items=4)
+
+    # Savepoint/release de ATOMIC_REQUESTS, SELECT de pedidos (item_count y miniatura son
+    # columnas de orders) e INSERT de auditoría
+    with django_assert_num_queries(4):
+        response = auth_client.get("/api/orders/")
+
+    assert len(response.json()["results"]) == 5
+
+
+@pytest.mark.django_db
+def test_order_detail_reads_items_without_catalog(auth_client, user, pending_status, django_assert_num_queries):
+    order = _create_order(user, items=3)
+
+    # Savepoint/release, SELECT del pedido con estado, SELECT de items e INSERT de auditoría
+    with django_assert_num_queries(5):
+        response = auth_client.get(f"/api/orders/{order.id}/")
+
+    items = response.json()["items"]
+    assert len(items) == 3
+    assert items[0]["product"]["main_image"].endswith("-0.jpg")
+    assert items[0]["product"]["sku"]
+
+
+@pytest.mark.django_db
+def test_order_items_keep_purchase_snapshot(auth_client, user, pending_status):
+    order = _create_order(user, items=1)
+    item = order.items.get()
+    original_name, original_price = item.product_name, item.unit_price
+
+    Product.objects.filter(id=item.product_id).update(name="Nombre nuevo", price=1)
+    ProductImage.objects.filter(product_id=item.product_id).update(url="https://cdn.example.com/otra.jpg")
+
+    product = auth_client.get(f"/api/orders/{order.id}/").json()["items"][0]
+    assert product["product"]["name"] == original_name
+    assert product["product"]["main_image"].endswith("-0.jpg")
+    assert product["unit_price"] == int(original_price)
+
+
+@pytest.mark.django_db
+def test_backfill_order_snapshots_fills_legacy_orders(user, pending_status):
+    orders = [_create_order(user, items=2) for _ in range(3)]
+    # Simular pedidos anteriores a la copia del producto
+    Order.objects.update(item_count=0, thumbnail=None)
+    OrderItem.objects.update(product_name="", product_sku=None, product_slug="", product_image_url=None)
+    updated_at = Order.objects.get(id=orders[0].id).updated_at
+
+    call_command("backfill_order_snapshots", batch_size=2)
+
+    for order in Order.objects.order_by("id"):
+        assert order.item_count == 3
+        assert order.thumbnail.endswith("-0.jpg")
+    item = OrderItem.objects.select_related("product").first()
+    assert item.product_name == item.product.name
+    assert item.product_sku == item.product.sku
+    assert Order.objects.get(id=orders[0].id).updated_at == updated_at
@@ -0,0 +1,175 @@
+import hashlib
+import hmac
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.audit.models import AuditLog
+from apps.orders.models import Order, OrderStatus, OutboxEvent
+from apps.orders.outbox import HANDLERS, claim_events, email_event, enqueue, process_events
+from apps.orders.state_machine import transition_orders
+from apps.users.models import Address
+from tests.factories import CartFactory, CartItemFactory, ProductFactory
+
+
+CHECKOUT_PAYLOAD = {
+    "customer_name": "Cliente",
+    "customer_email": "cliente@example.com",
+    "shipping_street": "Los Álamos 456",
+    "shipping_city": "Concepción",
+    "shipping_region": "Biobío",
+    "save_address": True,
+}
+
+
+@pytest.fixture
+def webhook(settings):
+    """Receptor de webhooks local: registra cada entrega y responde los códigos de `responses`."""
+    received = []
+    responses = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received.append((dict(self.headers), body))
+            self.send_response(responses.pop(0) if responses else 200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    settings.ORDER_WEBHOOK_URL = f"http://127.0.0.1:{server.server_port}/hooks/orders"
+    settings.ORDER_WEBHOOK_SECRET = "secreto"
+    yield received, responses
+    server.shutdown()
+    server.server_close()
+
+
+def _create_order(client, user):
+    cart = CartFactory(user=user, session_token=None)
+    CartItemFactory(cart=cart, product=ProductFactory(stock_qty=5), quantity=1)
+    response = client.post("/api/orders/create", CHECKOUT_PAYLOAD, format="json")
+    assert response.status_code == 201, response.content
+    return Order.objects.get(id=response.json()["id"])
+
+
+@pytest.mark.django_db
+def test_checkout_side_effects_run_in_worker(auth_client, user, pending_status, regions, webhook):
+    received, _ = webhook
+
+    order = _create_order(auth_client, user)
+
+    # La respuesta no esperó ningún efecto: solo quedaron registrados con el pedido
+    assert not Address.objects.filter(user=user).exists()
+    assert received == []
+    assert sorted(OutboxEvent.objects.filter(order=order).values_list("kind", flat=True)) == [
+        "AUDIT", "SALES_ROLLUP", "SAVE_ADDRESS", "WEBHOOK",
+    ]
+
+    call_command("run_outbox")
+
+    assert Address.objects.get(user=user).region_code == "BI"
+    audit = AuditLog.objects.get(table_name="orders", record_id=order.id)
+    assert (audit.action, audit.user_id, audit.new_values["status"]) == ("CREATE", user.id, "PENDING")
+    headers, body = received[0]
+    assert json.loads(body)["event"] == "order.created"
+    assert headers["X-CondorShop-Signature"] == "sha256=" + hmac.new(b"secreto", body, hashlib.sha256).hexdigest()
+    assert set(OutboxEvent.objects.values_list("status", flat=True)) == {"DONE"}
+
+    # Reejecutar un evento ya aplicado (entrega al menos una vez) no duplica la dirección
+    OutboxEvent.objects.filter(kind="SAVE_ADDRESS").update(status="PENDING")
+    process_events()
+    assert Address.objects.filter(user=user).count() == 1
+
+
+@pytest.mark.django_db
+def test_failed_webhook_is_retried_with_backoff(webhook, pending_status, settings):
+    received, responses = webhook
+    settings.OUTBOX_MAX_ATTEMPTS = 2
+    order = Order.objects.create(
+        status=pending_status,
+        customer_name="Cliente",
+        customer_email="cliente@example.com",
+        shipping_street="Calle 1",
+        shipping_city="Santiago",
+        shipping_region="Metropolitana",
+        total_amount=10000,
+    )
+    transition_orders([order.id], OrderStatus.objects.create(code="PAID"))
+    responses.extend([503, 503])
+
+    # El traslado de los rollups al estado PAID se aplica; el webhook se reintenta
+    assert process_events() == {"done": 1, "retried": 1, "failed": 0}
+    event = OutboxEvent.objects.get(kind="WEBHOOK")
+    assert event.attempts == 1 and event.available_at > timezone.now() + timedelta(seconds=20)
+    assert process_events() == {"done": 0, "retried": 0, "failed": 0}  # aún no disponible
+
+    OutboxEvent.objects.update(available_at=timezone.now())
+    assert process_events() == {"done": 0, "retried": 0, "failed": 1}
+    event.refresh_from_db()
+    assert (event.status, event.attempts) == ("FAILED", 2)
+    assert "503" in event.last_error
+    assert [json.loads(body)["status"] for _, body in received] == ["PAID", "PAID"]
+
+
+@pytest.mark.django_db
+def test_email_is_sent_by_worker_and_processed_events_are_purged(pending_status, settings):
+    order = Order.objects.create(
+        status=pending_status,
+        customer_name="Cliente",
+        customer_email="cliente@example.com",
+        shipping_street="Calle 1",
+        shipping_city="Santiago",
+        shipping_region="Metropolitana",
+        total_amount=10000,
+    )
+    enqueue([email_event(order)])
+    assert mail.outbox == []
+
+    process_events()
+
+    assert mail.outbox[0].to == ["cliente@example.com"]
+    OutboxEvent.objects.update(processed_at=timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS + 1))
+    call_command("run_outbox")
+    assert not OutboxEvent.objects.exists()
+
+
+@pytest.mark.django_db
+def test_worker_skips_events_reclaimed_after_their_lease_expired(pending_status, monkeypatch):
+    order = Order.objects.create(
+        status=pending_status,
+        customer_name="Cliente",
+        customer_email="cliente@example.com",
+        shipping_street="Calle 1",
+        shipping_city="Santiago",
+        shipping_region="Metropolitana",
+        total_amount=10000,
+    )
+    enqueue([email_event(order), email_event(order)])
+    ran = []
+
+    def slow_handler(event):
+        ran.append(event.id)
+        # Mientras corre el primero vence la reserva del segundo y otro worker lo toma
+        OutboxEvent.objects.exclude(id=event.id).update(available_at=timezone.now())
+        assert len(claim_events(batch_size=10)) == 1
+
+    monkeypatch.setitem(HANDLERS, OutboxEvent.KIND_EMAIL, slow_handler)
+
+    assert process_events() == {"done": 1, "retried": 0, "failed": 0}
+    assert len(ran) == 1
+    statuses = dict(OutboxEvent.objects.values_list("id", "status"))
+    assert statuses[ran[0]] == "DONE"
+    assert sorted(statuses.values()) == ["DONE", "PENDING"]
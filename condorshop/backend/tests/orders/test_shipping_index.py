@@ -0,0 +1,89 @@
+import decimal
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.orders.models import ShippingRule, ShippingZone
+from apps.orders.services import evaluate_shipping
+from tests.factories import CartItemFactory, ProductFactory
+
+
+@pytest.fixture
+def metropolitana():
+    return ShippingZone.objects.create(
+        name="Metropolitana",
+        code="RM",
+        regions=["Región Metropolitana", "Santiago"],
+    )
+
+
+def _rule(**kwargs):
+    defaults = {"base_cost": decimal.Decimal("3000.00"), "priority": 0}
+    defaults.update(kwargs)
+    return ShippingRule.objects.create(**defaults)
+
+
+@pytest.mark.django_db
+def test_quote_uses_compiled_index_without_queries(metropolitana, django_assert_num_queries):
+    _rule(zone=metropolitana, rule_type="ALL")
+    item = CartItemFactory(product=ProductFactory())
+    items = [item]
+    evaluate_shipping("Región Metropolitana", 10000, items)  # compila el índice
+
+    with django_assert_num_queries(0):
+        result = evaluate_shipping("Región Metropolitana", 10000, items)
+
+    assert result["zone"] == "Metropolitana"
+    assert result["cost"] == decimal.Decimal("3000.00")
+
+
+@pytest.mark.django_db
+def test_quote_with_database_cache_only_reads_versions(metropolitana, settings):
+    # Con CACHE_URL=dbcache:// cada cotización lee en la tabla de caché la versión del
+    # índice de envíos y la de los alias de regiones; zonas y reglas siguen en memoria
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "django_cache"}}
+    call_command("createcachetable")
+    cache.clear()
+    _rule(zone=metropolitana, rule_type="ALL")
+    small = [CartItemFactory(product=ProductFactory())]
+    large = [CartItemFactory(product=ProductFactory()) for _ in range(5)]
+    evaluate_shipping("Región Metropolitana", 10000, small)  # compila el índice
+
+    for items in (small, large):
+        with CaptureQueriesContext(connection) as queries:
+            result = evaluate_shipping("Región Metropolitana", 10000, items)
+        assert result["zone"] == "Metropolitana"
+        assert len(queries) == 2
+        assert all("django_cache" in query["sql"] for query in queries.captured_queries)
+
+
+@pytest.mark.django_db
+def test_region_match_is_exact_and_accent_insensitive(metropolitana):
+    _rule(zone=metropolitana, rule_type="ALL")
+    items = [CartItemFactory(product=ProductFactory())]
+
+    assert evaluate_shipping("region  metropolitana", 10000, items)["zone"] == "Metropolitana"
+    assert evaluate_shipping("Metropolitana", 10000, items)["zone"] is None
+
+
+@pytest.mark.django_db
+def test_rule_precedence_and_priority(metropolitana):
+    product = ProductFactory()
+    items = [CartItemFactory(product=product)]
+    _rule(zone=metropolitana, rule_type="ALL", priority=50)
+    category_rule = _rule(rule_type="CATEGORY", category=product.category, base_cost=decimal.Decimal("2000.00"))
+    low_product_rule = _rule(zone=metropolitana, rule_type="PRODUCT", product=product, priority=1)
+    high_product_rule = _rule(rule_type="PRODUCT", product=product, priority=5)
+
+    result = evaluate_shipping("Santiago", 10000, items)
+    assert result["applied_rule_id"] == high_product_rule.id
+
+    high_product_rule.is_active = False
+    high_product_rule.save()
+    assert evaluate_shipping("Santiago", 10000, items)["applied_rule_id"] == low_product_rule.id
+
+    ShippingRule.objects.filter(rule_type="PRODUCT").delete()
+    assert evaluate_shipping("Santiago", 10000, items)["applied_rule_id"] == category_rule.id
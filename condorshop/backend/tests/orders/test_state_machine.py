@@ -0,0 +1,122 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.orders.models import Order, OrderStatus, OrderStatusHistory
+from apps.orders.services import place_order
+from apps.orders.state_machine import can_transition, transition_orders
+from apps.products.models import Product
+from tests.factories import CartFactory, CartItemFactory, ProductFactory
+
+
+ORDER_DATA = {
+    "customer_name": "Cliente",
+    "customer_email": "cliente@example.com",
+    "shipping_street": "Calle 1",
+    "shipping_city": "Santiago",
+    "shipping_region": "Región Metropolitana",
+}
+
+
+@pytest.fixture
+def statuses(pending_status):
+    return {
+        code: OrderStatus.objects.get_or_create(code=code)[0]
+        for code in ("PREPARING", "SHIPPED", "DELIVERED", "CANCELLED")
+    }
+
+
+def _orders(count, products=None, quantity=2):
+    products = products or [ProductFactory(stock_qty=100)]
+    orders = []
+    for _ in range(count):
+        cart = CartFactory(user=None)
+        for product in products:
+            CartItemFactory(cart=cart, product=product, quantity=quantity)
+        orders.append(place_order(cart, ORDER_DATA))
+    return orders
+
+
+def test_transition_map():
+    assert can_transition("PENDING", "CANCELLED")
+    assert can_transition("PREPARING", "SHIPPED")
+    assert not can_transition("SHIPPED", "PENDING")
+    assert not can_transition("CANCELLED", "PREPARING")
+    # Un pedido pagado solo se cancela al reembolsarlo
+    assert not can_transition("PAID", "CANCELLED")
+    assert can_transition("PAID", "CANCELLED", refunded=True)
+    assert not can_transition("PREPARING", "CANCELLED", refunded=True)
+
+
+@pytest.mark.django_db
+def test_bulk_transition_query_count_is_constant(statuses):
+    few = _orders(2)
+    many = _orders(10)
+    transition_orders([order.id for order in few], statuses["PREPARING"])  # crea las filas de rollup
+
+    with CaptureQueriesContext(connection) as small:
+        transition_orders([few[0].id], statuses["SHIPPED"])
+    transition_orders([order.id for order in many], statuses["PREPARING"])
+    with CaptureQueriesContext(connection) as large:
+        transition_orders([order.id for order in many], statuses["SHIPPED"])
+
+    # 10 pedidos no agregan consultas (las filas de rollup de SHIPPED ya existen: solo UPDATE)
+    assert len(large) <= len(small)
+    assert Order.objects.filter(status=statuses["SHIPPED"]).count() == 11
+    assert OrderStatusHistory.objects.filter(status=statuses["SHIPPED"]).count() == 11
+
+
+@pytest.mark.django_db
+def test_bulk_status_endpoint_is_all_or_nothing(admin_client, statuses):
+    orders = _orders(3)
+    transition_orders([orders[0].id, orders[1].id], statuses["PREPARING"])
+
+    response = admin_client.post(
+        "/api/admin/orders/bulk-status/",
+        {"order_ids": [order.id for order in orders], "status_id": statuses["SHIPPED"].id},
+        format="json",
+    )
+
+    assert response.status_code == 400
+    assert response.json()["invalid"] == [{"id": orders[2].id, "status": "PENDING"}]
+    assert not Order.objects.filter(status=statuses["SHIPPED"]).exists()
+
+    response = admin_client.post(
+        "/api/admin/orders/bulk-status/",
+        {"order_ids": [orders[0].id, orders[1].id], "status_id": statuses["SHIPPED"].id, "note": "Ola 12"},
+        format="json",
+    )
+    assert response.status_code == 200
+    assert response.json()["updated"] == 2
+    assert OrderStatusHistory.objects.filter(note="Ola 12").count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_cancel_restocks_products(admin_client, statuses):
+    first, second = ProductFactory(stock_qty=20), ProductFactory(stock_qty=20)
+    orders = _orders(3, products=[first, second], quantity=2)
+    assert Product.objects.get(id=first.id).stock_qty == 14
+
+    response = admin_client.post(
+        "/api/admin/orders/bulk-status/",
+        {"order_ids": [order.id for order in orders], "status_id": statuses["CANCELLED"].id},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert Product.objects.get(id=first.id).stock_qty == 20
+    assert Product.objects.get(id=second.id).stock_qty == 20
+
+
+@pytest.mark.django_db
+def test_bulk_status_reports_missing_orders(admin_client, statuses):
+    order = _orders(1)[0]
+
+    response = admin_client.post(
+        "/api/admin/orders/bulk-status/",
+        {"order_ids": [order.id, 999999], "status_id": statuses["PREPARING"].id},
+        format="json",
+    )
+
+    assert response.status_code == 404
+    assert response.json()["missing"] == [999999]
@@ -0,0 +1,405 @@
+import json
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.orders.models import Order, OrderStatus, PaymentStatus, PaymentTransaction
+from apps.orders.payments import (
+    PaymentError,
+    apply_gateway_result,
+    order_payment_token,
+    refund_order_payment,
+    start_webpay_payment,
+)
+from apps.orders.services import place_order
+from apps.orders.state_machine import transition_orders
+from apps.orders.webpay import TRANSACTIONS_PATH, WebpayError, get_webpay_client
+from apps.products.models import Product
+from tests.factories import CartFactory, CartItemFactory, ProductFactory
+
+
+class MockWebpay:
+    """Pasarela Webpay en memoria: transacciones por token y registro de solicitudes."""
+
+    def __init__(self):
+        self.transactions = {}
+        self.requests = []
+        self.fail_next = []
+        self.commit_status = "AUTHORIZED"
+
+    def authorize(self, token, status="AUTHORIZED"):
+        tx = self.transactions[token]
+        tx.update(
+            status=status,
+            response_code=0 if status == "AUTHORIZED" else -1,
+            authorization_code="1213",
+            card_detail={"card_number": "6623"},
+        )
+        return tx
+
+    def handle(self, method, path, body):
+        if self.fail_next:
+            return self.fail_next.pop(0), {"error_message": "Servicio no disponible"}
+
+        parts = path[len(TRANSACTIONS_PATH):].strip("/").split("/")
+        token = parts[0]
+        if method == "POST" and not token:
+            token = uuid.uuid4().hex
+            self.transactions[token] = {
+                "buy_order": body["buy_order"],
+                "session_id": body["session_id"],
+                "amount": body["amount"],
+                "status": "INITIALIZED",
+            }
+            return 200, {"token": token, "url": "https://webpay.test/webpayserver/initTransaction"}
+        if token not in self.transactions:
+            return 422, {"error_message": "Transaction not found"}
+        tx = self.transactions[token]
+        if method == "PUT":
+            if tx["status"] != "INITIALIZED":
+                return 422, {"error_message": "Invalid status for transaction while authorizing"}
+            return 200, self.authorize(token, self.commit_status)
+        if method == "GET":
+            return 200, tx
+        if method == "POST" and parts[1:] == ["refunds"]:
+            tx["status"] = "NULLIFIED"
+            return 200, {"type": "NULLIFIED", "authorization_code": "123456", "response_code": 0}
+        return 404, {"error_message": "Not found"}
+
+
+@pytest.fixture
+def webpay(settings):
+    gateway = MockWebpay()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def _dispatch(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            gateway.requests.append((self.command, self.path, self.client_address[1]))
+            code, payload = gateway.handle(self.command, self.path, body)
+            data = json.dumps(payload).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PUT = _dispatch
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.WEBPAY_BASE_URL = f"http://127.0.0.1:{server.server_port}"
+    settings.WEBPAY_FRONTEND_RESULT_URL = "http://front.test/checkout/result"
+    yield gateway
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def payment_statuses(pending_status):
+    for code in ("PAID", "FAILED", "CANCELLED"):
+        OrderStatus.objects.get_or_create(code=code)
+    for code in ("CREATED", "CAPTURED", "FAILED", "REFUNDED"):
+        PaymentStatus.objects.get_or_create(code=code)
+
+
+def _order(product=None, quantity=2):
+    cart = CartFactory(user=None)
+    CartItemFactory(cart=cart, product=product or ProductFactory(stock_qty=10), quantity=quantity)
+    return place_order(cart, {
+        "customer_name": "Cliente",
+        "customer_email": "cliente@example.com",
+        "shipping_street": "Calle 1",
+        "shipping_city": "Santiago",
+        "shipping_region": "Región Metropolitana",
+    })
+
+
+def _start(api_client, order, **headers):
+    response = api_client.post(
+        "/api/checkout/webpay/create",
+        {"order_id": order.id, "payment_token": order_payment_token(order)},
+        format="json",
+        **headers,
+    )
+    assert response.status_code == 201, response.content
+    return response.json()
+
+
+def _commits(webpay):
+    return [request for request in webpay.requests if request[0] == "PUT"]
+
+
+@pytest.mark.django_db
+def test_approved_payment_marks_order_paid(api_client, webpay, payment_statuses):
+    order = _order()
+    data = _start(api_client, order)
+    assert data["url"].endswith("initTransaction")
+
+    response = api_client.get(f"/api/checkout/webpay/return?token_ws={data['token']}")
+
+    assert response.status_code == 302
+    assert response["Location"] == f"http://front.test/checkout/result?status=approved&order={order.id}"
+    order.refresh_from_db()
+    tx = PaymentTransaction.objects.select_related("payment__status").get(tbk_token=data["token"])
+    assert order.status.code == "PAID"
+    assert tx.payment.status.code == "CAPTURED"
+    assert (tx.status, tx.response_code, tx.card_detail) == ("AUTHORIZED", 0, "6623")
+
+    # Un segundo retorno (recarga del navegador) no vuelve a confirmar
+    again = api_client.get(f"/api/checkout/webpay/return?token_ws={data['token']}")
+    assert again["Location"] == response["Location"]
+    assert len(_commits(webpay)) == 1
+
+
+@pytest.mark.django_db
+def test_rejected_payment_can_be_retried_and_abort_skips_commit(api_client, webpay, payment_statuses):
+    order = _order()
+    webpay.commit_status = "FAILED"
+    first = _start(api_client, order)
+
+    response = api_client.get(f"/api/checkout/webpay/return?token_ws={first['token']}")
+
+    assert "status=rejected" in response["Location"]
+    order.refresh_from_db()
+    assert order.status.code == "FAILED"
+
+    retry = _start(api_client, order)
+    response = api_client.post("/api/checkout/webpay/return", {"TBK_TOKEN": retry["token"], "TBK_ORDEN_COMPRA": "x"})
+
+    assert "status=aborted" in response["Location"]
+    assert len(_commits(webpay)) == 1
+    assert PaymentTransaction.objects.get(tbk_token=retry["token"]).payment.status.code == "FAILED"
+
+
+@pytest.mark.django_db
+def test_create_requires_order_owner(api_client, webpay, payment_statuses):
+    order = _order()
+
+    # Conocer el id y el email del pedido no basta: se requiere su payment_token
+    for body in (
+        {"order_id": order.id, "customer_email": "cliente@example.com"},
+        {"order_id": order.id, "payment_token": order_payment_token(_order())},
+        {"order_id": order.id, "payment_token": order_payment_token(order) + "x"},
+    ):
+        response = api_client.post("/api/checkout/webpay/create", body, format="json")
+        assert response.status_code == 404
+    assert webpay.requests == []
+
+
+@pytest.mark.django_db
+def test_guest_checkout_returns_payment_token(api_client, webpay, payment_statuses):
+    cart = CartFactory(user=None, session_token="guest-pay")
+    CartItemFactory(cart=cart, product=ProductFactory(stock_qty=5), quantity=1)
+    created = api_client.post(
+        "/api/orders/create",
+        {
+            "customer_name": "Cliente",
+            "customer_email": "cliente@example.com",
+            "shipping_street": "Calle 1",
+            "shipping_city": "Santiago",
+            "shipping_region": "Región Metropolitana",
+        },
+        format="json",
+        HTTP_X_SESSION_TOKEN="guest-pay",
+    ).json()
+
+    response = api_client.post(
+        "/api/checkout/webpay/create",
+        {"order_id": created["id"], "payment_token": created["payment_token"]},
+        format="json",
+    )
+    assert response.status_code == 201, response.content
+
+
+@pytest.mark.django_db
+def test_create_retries_reuse_the_open_transaction(api_client, webpay, payment_statuses):
+    order = _order()
+
+    first = _start(api_client, order)
+    assert _start(api_client, order)["token"] == first["token"]
+    # El token lleva su fecha de firma: el reintento debe reenviar el mismo cuerpo
+    body = {"order_id": order.id, "payment_token": order_payment_token(order)}
+    replay = api_client.post("/api/checkout/webpay/create", body, format="json", HTTP_IDEMPOTENCY_KEY="pago-1")
+    again = api_client.post("/api/checkout/webpay/create", body, format="json", HTTP_IDEMPOTENCY_KEY="pago-1")
+    assert again["Idempotent-Replayed"] == "true"
+    assert replay.json() == again.json() == first
+
+    creates = [request for request in webpay.requests if request[0] == "POST"]
+    assert len(creates) == 1
+    assert PaymentTransaction.objects.filter(payment__order=order).count() == 1
+
+    # Vencido el formulario de Webpay, se abre una transacción nueva
+    PaymentTransaction.objects.update(created_at=timezone.now() - timedelta(minutes=10))
+    assert _start(api_client, order)["token"] != first["token"]
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(
+    not connection.features.has_select_for_update,
+    reason="Requiere un motor con bloqueo por fila (MySQL/PostgreSQL)",
+)
+def test_concurrent_creates_open_a_single_transaction(webpay, payment_statuses):
+    order = _order()
+    token = order_payment_token(order)
+
+    def create(_):
+        try:
+            return APIClient().post(
+                "/api/checkout/webpay/create", {"order_id": order.id, "payment_token": token}, format="json"
+            ).json()["token"]
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tokens = set(executor.map(create, range(8)))
+
+    assert len(tokens) == 1
+    assert PaymentTransaction.objects.filter(payment__order=order).count() == 1
+
+
+@pytest.mark.django_db
+def test_client_keeps_connection_open_and_retries_only_reads(webpay, payment_statuses):
+    client = get_webpay_client()
+    assert get_webpay_client() is client
+    token = client.create("1-abc", "session", 1000, "http://localhost/return")["token"]
+
+    webpay.fail_next = [503]
+    assert client.status(token)["status"] == "INITIALIZED"  # GET: reintento tras el 503
+
+    webpay.fail_next = [503]
+    with pytest.raises(WebpayError) as exc_info:
+        client.commit(token)  # PUT: no se reintenta
+    assert exc_info.value.status_code == 503
+
+    assert len(webpay.requests) == 4
+    assert len({port for _, _, port in webpay.requests}) == 1
+
+
+@pytest.mark.django_db
+def test_failed_commit_is_left_for_reconciliation(api_client, webpay, payment_statuses):
+    order = _order()
+    data = _start(api_client, order)
+    webpay.fail_next = [500]
+
+    response = api_client.get(f"/api/checkout/webpay/return?token_ws={data['token']}")
+
+    assert "status=pending" in response["Location"]
+    assert PaymentTransaction.objects.get(tbk_token=data["token"]).processed_at is None
+
+
+@pytest.mark.django_db
+def test_reconcile_command_applies_gateway_status(webpay, payment_statuses):
+    orders = [_order() for _ in range(4)]
+    txs = [start_webpay_payment(Order.objects.select_related("status").get(id=order.id))[0] for order in orders]
+    webpay.authorize(txs[0].tbk_token)  # commit hecho en la pasarela, respuesta perdida
+    webpay.authorize(txs[1].tbk_token, status="FAILED")
+    PaymentTransaction.objects.filter(id__in=[tx.id for tx in txs[:3]]).update(
+        created_at=timezone.now() - timedelta(hours=2)
+    )
+    # txs[2] sigue INITIALIZED y venció; txs[3] es reciente y no se consulta
+
+    call_command("reconcile_webpay", "--older-than=10", "--expire-after=60", "--workers=3")
+
+    statuses = {order.id: order.status.code for order in Order.objects.filter(id__in=[o.id for o in orders]).select_related("status")}
+    assert [statuses[order.id] for order in orders] == ["PAID", "FAILED", "FAILED", "PENDING"]
+    assert PaymentTransaction.objects.get(id=txs[2].id).status == "EXPIRED"
+    assert sum(1 for method, _, _ in webpay.requests if method == "GET") == 3
+
+
+@pytest.mark.django_db
+def test_admin_refund_cancels_order_and_restocks(api_client, admin_client, webpay, payment_statuses):
+    product = ProductFactory(stock_qty=10)
+    order = _order(product, quantity=3)
+    data = _start(api_client, order)
+    api_client.get(f"/api/checkout/webpay/return?token_ws={data['token']}")
+    assert Product.objects.get(id=product.id).stock_qty == 7
+
+    response = admin_client.post(f"/api/admin/orders/{order.id}/refund/")
+
+    assert response.status_code == 200, response.content
+    assert response.json()["status"]["code"] == "CANCELLED"
+    assert Product.objects.get(id=product.id).stock_qty == 10
+    tx = PaymentTransaction.objects.select_related("payment__status").get(tbk_token=data["token"])
+    assert (tx.status, tx.payment.status.code) == ("NULLIFIED", "REFUNDED")
+    assert admin_client.post(f"/api/admin/orders/{order.id}/refund/").status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("path", [("PREPARING",), ("PREPARING", "SHIPPED")])
+def test_refund_is_refused_once_order_is_being_fulfilled(api_client, admin_client, webpay, payment_statuses, path):
+    order = _order()
+    data = _start(api_client, order)
+    api_client.get(f"/api/checkout/webpay/return?token_ws={data['token']}")
+    for code in path:
+        transition_orders([order.id], OrderStatus.objects.get_or_create(code=code)[0])
+
+    response = admin_client.post(f"/api/admin/orders/{order.id}/refund/")
+
+    assert response.status_code == 400
+    assert not [request for request in webpay.requests if request[1].endswith("/refunds")]
+    tx = PaymentTransaction.objects.select_related("payment__status").get(tbk_token=data["token"])
+    assert tx.payment.status.code == "CAPTURED"
+    assert Order.objects.select_related("status").get(id=order.id).status.code == path[-1]
+
+
+@pytest.mark.django_db
+def test_paid_order_cannot_be_cancelled_without_refund(api_client, admin_client, webpay, payment_statuses):
+    product = ProductFactory(stock_qty=10)
+    order = _order(product, quantity=3)
+    data = _start(api_client, order)
+    api_client.get(f"/api/checkout/webpay/return?token_ws={data['token']}")
+    cancelled = OrderStatus.objects.get(code="CANCELLED")
+
+    single = admin_client.patch(f"/api/admin/orders/{order.id}/status/", {"status_id": cancelled.id}, format="json")
+    bulk = admin_client.post(
+        "/api/admin/orders/bulk-status/", {"order_ids": [order.id], "status_id": cancelled.id}, format="json"
+    )
+
+    assert single.status_code == bulk.status_code == 400
+    assert "reembolsando" in single.json()["error"]
+    assert Order.objects.select_related("status").get(id=order.id).status.code == "PAID"
+    assert Product.objects.get(id=product.id).stock_qty == 7
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(
+    not connection.features.has_select_for_update,
+    reason="Requiere un motor con bloqueo por fila (MySQL/PostgreSQL)",
+)
+def test_concurrent_refunds_call_the_gateway_once(webpay, payment_statuses):
+    order = _order()
+    tx, _ = start_webpay_payment(order)
+    webpay.authorize(tx.tbk_token)
+    apply_gateway_result(tx.id, get_webpay_client().status(tx.tbk_token))
+
+    def refund(_):
+        try:
+            refund_order_payment(order)
+            return "ok"
+        except PaymentError:
+            return "rejected"
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        outcomes = sorted(executor.map(refund, range(4)))
+
+    assert outcomes == ["ok", "rejected", "rejected", "rejected"]
+    assert len([request for request in webpay.requests if request[1].endswith("/refunds")]) == 1
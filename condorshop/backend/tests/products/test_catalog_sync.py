@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.products.models import CatalogDeletion, Product, ProductImage
+from tests.factories import CategoryFactory, ProductFactory
+
+
+@pytest.fixture(autouse=True)
+def no_lag(settings):
+    settings.CATALOG_SYNC_LAG_SECONDS = 0
+
+
+def _sync(client, **params):
+    response = client.get("/api/products/sync/", params)
+    assert response.status_code == 200, response.content
+    return response.json()
+
+
+def _sync_all(client, cursor=None, limit=2):
+    pages = []
+    while True:
+        page = _sync(client, limit=limit, **({"cursor": cursor} if cursor else {}))
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            return pages, cursor
+
+
+@pytest.mark.django_db
+def test_initial_sync_then_only_changes(api_client):
+    shoes = CategoryFactory()
+    products = [ProductFactory(category=shoes) for _ in range(5)]
+    hats = CategoryFactory()
+    hat = ProductFactory(category=hats)
+
+    pages, cursor = _sync_all(api_client)
+    assert len(pages) == 3
+    assert sorted(p["id"] for page in pages for p in page["products"]) == sorted([p.id for p in products] + [hat.id])
+    assert sorted(c["id"] for page in pages for c in page["categories"]) == [shoes.id, hats.id]
+
+    idle = _sync(api_client, cursor=cursor)
+    assert (idle["products"], idle["categories"], idle["deleted"]) == ([], [], {"products": [], "categories": []})
+
+    repriced, with_image, deactivated, deleted = products[:4]
+    repriced.price = 15990
+    repriced.save()
+    ProductImage.objects.create(product=with_image, url="/media/products/a.jpg", position=0)
+    Product.objects.filter(id=deactivated.id).update(active=False, updated_at=timezone.now())
+    deleted_id, hats_id = deleted.id, hats.id
+    deleted.delete()
+    hats.delete()
+
+    pages, _ = _sync_all(api_client, cursor)
+    changed = {p["id"]: p for page in pages for p in page["products"]}
+    assert set(changed) == {repriced.id, with_image.id, hat.id}
+    assert changed[repriced.id]["price"] == 15990
+    assert [image["url"] for image in changed[with_image.id]["images"]] == ["/media/products/a.jpg"]
+    assert changed[hat.id]["category"] is None
+    assert sorted(p for page in pages for p in page["deleted"]["products"]) == sorted([deactivated.id, deleted_id])
+    assert [c for page in pages for c in page["deleted"]["categories"]] == [hats_id]
+
+
+@pytest.mark.django_db
+def test_lag_holds_back_fresh_changes(api_client, settings):
+    ProductFactory()
+    settings.CATALOG_SYNC_LAG_SECONDS = 60
+
+    page = _sync(api_client)
+
+    assert (page["products"], page["categories"], page["has_more"]) == ([], [], False)
+
+
+@pytest.mark.django_db
+def test_invalid_and_expired_cursors(api_client, settings):
+    cursor = _sync(api_client)["next_cursor"]
+
+    assert api_client.get("/api/products/sync/?cursor=xyz").status_code == 400
+    settings.CATALOG_DELETION_RETENTION_DAYS = 0
+    assert api_client.get(f"/api/products/sync/?cursor={cursor}").status_code == 410
+
+
+@pytest.mark.django_db
+def test_purge_catalog_deletions(settings):
+    settings.CATALOG_DELETION_RETENTION_DAYS = 30
+    old, recent = ProductFactory(), ProductFactory()
+    old_id, recent_id = old.id, recent.id
+    old.delete()
+    recent.delete()
+    CatalogDeletion.objects.filter(object_id=old_id).update(deleted_at=timezone.now() - timedelta(days=31))
+
+    call_command("purge_catalog_deletions")
+
+    assert list(CatalogDeletion.objects.values_list("entity", "object_id")) == [("PRODUCT", recent_id)]
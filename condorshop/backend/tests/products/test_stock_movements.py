@@ -0,0 +1,99 @@
+import pytest
+from django.core.management import call_command
+
+from apps.orders.models import OrderStatus
+from apps.orders.services import place_order
+from apps.orders.state_machine import transition_orders
+from apps.products.models import Product, StockMovement
+from apps.products.services import ledger_balances, stock_discrepancies
+from tests.factories import CartFactory, CartItemFactory, ProductFactory
+
+
+def _order(products, quantity=2):
+    cart = CartFactory(user=None)
+    for product in products:
+        CartItemFactory(cart=cart, product=product, quantity=quantity)
+    return place_order(cart, {
+        "customer_name": "Cliente",
+        "customer_email": "cliente@example.com",
+        "shipping_street": "Calle 1",
+        "shipping_city": "Santiago",
+        "shipping_region": "Región Metropolitana",
+    })
+
+
+def _kinds(product):
+    return list(StockMovement.objects.filter(product=product).order_by("id").values_list("kind", "quantity"))
+
+
+@pytest.mark.django_db
+def test_sale_and_cancellation_are_recorded_with_the_order(pending_status):
+    cancelled = OrderStatus.objects.create(code="CANCELLED")
+    shirt, mug = ProductFactory(stock_qty=10), ProductFactory(stock_qty=5)
+
+    order = _order([shirt, mug])
+    transition_orders([order.id], cancelled)
+
+    assert _kinds(shirt) == [("ADJUSTMENT", 10), ("SALE", -2), ("CANCELLATION", 2)]
+    assert set(StockMovement.objects.exclude(kind="ADJUSTMENT").values_list("order_id", flat=True)) == {order.id}
+    assert ledger_balances([shirt.id, mug.id]) == {shirt.id: 10, mug.id: 5}
+    assert not stock_discrepancies()
+
+
+@pytest.mark.django_db
+def test_admin_stock_change_and_edit_write_movements(admin_client):
+    product = ProductFactory(stock_qty=4)
+
+    response = admin_client.post(
+        f"/api/admin/products/{product.id}/stock/",
+        {"quantity": 20, "kind": "RESTOCK", "note": "Factura 123"},
+        format="json",
+    )
+    assert response.status_code == 201, response.content
+    assert response.json()["stock_qty"] == 24
+
+    too_many = admin_client.post(f"/api/admin/products/{product.id}/stock/", {"quantity": -30}, format="json")
+    assert too_many.status_code == 400
+    assert too_many.json()["available"] == 24
+
+    response = admin_client.patch(f"/api/admin/products/{product.id}/", {"stock_qty": 21, "name": "Nuevo"}, format="json")
+    assert response.status_code == 200, response.content
+    assert response.json()["stock_qty"] == 21
+    assert _kinds(product) == [("ADJUSTMENT", 4), ("RESTOCK", 20), ("ADJUSTMENT", -3)]
+    assert Product.objects.get(id=product.id).stock_qty == 21
+
+
+@pytest.mark.django_db
+def test_movement_history_is_one_indexed_range_read(admin_client, django_assert_num_queries):
+    product = ProductFactory(stock_qty=100)
+    ProductFactory(stock_qty=7)  # otro producto: no aparece
+    for quantity in range(1, 6):
+        admin_client.post(f"/api/admin/products/{product.id}/stock/", {"quantity": quantity}, format="json")
+
+    # savepoint, usuario, producto (+ categoría e imágenes prefetch), movimientos, release
+    with django_assert_num_queries(6) as captured:
+        response = admin_client.get(f"/api/admin/products/{product.id}/stock-movements/?limit=3")
+
+    data = response.json()
+    assert [movement["quantity"] for movement in data["results"]] == [5, 4, 3]
+    assert sum('FROM "stock_movements"' in query["sql"] for query in captured.captured_queries) == 1
+
+    older = admin_client.get(f"/api/admin/products/{product.id}/stock-movements/?limit=3&before={data['next_before']}").json()
+    assert [movement["quantity"] for movement in older["results"]] == [2, 1, 100]
+    assert older["results"][0]["created_by"] is not None
+
+
+@pytest.mark.django_db
+def test_reconcile_stock_rebuilds_snapshots_from_ledger():
+    drifted, clean = ProductFactory(stock_qty=10), ProductFactory(stock_qty=3)
+    StockMovement.objects.create(product=drifted, kind="SALE", quantity=-4)
+    Product.objects.filter(id=clean.id).update(stock_qty=3)
+
+    call_command("reconcile_stock", "--dry-run")
+    assert Product.objects.get(id=drifted.id).stock_qty == 10
+
+    call_command("reconcile_stock")
+
+    assert Product.objects.get(id=drifted.id).stock_qty == 6
+    assert Product.objects.get(id=clean.id).stock_qty == 3
+    assert not stock_discrepancies()
@@ -214,7 +214,7 @@ const Orders = () => {
                     </td>
                     <td className="px-6 py-4 whitespace-nowrap">
                       <div className="text-sm text-gray-900">
-                        {order.customer_first_name} {order.customer_last_name}
+                        {order.customer_name}
                       </div>
                       <div className="text-sm text-gray-500">{order.customer_email}</div>
                     </td>
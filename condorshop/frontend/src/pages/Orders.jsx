@@ -8,7 +8,10 @@ import { useToast } from '../components/common/Toast'
 
 const Orders = () => {
   const [orders, setOrders] = useState([])
+  const [nextUrl, setNextUrl] = useState(null)
   const [loading, setLoading] = useState(true)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [details, setDetails] = useState({})
   const toast = useToast()
 
   useEffect(() => {
@@ -19,7 +22,8 @@ const Orders = () => {
     setLoading(true)
     try {
       const data = await ordersService.getUserOrders()
-      setOrders(Array.isArray(data) ? data : data.results || [])
+      setOrders(data.results)
+      setNextUrl(data.next)
     } catch (error) {
       toast.error('Error al cargar los pedidos')
       console.error('Error loading orders:', error)
@@ -28,6 +32,37 @@ const Orders = () => {
     }
   }
 
+  const loadMore = async () => {
+    setLoadingMore(true)
+    try {
+      const data = await ordersService.getUserOrders(nextUrl)
+      setOrders((current) => [...current, ...data.results])
+      setNextUrl(data.next)
+    } catch (error) {
+      toast.error('Error al cargar más pedidos')
+      console.error('Error loading more orders:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
+  const toggleDetail = async (orderId) => {
+    if (details[orderId]) {
+      setDetails((current) => {
+        const { [orderId]: _removed, ...rest } = current
+        return rest
+      })
+      return
+    }
+    try {
+      const detail = await ordersService.getOrderDetail(orderId)
+      setDetails((current) => ({ ...current, [orderId]: detail }))
+    } catch (error) {
+      toast.error('Error al cargar el detalle del pedido')
+      console.error('Error loading order detail:', error)
+    }
+  }
+
   const getStatusBadge = (status) => {
     const statusColors = {
       PENDING: 'bg-yellow-100 text-yellow-800',
@@ -109,8 +144,24 @@ const Orders = () => {
                 </div>
 
                 <div className="border-t pt-4">
+                  <div className="flex items-center gap-4 mb-4">
+                    <img
+                      src={order.thumbnail || '/placeholder-product.jpg'}
+                      alt={`Pedido ${order.id}`}
+                      className="w-16 h-16 object-cover rounded"
+                    />
+                    <p className="flex-1 text-sm text-gray-600">
+                      {order.item_count} {order.item_count === 1 ? 'producto' : 'productos'}
+                    </p>
+                    <button
+                      onClick={() => toggleDetail(order.id)}
+                      className="text-primary-600 hover:text-primary-700 text-sm font-medium"
+                    >
+                      {details[order.id] ? 'Ocultar detalle' : 'Ver detalle'}
+                    </button>
+                  </div>
                   <div className="space-y-2 mb-4">
-                    {order.items?.map((item) => (
+                    {details[order.id]?.items?.map((item) => (
                       <div key={item.id} className="flex items-center gap-4">
                         <img
                           src={getProductImage(item.product)}
@@ -152,6 +203,17 @@ const Orders = () => {
                 </div>
               </div>
             ))}
+            {nextUrl && (
+              <div className="text-center">
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="bg-white border border-gray-300 text-gray-700 px-6 py-2 rounded-lg hover:bg-gray-50 transition-colors disabled:opacity-50"
+                >
+                  {loadingMore ? 'Cargando...' : 'Cargar más pedidos'}
+                </button>
+              </div>
+            )}
           </div>
         )}
       </div>
@@ -79,6 +79,67 @@ export const adminService = {
     return response.data
   },
 
+  /**
+   * Reponer o ajustar el stock de un producto
+   * @param {number} productId
+   * @param {{ quantity: number, kind?: 'RESTOCK'|'ADJUSTMENT', note?: string }} data
+   */
+  changeProductStock: async (productId, data) => {
+    const response = await apiClient.post(`/admin/products/${productId}/stock/`, data)
+    return response.data
+  },
+
+  /**
+   * Historial de movimientos de stock de un producto
+   * @param {number} productId
+   * @param {{ limit?: number, before?: number }} [params]
+   */
+  getStockMovements: async (productId, params = {}) => {
+    const response = await apiClient.get(`/admin/products/${productId}/stock-movements/`, { params })
+    return response.data
+  },
+
+  /**
+   * Anular el pago Webpay de un pedido y cancelarlo
+   */
+  refundOrder: async (orderId) => {
+    const response = await apiClient.post(`/admin/orders/${orderId}/refund/`)
+    return response.data
+  },
+
+  /**
+   * Lista de picking: unidades por SKU y región de envío
+   * @param {Object} params - { status, date_from, date_to }
+   */
+  getPickList: async (params = {}) => {
+    const response = await apiClient.get('/admin/orders/pick-list/', { params })
+    return response.data
+  },
+
+  /**
+   * Pedidos modificados desde un cursor (feed de cambios)
+   * @param {Object} params - { cursor, since, limit }
+   */
+  getOrderChanges: async (params = {}) => {
+    const response = await apiClient.get('/admin/orders/changes/', { params })
+    return response.data
+  },
+
+  /**
+   * Cambiar el estado de varios pedidos (todos o ninguno)
+   * @param {number[]} orderIds
+   * @param {number} statusId
+   * @param {string} [note]
+   */
+  bulkUpdateOrderStatus: async (orderIds, statusId, note = '') => {
+    const response = await apiClient.post('/admin/orders/bulk-status/', {
+      order_ids: orderIds,
+      status_id: statusId,
+      note,
+    })
+    return response.data
+  },
+
   /**
    * Exportar pedidos a CSV
    * @param {Object} params - Filtros opcionales
@@ -91,6 +152,45 @@ export const adminService = {
     return response.data
   },
 
+  /**
+   * Solicitar una exportación en segundo plano
+   * @param {string} kind - ORDERS | PRODUCTS | AUDIT_LOGS
+   * @param {Object} filters - Filtros admitidos por el tipo de exportación
+   * @returns {Object} Trabajo ({ id, status, download_url, reused, ... })
+   */
+  createExportJob: async (kind, filters = {}) => {
+    const response = await apiClient.post('/admin/exports/', { kind, filters })
+    return response.data
+  },
+
+  /**
+   * Consultar el estado de una exportación (QUEUED, RUNNING, COMPLETED, FAILED)
+   */
+  getExportJob: async (jobId) => {
+    const response = await apiClient.get(`/admin/exports/${jobId}/`)
+    return response.data
+  },
+
+  /**
+   * Descargar el archivo .csv.gz de una exportación completada
+   */
+  downloadExportJob: async (jobId) => {
+    const response = await apiClient.get(`/admin/exports/${jobId}/download/`, {
+      responseType: 'blob',
+    })
+    return response.data
+  },
+
+  /**
+   * Analítica de ventas (rollups diarios)
+   * @param {string} report - summary | daily | regions | categories | statuses
+   * @param {Object} params - { date_from, date_to, status }
+   */
+  getSalesAnalytics: async (report, params = {}) => {
+    const response = await apiClient.get(`/admin/analytics/${report}/`, { params })
+    return response.data
+  },
+
   /**
    * Obtener estados de pedidos
    */
@@ -9,6 +9,14 @@ export const cartService = {
     return response.data
   },
 
+  /**
+   * Obtener cantidad de unidades del carrito (badge del header)
+   */
+  getCartCount: async () => {
+    const response = await apiClient.get('/cart/count')
+    return response.data.count
+  },
+
   /**
    * Agregar producto al carrito
    * @param {Object} data - { product_id, quantity }
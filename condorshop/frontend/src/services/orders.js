@@ -5,10 +5,66 @@ export const ordersService = {
   /**
    * Crear orden desde el carrito
    * @param {Object} data - Datos del pedido (customer, address, etc.)
+   * @param {string} [idempotencyKey] - Clave reutilizada en los reintentos de la misma compra
    * POST /api/checkout/create según backend
    */
-  createOrder: async (data) => {
-    const response = await apiClient.post('/checkout/create', data)
+  createOrder: async (data, idempotencyKey) => {
+    const config = idempotencyKey ? { headers: { 'Idempotency-Key': idempotencyKey } } : undefined
+    const response = await apiClient.post('/checkout/create', data, config)
+    return response.data
+  },
+
+  /**
+   * Datos iniciales del checkout: modo, direcciones, carrito y cotización de envío
+   * GET /api/checkout/bootstrap
+   * @param {string} region - Región a cotizar (opcional; por defecto la de la dirección predeterminada)
+   */
+  getCheckoutBootstrap: async (region) => {
+    const response = await apiClient.get('/checkout/bootstrap', { params: region ? { region } : {} })
+    return response.data
+  },
+
+  /**
+   * Reservar el stock del carrito al iniciar el checkout
+   * POST /api/checkout/reserve
+   */
+  reserveStock: async () => {
+    const response = await apiClient.post('/checkout/reserve')
+    return response.data
+  },
+
+  /**
+   * Revisar el carrito antes de crear el pedido (stock, productos activos y precios vigentes)
+   * GET /api/checkout/validate
+   * @param {string} region - Región de envío (opcional, para el costo de envío)
+   */
+  validateCart: async (region) => {
+    const response = await apiClient.get('/checkout/validate', { params: region ? { region } : {} })
+    return response.data
+  },
+
+  /**
+   * Consultar el estado de un ticket de venta flash (create_order respondió 202)
+   * GET /api/checkout/allocation/<ticket>
+   */
+  getAllocationStatus: async (ticket) => {
+    const response = await apiClient.get(`/checkout/allocation/${ticket}`)
+    return response.data
+  },
+
+  /**
+   * Iniciar el pago Webpay de un pedido
+   * @param {number} orderId
+   * @param {string} [paymentToken] - `payment_token` del pedido; requerido en pedidos de invitados
+   * @param {string} [idempotencyKey] - Misma clave en cada reintento del mismo pago
+   * POST /api/checkout/webpay/create → { token, url }: enviar `token_ws` por POST a `url`
+   */
+  startWebpayPayment: async (orderId, paymentToken, idempotencyKey) => {
+    const response = await apiClient.post(
+      '/checkout/webpay/create',
+      { order_id: orderId, payment_token: paymentToken },
+      idempotencyKey ? { headers: { 'Idempotency-Key': idempotencyKey } } : undefined
+    )
     return response.data
   },
 
@@ -23,10 +79,22 @@ export const ordersService = {
   },
 
   /**
-   * Obtener historial de órdenes del usuario
+   * Cotizar envío para varias regiones en una sola llamada
+   * @param {Object} data - { regions: [...], cart_items: [{ product_id, quantity }], subtotal }
+   * POST /api/checkout/shipping-quote → { quotes: [{ region, cost, ... }] }
+   */
+  getShippingQuotes: async (data) => {
+    const response = await apiClient.post('/checkout/shipping-quote', data)
+    return response.data.quotes
+  },
+
+  /**
+   * Obtener historial de órdenes del usuario (resúmenes paginados por cursor)
    * GET /api/orders/ - Historial del usuario autenticado
+   * @param {string} [nextUrl] - URL `next` de la página anterior
+   * @returns {{ results: Array, next: string|null }}
    */
-  getUserOrders: async () => {
+  getUserOrders: async (nextUrl) => {
     const { user } = useAuthStore.getState()
     
     if (!user) {
@@ -34,8 +102,20 @@ export const ordersService = {
     }
     
     // Endpoint correcto según backend: /api/orders/
-    const response = await apiClient.get('/orders')
-    return Array.isArray(response.data) ? response.data : response.data.results || []
+    const response = await apiClient.get(nextUrl || '/orders')
+    if (Array.isArray(response.data)) {
+      return { results: response.data, next: null }
+    }
+    return { results: response.data.results || [], next: response.data.next || null }
+  },
+
+  /**
+   * Obtener detalle de un pedido con sus productos
+   * GET /api/orders/{id}/
+   */
+  getOrderDetail: async (orderId) => {
+    const response = await apiClient.get(`/orders/${orderId}/`)
+    return response.data
   },
 }
 
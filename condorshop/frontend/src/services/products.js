@@ -26,6 +26,15 @@ export const productsService = {
     const response = await apiClient.get('/products/categories')
     return response.data
   },
+
+  /**
+   * Cambios del catálogo desde un cursor (sin cursor: catálogo completo)
+   * @param {Object} params - { cursor, limit }
+   */
+  getCatalogChanges: async (params = {}) => {
+    const response = await apiClient.get('/products/sync/', { params })
+    return response.data
+  },
 }
 
 